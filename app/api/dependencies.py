@@ -1,14 +1,19 @@
-from fastapi import Depends, HTTPException, status
+from typing import Awaitable, Callable
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
 import redis.asyncio as aioredis
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.db.session import SessionAsync, SessionSync
-from app.helpers.getters import isDebugMode
-from app.models.user import User
-from app.core.security import SECRET_KEY, ALGORITHM
-from app.core.config import settings
+from app.db.session import SessionAsync, get_sync_sessionmaker
+from app.db.lazy_session import LazySession, track_session
+from app.db.replicas import client_key, replica_router
+from app.schemas.user import CurrentUser
+from app.core.claims_cache import decode_access_token
+from app.core.revocation import is_revoked, token_id
+from app.core.principal_cache import load_principal
+from app.core.redis_pool import get_redis_client
+from app.core.rate_limit import RateLimitPolicy, rate_limiter, by_ip, retry_after_header
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/api/auth/token",
@@ -16,64 +21,136 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 async def get_db():
-    async with SessionAsync() as session:
+    # Created on first use, closed early by DBSessionRoute (see app/db/lazy_session.py)
+    session = LazySession(SessionAsync)
+    track_session(session)
+    try:
         yield session
+    finally:
+        await session.close()
+
+def get_session_factory():
+    # For background work that outlives the request (and its session)
+    return SessionAsync
 
 def get_db_sync():
-    db = SessionSync()
+    db = get_sync_sessionmaker()()
     try:
         yield db
     finally:
         db.close()
 
 
-async def get_current_user(
-        token: str = Depends(oauth2_scheme),
-                     db: AsyncSession = Depends(get_db),
-                     ):
+async def get_redis() -> aioredis.Redis:
+    # Shared per-worker pool, opened in the lifespan; nothing to close here
+    return get_redis_client()
+
+
+async def get_read_db(request: Request,
+                      db: AsyncSession = Depends(get_db),
+                      redis: aioredis.Redis = Depends(get_redis)):
+    """
+    Session for read-only endpoints (see app/db/replicas.py).
+
+    A replica session when one is usable and the client has not written
+    recently; otherwise the request's primary session.
+    """
+    replica = await replica_router.route(redis, client_key(request))
+    if replica is None:
+        yield db
+        return
+    async with replica.session_factory() as session:
+        track_session(session)
+        try:
+            # Connect now so an unreachable replica falls back before the endpoint runs
+            await session.connection()
+        except Exception as e:
+            replica_router.mark_failed(replica, e)
+            session = db
+        yield session
+
+
+def rate_limit(policy: RateLimitPolicy, key: Callable[[Request], Awaitable[str]] = by_ip):
+    """
+    Dependency factory enforcing a rate limit policy on a route.
+
+    Args:
+        policy: Limit to apply
+        key: Async function deriving the client identity from the request
+             (by_ip, by_email_and_ip, ...)
+
+    Usage:
+        @router.post("/x", dependencies=[Depends(rate_limit(POLICY, by_email_and_ip))])
+    """
+    async def limiter(request: Request, redis: aioredis.Redis = Depends(get_redis)) -> None:
+        result = await rate_limiter.hit(redis, policy, await key(request))
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=policy.detail,
+                headers={"Retry-After": retry_after_header(result)},
+            )
+
+    return limiter
+
+
+# Token scopes accepted as general access tokens (None = plain access token)
+ACCESS_TOKEN_SCOPES = (None, "team")
+
+
+async def authenticate_token(token: str, db: AsyncSession, redis: aioredis.Redis):
+    """
+    Verify a bearer token and load its principal.
+
+    Returns:
+        (claims, CurrentUser)
+
+    Raises:
+        HTTPException 401: If the token is invalid, revoked or outdated
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais inválidas",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         user_id: str = payload.get("sub")
         tv = payload.get("tv")
-        if user_id is None or tv is None:
+        if user_id is None or tv is None or payload.get("scope") not in ACCESS_TOKEN_SCOPES:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
-    if not user or int(tv) != int(user.token_version or 1):
+    if await is_revoked(redis, token_id(payload, token)):
         raise credentials_exception
-    return user
 
-async def get_redis():
-    redis = await aioredis.from_url(
-        settings.CELERY_BROKER_URL_EXTERNAL if isDebugMode() else settings.CELERY_BROKER_URL
-    )
-    try:
-        yield redis
-    finally:
-        await redis.close()
+    user = await load_principal(db, int(user_id), int(tv))
+    if not user:
+        raise credentials_exception
+    return payload, user
+
+
+async def get_current_user(
+        token: str = Depends(oauth2_scheme),
+                     db: AsyncSession = Depends(get_db),
+                     redis: aioredis.Redis = Depends(get_redis),
+                     ) -> CurrentUser:
+    _, user = await authenticate_token(token, db, redis)
+    return user
 
 # ==================== Permission Dependencies ====================
 
 from typing import Dict, Optional
-from sqlalchemy import and_
 from app.core.permissions import has_permission, Resource, Action, TeamRole, OrganizationType
 from app.models.team import Team
-from app.models.team_member import TeamMember
-from app.models.organization import Organization
-from app.models.organization_member import OrganizationMember
+from app.core.team_session import TEAM_SCOPE, context_from_claims, get_membership_version
+from app.db.statements import DIRECT_TEAM_MEMBERSHIP, ORGANIZATION_TEAM_MEMBERSHIP, TEAM_BY_ID
 
 
 async def get_team_member_context(
     team_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ) -> Dict:
     """
@@ -90,7 +167,7 @@ async def get_team_member_context(
         HTTPException 404: If team not found
     """
     # Check if team exists
-    team_result = await db.execute(select(Team).filter(Team.id == team_id))
+    team_result = await db.execute(TEAM_BY_ID, {"team_id": team_id})
     team = team_result.scalar_one_or_none()
 
     if not team:
@@ -113,12 +190,7 @@ async def get_team_member_context(
 
     # Check for direct membership (User)
     direct_member_result = await db.execute(
-        select(TeamMember).filter(
-            TeamMember.team_id == team_id,
-            TeamMember.member_type == "user",
-            TeamMember.member_id == current_user.id,
-            TeamMember.status == "active"
-        )
+        DIRECT_TEAM_MEMBERSHIP, {"team_id": team_id, "user_id": current_user.id}
     )
     direct_member = direct_member_result.scalar_one_or_none()
 
@@ -135,18 +207,7 @@ async def get_team_member_context(
 
     # Check for membership via Organization
     org_member_result = await db.execute(
-        select(TeamMember, Organization)
-        .join(Organization, and_(
-            TeamMember.member_type == "organization",
-            TeamMember.member_id == Organization.id
-        ))
-        .join(OrganizationMember, OrganizationMember.organization_id == Organization.id)
-        .filter(
-            TeamMember.team_id == team_id,
-            OrganizationMember.user_id == current_user.id,
-            TeamMember.status == "active",
-            OrganizationMember.status == "active"
-        )
+        ORGANIZATION_TEAM_MEMBERSHIP, {"team_id": team_id, "user_id": current_user.id}
     )
     org_membership = org_member_result.first()
 
@@ -191,13 +252,17 @@ def require_permission(resource: Resource, action: Action):
         Dependency function that validates permissions
     """
     async def permission_checker(
-        context: Dict = Depends(get_team_member_context)
+        team_id: int,
+        token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_db),
+        redis: aioredis.Redis = Depends(get_redis)
     ) -> Dict:
         """
         Check if user has the required permission.
 
-        Args:
-            context: Team member context from get_team_member_context
+        A team session token for this team whose membership version is
+        current is trusted as is (no database queries once the principal is
+        cached). Any other token goes through get_team_member_context.
 
         Returns:
             Context dict if permission granted
@@ -205,6 +270,15 @@ def require_permission(resource: Resource, action: Action):
         Raises:
             HTTPException 403: If user lacks required permission
         """
+        claims, current_user = await authenticate_token(token, db, redis)
+
+        context = None
+        if claims.get("scope") == TEAM_SCOPE and int(claims.get("team_id", -1)) == team_id:
+            if await get_membership_version(redis, team_id) == claims.get("mv"):
+                context = context_from_claims(claims, current_user)
+        if context is None:
+            context = await get_team_member_context(team_id, current_user, db)
+
         role = context["role"]
         org_type = context.get("org_type")
 
@@ -221,7 +295,7 @@ def require_permission(resource: Resource, action: Action):
 
 async def require_team_owner(
     team_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ) -> Team:
     """
@@ -3,8 +3,8 @@
     This module provides API endpoints for user authentication, registration, password reset, and two-factor authentication (2FA) management. It leverages FastAPI for routing, SQLAlchemy for database interactions, and JWT for secure token handling. The endpoints are designed with security best practices, including rate limiting, anti-enumeration measures, and support for out-of-band OTP delivery.
     Endpoints:
     - /login: Authenticates a user and issues a JWT access token.
-    - /me: Returns the current authenticated user's information and a fresh access token.
-    - /logout: Handles user logout (JWT-based, client-side or via blacklist).
+    - /me: Returns the current user's information, refreshing the token only near expiry (ETag/304 aware).
+    - /logout: Revokes the current access token (by jti) until it expires.
     - /register: Registers a new user, creates a personal team, and issues an access token.
     - /forgot-password/start: Initiates the password reset process by sending an OTP to the user's email.
     - /forgot-password/verify: Verifies the OTP (and optionally TOTP) for password reset and issues a reset session token.
@@ -20,8 +20,11 @@
     - FastAPI, SQLAlchemy, pyotp, jose, custom security and helper modules.
 
 """
+import hashlib
+import math
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, Depends, HTTPException, Header, Request, status
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 import pyotp
@@ -30,8 +33,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.helpers.getters import isDebugMode
-from app.helpers.qrcode_generator import generate_qr_code_base64
-from app.schemas.user import UserCreate
+from app.helpers.qrcode_generator import render_qr_code
+from app.schemas.user import UserCreate, CurrentUser
 from app.schemas.auth import (
     Token, 
     Login, 
@@ -42,25 +45,67 @@ from app.schemas.auth import (
     TwoFASetupOut
 )
 
-from app.models.team import Team as TeamModel
-from app.api.dependencies import get_current_user, get_db, get_redis
+from app.api.dependencies import get_current_user, get_db, get_redis, oauth2_scheme, rate_limit
 
 from app.models.user import User
+from app.db.lazy_session import DBSessionRoute
+from app.db.statements import USER_BY_EMAIL, USER_BY_ID
 from app.models.password_reset import PasswordReset
 
 from app.core.security import (
-    generate_otp, hash_otp, verify_otp, create_reset_session_token, verify_password,
-    verify_totp, generate_totp_secret, create_access_token, get_password_hash, SECRET_KEY, ALGORITHM
+    generate_otp, create_reset_session_token, verify_totp, generate_totp_secret,
+    create_access_token, token_needs_refresh, SECRET_KEY, ALGORITHM, OTP_TTL_MINUTES
 )
-from app.helpers.rate_limit import allow
+from app.core.hashing import verify_and_update_async, get_password_hash_async
+from app.core.principal_cache import invalidate_user
+from app.core.claims_cache import decode_access_token
+from app.core.revocation import revoke_token, token_id
+from app.core.otp_store import (
+    issue_otp, verify_otp_code, record_failed_attempt, consume_otp, OTP_OK
+)
+from app.core.rate_limit import RateLimitPolicy, by_email_and_ip, client_ip
+from app.core.login_guard import login_guard
+from app.core.registration import register_user
+from app.core.email_filter import email_filter
+from app.core.config import settings
 from app.mycelery.worker import send_password_otp, send_password_otp_local
 
-router = APIRouter()
+router = APIRouter(route_class=DBSessionRoute)
+
+# Keep PasswordReset rows as an audit trail of issued/consumed resets
+PASSWORD_RESET_AUDIT = str(getattr(settings, "PASSWORD_RESET_AUDIT", "true")).lower() == "true"
+
+# Per-route rate limits, keyed by email + client IP
+FORGOT_PASSWORD_START_LIMIT = RateLimitPolicy("fp:start", limit=5, period=900)
+FORGOT_PASSWORD_VERIFY_LIMIT = RateLimitPolicy("fp:verify", limit=10, period=900, detail="Too many attempts")
+
+async def _authenticate(db: AsyncSession, user: User, password: str) -> bool:
+    """
+    Check the password and, on success, rewrite the stored hash if it was
+    made with a different bcrypt cost than the current one.
+    """
+    valid, new_hash = await verify_and_update_async(password, user.password)
+    if valid and new_hash:
+        user.password = new_hash
+        await db.commit()
+    return valid
+
+async def _check_login_guard(redis: Redis, email: str, ip: str) -> None:
+    """Refuse the attempt before any DB or bcrypt work while email or IP is backing off."""
+    wait = await login_guard.retry_after(redis, email, ip)
+    if wait > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
 
 @router.post("/token", response_model=Token)
 async def oauth2_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
 ):
     """
     Endpoint OAuth2 padrão para autenticação.
@@ -69,16 +114,21 @@ async def oauth2_token(
 
     Note: O campo 'username' do OAuth2 é usado para aceitar o email do usuário.
     """
+    ip = client_ip(request)
+    await _check_login_guard(redis, form_data.username, ip)
+
     # OAuth2 usa 'username', mas aceitamos email
-    result = await db.execute(select(User).filter(User.email == form_data.username))
+    result = await db.execute(USER_BY_EMAIL, {"email": form_data.username})
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.password):
+    if not user or not await _authenticate(db, user, form_data.password):
+        await login_guard.record_failure(redis, form_data.username, ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha inválidos",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    await login_guard.record_success(redis, form_data.username)
 
     access_token = create_access_token(
         data={"sub": str(user.id)},
@@ -87,17 +137,27 @@ async def oauth2_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-async def login(login_data: Login, db: AsyncSession = Depends(get_db)):
+async def login(
+    request: Request,
+    login_data: Login,
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+):
     """
     Endpoint alternativo de autenticação via JSON body.
 
     Use este endpoint se preferir enviar credenciais como JSON em vez de form-data.
     """
-    result = await db.execute(select(User).filter(User.email == login_data.email))
+    ip = client_ip(request)
+    await _check_login_guard(redis, login_data.email, ip)
+
+    result = await db.execute(USER_BY_EMAIL, {"email": login_data.email})
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(login_data.password, user.password):
+    if not user or not await _authenticate(db, user, login_data.password):
+        await login_guard.record_failure(redis, login_data.email, ip)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
+    await login_guard.record_success(redis, login_data.email)
 
     access_token = create_access_token(
         data={"sub": str(user.id)},
@@ -105,137 +165,176 @@ async def login(login_data: Login, db: AsyncSession = Depends(get_db)):
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+def _user_etag(user: CurrentUser) -> str:
+    updated = user.updated_at.isoformat() if user.updated_at else ""
+    digest = hashlib.sha256(f"{user.id}:{updated}:{user.token_version}".encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
 @router.get("/me")
-async def read_me(current_user: User = Depends(get_current_user)):
-    access_token = create_access_token(
-        data={"sub": str(current_user.id)}, 
-        token_version=current_user.token_version
-    )
+async def read_me(
+    request: Request,
+    response: Response,
+    token: str = Depends(oauth2_scheme),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Retorna o usuário autenticado.
+
+    Um novo token só é emitido quando o atual está a menos de
+    ACCESS_TOKEN_REFRESH_WINDOW_MINUTES de expirar; caso contrário o token
+    atual é devolvido. Suporta If-None-Match (304) via ETag derivado de
+    updated_at e token_version.
+    """
+    etag = _user_etag(current_user)
+    refresh = token_needs_refresh(decode_access_token(token))
+
+    if not refresh and etag in request.headers.get("if-none-match", ""):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+        )
+
+    access_token = token
+    if refresh:
+        access_token = create_access_token(
+            data={"sub": str(current_user.id)},
+            token_version=current_user.token_version
+        )
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
     return {
         "user": current_user,
         "access_token": access_token,
-        "token_type": "bearer"
+        "token_type": "bearer",
+        "refreshed": refresh
     }
 
 @router.post("/logout")
 async def logout(
-    authorization: str = Header(...),
+    token: str = Depends(oauth2_scheme),
     redis: Redis = Depends(get_redis)
 ):
     if isDebugMode():
         return {"message": "Logout successful"}
-    
-    token = authorization.replace("Bearer ", "")
-    
-    # Decodifica para pegar expiração
-    from jose import jwt
-    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    exp = payload["exp"]
-    ttl = exp - int(datetime.now(timezone.utc).timestamp())
-    
-    # Adiciona à blacklist
-    await redis.setex(f"blacklist:{token}", ttl, "revoked")
-    
-    return {"message": "Logout successful"}
 
-@router.post("/register", response_model=Token)
-async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).filter(User.email == user.email))
-    db_user = result.scalar_one_or_none()
-    
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email já cadastrado")
+    try:
+        payload = decode_access_token(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Credenciais inválidas",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
-    hashed_password = get_password_hash(user.password)
-    new_user = User(name=user.name, email=user.email, password=hashed_password)
-    db.add(new_user)
-    await db.flush()
+    # Revoga o token (por jti) até a sua expiração
+    await revoke_token(redis, token_id(payload, token), payload["exp"])
 
-    # Cria um time para o novo usuário
-    new_team = TeamModel(name=f"Time de {new_user.name}", user_id=new_user.id, personal_team=True)
-    db.add(new_team)
-    await db.flush()  # Garante que new_team.id seja atribuído
+    return {"message": "Logout successful"}
 
-    # Atualiza o usuário com o ID do time criado
-    new_user.current_team_id = new_team.id
+@router.post("/register", response_model=Token)
+async def register(
+    user: UserCreate,
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+):
+    """
+    Cria o usuário e o seu time pessoal numa única instrução SQL.
 
-    # Efetua o commit de todas as operações
-    await db.commit()
-    await db.refresh(new_user)
+    Emails duplicados são detectados pelo índice único de users.email.
+    """
+    hashed_password = await get_password_hash_async(user.password)
+    new_user = await register_user(db, user.name, user.email, hashed_password)
+    if new_user is None:
+        raise HTTPException(status_code=400, detail="Email já cadastrado")
+    await email_filter.add(redis, [user.email])
 
     # Cria o token de acesso para o novo usuário
     access_token = create_access_token(data={"sub": str(new_user.id)}, token_version=new_user.token_version)
     return {"access_token": access_token, "token_type": "bearer"}
 
-@router.post("/forgot-password/start", status_code=status.HTTP_202_ACCEPTED)
-async def forgot_password_start(payload: ForgotPasswordStartIn, request: Request, db: AsyncSession = Depends(get_db)):
-    client_ip = request.headers.get("x-forwarded-for", request.client.host)
-    if not allow("fp:start", payload.email, client_ip, max_attempts=5, window_sec=900):
-        raise HTTPException(status_code=429, detail="Too many requests")
-
-    result = await db.execute(select(User).filter(User.email == payload.email))
-    user = result.scalar_one_or_none()
+@router.post(
+    "/forgot-password/start",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit(FORGOT_PASSWORD_START_LIMIT, by_email_and_ip))]
+)
+async def forgot_password_start(
+    payload: ForgotPasswordStartIn,
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+):
+    # Emails the filter rules out skip the lookup; the response is the same either way
+    user = None
+    if email_filter.might_exist(payload.email):
+        result = await db.execute(USER_BY_EMAIL, {"email": payload.email})
+        user = result.scalar_one_or_none()
+        email_filter.record_lookup(user is not None)
 
     if user:
         otp = generate_otp()
-        pr = PasswordReset(
-            user_id=user.id,
+        await issue_otp(
+            redis,
             email=payload.email,
-            otp_hash=hash_otp(otp),
-            otp_expires_at=datetime.now(timezone.utc) + timedelta(minutes=10),
+            otp=otp,
+            user_id=user.id,
+            token_version=user.token_version,
             require_totp=user.two_factor_enabled
         )
-        db.add(pr)
-        await db.commit()
+
+        # Registro de auditoria (o OTP em si vive apenas no Redis)
+        if PASSWORD_RESET_AUDIT:
+            db.add(PasswordReset(
+                user_id=user.id,
+                email=payload.email,
+                otp_expires_at=datetime.now(timezone.utc) + timedelta(minutes=OTP_TTL_MINUTES),
+                require_totp=user.two_factor_enabled
+            ))
+            await db.commit()
 
         # Envia OTP de forma assíncrona via Celery
         send_password_otp_local.delay(payload.email, otp)
 
     return {"message": "If the email exists, a verification code has been sent."}
 
-@router.post("/forgot-password/verify", response_model=ForgotPasswordVerifyOut)
-async def forgot_password_verify(payload: ForgotPasswordVerifyIn, request: Request, db: AsyncSession = Depends(get_db)):
-    client_ip = request.headers.get("x-forwarded-for", request.client.host)
-    if not allow("fp:verify", payload.email, client_ip, max_attempts=10, window_sec=900):
-        raise HTTPException(status_code=429, detail="Too many attempts")
-
-    result = await db.execute(
-        select(PasswordReset)
-        .filter(PasswordReset.email == payload.email, PasswordReset.consumed_at.is_(None))
-        .order_by(PasswordReset.id.desc())
-    )
-    pr = result.scalar_one_or_none()
-
-    if not pr or not pr.otp_hash or not pr.otp_expires_at or pr.otp_expires_at < datetime.now(pr.otp_expires_at.tzinfo):
+@router.post(
+    "/forgot-password/verify",
+    response_model=ForgotPasswordVerifyOut,
+    dependencies=[Depends(rate_limit(FORGOT_PASSWORD_VERIFY_LIMIT, by_email_and_ip))]
+)
+async def forgot_password_verify(
+    payload: ForgotPasswordVerifyIn,
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+):
+    if not payload.otp:
         raise HTTPException(status_code=400, detail="Invalid or expired code")
 
-    if not payload.otp or not verify_otp(payload.otp, pr.otp_hash):
-        pr.attempts += 1
-        await db.commit()
+    otp_status, record = await verify_otp_code(redis, payload.email, payload.otp)
+    if otp_status != OTP_OK:
         raise HTTPException(status_code=400, detail="Invalid or expired code")
 
-    pr.otp_verified = True
-
-    user = None
-    if pr.user_id:
-        result = await db.execute(select(User).filter(User.id == pr.user_id))
+    token_version = record.token_version
+    if record.require_totp:
+        result = await db.execute(USER_BY_ID, {"user_id": record.user_id})
         user = result.scalar_one_or_none()
-    
-    if pr.require_totp:
         if not user or not user.two_factor_secret or not payload.totp or not verify_totp(user.two_factor_secret, payload.totp):
-            pr.attempts += 1
-            await db.commit()
+            await record_failed_attempt(redis, payload.email)
             raise HTTPException(status_code=400, detail="Invalid or missing authenticator code")
-        pr.totp_verified = True
-
-    pr.reset_session_issued_at = datetime.now(timezone.utc)
-    await db.commit()
+        # Só uma verificação concorrente pode consumir o código
+        if not await consume_otp(redis, payload.email):
+            raise HTTPException(status_code=400, detail="Invalid or expired code")
+        token_version = user.token_version
 
-    rst = create_reset_session_token(user_id=user.id, token_version=user.token_version)
+    rst = create_reset_session_token(user_id=record.user_id, token_version=token_version)
     return ForgotPasswordVerifyOut(reset_session_token=rst)
 
 @router.post("/forgot-password/confirm", status_code=status.HTTP_204_NO_CONTENT)
-async def forgot_password_confirm(payload: ForgotPasswordConfirmIn, request: Request, db: AsyncSession = Depends(get_db)):
+async def forgot_password_confirm(
+    payload: ForgotPasswordConfirmIn,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+):
     auth_header = request.headers.get("authorization", "")
     if not auth_header.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Missing reset session")
@@ -250,57 +349,77 @@ async def forgot_password_confirm(payload: ForgotPasswordConfirmIn, request: Req
         raise HTTPException(status_code=401, detail="Invalid reset session")
 
     user_id = int(claims["sub"])
-    result = await db.execute(select(User).filter(User.id == user_id))
+    result = await db.execute(USER_BY_ID, {"user_id": user_id})
     user = result.scalar_one_or_none()
     
     if not user:
         raise HTTPException(status_code=401, detail="Invalid reset session")
 
-    user.password = get_password_hash(payload.new_password)
+    user.password = await get_password_hash_async(payload.new_password)
     user.token_version = (user.token_version or 1) + 1
     await db.commit()
+    await invalidate_user(redis, user_id)
+
+    # Marca o reset de senha como consumido (auditoria)
+    if PASSWORD_RESET_AUDIT:
+        result = await db.execute(
+            select(PasswordReset)
+            .filter(PasswordReset.user_id == user_id, PasswordReset.consumed_at.is_(None))
+            .order_by(PasswordReset.id.desc())
+            .limit(1)
+        )
+        pr = result.scalar_one_or_none()
 
-    # Marca o reset de senha como consumido
-    result = await db.execute(
-        select(PasswordReset)
-        .filter(PasswordReset.user_id == user_id, PasswordReset.consumed_at.is_(None))
-        .order_by(PasswordReset.id.desc())
-    )
-    pr = result.scalar_one_or_none()
-    
-    if pr:
-        pr.consumed_at = datetime.now(timezone.utc)
-        await db.commit()
+        if pr:
+            pr.consumed_at = datetime.now(timezone.utc)
+            await db.commit()
 
     return
 
 @router.post("/2fa/setup", response_model=TwoFASetupOut)
-async def twofa_setup(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+async def twofa_setup(
+    qr_format: Literal["png", "svg"] = Query("png"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+):
     """
     Configura 2FA para o usuário autenticado.
     
+    Query parameters:
+    - qr_format: "png" (padrão) ou "svg" (gerado sem PIL, menor e mais rápido)
+
     Retorna:
     - secret: Chave secreta (para backup manual)
     - otpauth_url: URL para configuração manual
-    - qr_code: Imagem Base64 do QR Code para leitura direta
+    - qr_code: Data URL (Base64) do QR Code para leitura direta
     """
     secret = generate_totp_secret()
     issuer = "Application"
     label = f"{issuer}:{current_user.email}"
     url = pyotp.totp.TOTP(secret).provisioning_uri(name=label, issuer_name=issuer)
     try:
-        qr_code_base64 = generate_qr_code_base64(url)
+        qr_code = await render_qr_code(url, fmt=qr_format)
     except ValueError as e:
         raise HTTPException(status_code=500, detail="Erro ao gerar QR Code")
-    current_user.two_factor_secret = secret
-    current_user.two_factor_enabled = False
+    user = await db.get(User, current_user.id)
+    user.two_factor_secret = secret
+    user.two_factor_enabled = False
     await db.commit()
-    return TwoFASetupOut(secret=secret, otpauth_url=url, qr_code=qr_code_base64)
+    await invalidate_user(redis, current_user.id)
+    return TwoFASetupOut(secret=secret, otpauth_url=url, qr_code=qr_code)
 
 @router.post("/2fa/verify", status_code=204)
-async def twofa_verify(code: str, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
-    if not current_user.two_factor_secret or not verify_totp(current_user.two_factor_secret, code):
+async def twofa_verify(
+    code: str,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+):
+    user = await db.get(User, current_user.id)
+    if not user or not user.two_factor_secret or not verify_totp(user.two_factor_secret, code):
         raise HTTPException(status_code=400, detail="Invalid code")
-    current_user.two_factor_enabled = True
+    user.two_factor_enabled = True
     await db.commit()
+    await invalidate_user(redis, current_user.id)
     return
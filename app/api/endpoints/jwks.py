@@ -0,0 +1,39 @@
+"""
+JWKS Endpoint
+
+Publishes the public keys that verify access tokens, so other services can
+check tokens locally instead of calling back into this API. The document is
+serialized once at startup and served with a strong ETag and Cache-Control.
+With HS256 (the default) the key set is empty.
+
+Settings:
+    JWKS_MAX_AGE: Seconds clients may cache the key set (default: 300)
+"""
+
+import hashlib
+from fastapi import APIRouter, Request, Response
+
+from app.core.config import settings
+from app.core.jwt_keys import key_ring
+
+router = APIRouter()
+
+JWKS_MAX_AGE = int(getattr(settings, "JWKS_MAX_AGE", 300))
+JWKS_ETAG = '"' + hashlib.sha256(key_ring.jwks_body).hexdigest()[:32] + '"'
+
+
+@router.get("/jwks.json")
+async def get_jwks(request: Request):
+    """
+    JSON Web Key Set for access token verification.
+
+    Keys are matched by the ``kid`` in the token header; retired keys stay
+    listed until the tokens they signed expire.
+    """
+    headers = {
+        "Cache-Control": f"public, max-age={JWKS_MAX_AGE}",
+        "ETag": JWKS_ETAG,
+    }
+    if JWKS_ETAG in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=key_ring.jwks_body, media_type="application/json", headers=headers)
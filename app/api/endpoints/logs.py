@@ -7,12 +7,15 @@ Admin-only endpoints for monitoring and troubleshooting.
 
 from typing import List, Optional
 from datetime import datetime, timezone, timedelta
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, desc
 
-from app.api.dependencies import get_current_user, get_db
-from app.models.user import User
+from app.api.dependencies import get_current_user, get_db, get_read_db
+from app.api.pagination import Keyset
+from app.db.lazy_session import DBSessionRoute
+from app.db.writes import update_returning
+from app.schemas.user import CurrentUser
 from app.models.api_access_log import APIAccessLog
 from app.models.error_log import ErrorLog
 from app.schemas.log import (
@@ -22,25 +25,31 @@ from app.schemas.log import (
     LogAnalytics
 )
 
-router = APIRouter()
+router = APIRouter(route_class=DBSessionRoute)
+
+# Most recent first; id breaks ties between rows logged in the same instant
+ACCESS_LOGS = Keyset("access_logs", APIAccessLog.created_at, APIAccessLog.id, descending=True)
+ERROR_LOGS = Keyset("error_logs", ErrorLog.created_at, ErrorLog.id, descending=True)
 
 
 # TODO: Add proper admin check - for now, all authenticated users can access
-# In production, add: current_user: User = Depends(require_admin)
+# In production, add: current_user: CurrentUser = Depends(require_admin)
 
 
 @router.get("/access", response_model=List[APIAccessLogOut])
 async def list_access_logs(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
     user_id: Optional[int] = None,
     endpoint: Optional[str] = None,
     method: Optional[str] = None,
     status_code: Optional[int] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List API access logs.
@@ -48,6 +57,8 @@ async def list_access_logs(
     Query parameters:
     - skip: Number of records to skip
     - limit: Maximum number of records to return
+    - cursor: Resume after the last page (X-Next-Cursor of the previous response);
+      unlike skip, stays fast on deep pages
     - user_id: Filter by user ID
     - endpoint: Filter by endpoint path
     - method: Filter by HTTP method
@@ -75,29 +86,27 @@ async def list_access_logs(
     if filters:
         query = query.filter(and_(*filters))
 
-    # Order by most recent first
-    query = query.order_by(desc(APIAccessLog.created_at))
-
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
+    # Most recent first, resuming after the cursor if given
+    query = ACCESS_LOGS.paginate(query, cursor, skip, limit)
 
     result = await db.execute(query)
-    logs = result.scalars().all()
 
-    return logs
+    return ACCESS_LOGS.page(result.scalars().all(), limit, response)
 
 
 @router.get("/errors", response_model=List[ErrorLogOut])
 async def list_error_logs(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
     user_id: Optional[int] = None,
     error_type: Optional[str] = None,
     severity: Optional[str] = None,
     resolved: Optional[bool] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -106,6 +115,8 @@ async def list_error_logs(
     Query parameters:
     - skip: Number of records to skip
     - limit: Maximum number of records to return
+    - cursor: Resume after the last page (X-Next-Cursor of the previous response);
+      unlike skip, stays fast on deep pages
     - user_id: Filter by user ID
     - error_type: Filter by error type
     - severity: Filter by severity level
@@ -133,23 +144,19 @@ async def list_error_logs(
     if filters:
         query = query.filter(and_(*filters))
 
-    # Order by most recent first
-    query = query.order_by(desc(ErrorLog.created_at))
-
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
+    # Most recent first, resuming after the cursor if given
+    query = ERROR_LOGS.paginate(query, cursor, skip, limit)
 
     result = await db.execute(query)
-    logs = result.scalars().all()
 
-    return logs
+    return ERROR_LOGS.page(result.scalars().all(), limit, response)
 
 
 @router.patch("/errors/{error_id}", response_model=ErrorLogOut)
 async def resolve_error(
     error_id: int,
     resolve_data: ErrorLogResolve,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -157,10 +164,12 @@ async def resolve_error(
 
     Only admins can resolve errors.
     """
-    result = await db.execute(
-        select(ErrorLog).filter(ErrorLog.id == error_id)
-    )
-    error_log = result.scalar_one_or_none()
+    values = {"resolved": resolve_data.resolved}
+    if resolve_data.resolved:
+        values["resolved_at"] = datetime.now(timezone.utc)
+        values["resolved_by"] = current_user.id
+
+    error_log = await update_returning(db, ErrorLog, [ErrorLog.id == error_id], values)
 
     if not error_log:
         raise HTTPException(
@@ -168,13 +177,7 @@ async def resolve_error(
             detail="Error log not found"
         )
 
-    error_log.resolved = resolve_data.resolved
-    if resolve_data.resolved:
-        error_log.resolved_at = datetime.now(timezone.utc)
-        error_log.resolved_by = current_user.id
-
     await db.commit()
-    await db.refresh(error_log)
 
     return error_log
 
@@ -182,8 +185,8 @@ async def resolve_error(
 @router.get("/analytics", response_model=LogAnalytics)
 async def get_log_analytics(
     hours: int = Query(24, ge=1, le=720),  # Last 24 hours by default, max 30 days
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get analytics summary for API access logs.
@@ -0,0 +1,58 @@
+"""
+Metrics API Endpoints
+
+Exposes per-worker runtime counters (hashing pool, caches, connection pools)
+collected through app.core.metrics. Values are local to the worker process
+that serves the request.
+
+The endpoint is off unless METRICS_ENABLED is true, and then only open to
+the users listed in METRICS_ADMIN_EMAILS: the stats describe pool sizes,
+caches and replicas of the deployment, not anything the user owns.
+
+Settings:
+    METRICS_ENABLED: Serve /api/metrics (default: false, answers 404)
+    METRICS_ADMIN_EMAILS: Comma-separated emails allowed to read the metrics (default: none)
+"""
+
+import os
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.api.dependencies import get_current_user
+from app.core.config import settings
+from app.db.lazy_session import DBSessionRoute
+from app.core.metrics import collect_stats
+from app.schemas.user import CurrentUser
+
+router = APIRouter(route_class=DBSessionRoute)
+
+METRICS_ENABLED = str(getattr(settings, "METRICS_ENABLED", "false")).lower() == "true"
+METRICS_ADMIN_EMAILS = frozenset(
+    email.strip().lower() for email in str(getattr(settings, "METRICS_ADMIN_EMAILS", "")).split(",") if email.strip()
+)
+
+
+def require_metrics_enabled():
+    """Hide the endpoint entirely while METRICS_ENABLED is off (checked before authentication)."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+async def require_metrics_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+    """Only users listed in METRICS_ADMIN_EMAILS may read the metrics."""
+    if current_user.email.lower() not in METRICS_ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Metrics are restricted to administrators"
+        )
+    return current_user
+
+
+@router.get("/", dependencies=[Depends(require_metrics_enabled)])
+async def get_metrics(current_user: CurrentUser = Depends(require_metrics_admin)):
+    """
+    Snapshot of in-process metrics for the worker handling this request.
+    """
+    return {
+        "pid": os.getpid(),
+        "stats": collect_stats()
+    }
@@ -5,19 +5,26 @@ Provides CRUD operations for organizations (Provider, Client, Guest)
 and management of organization members.
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import selectinload
 
-from app.api.dependencies import get_current_user, get_db
+from app.api.dependencies import get_current_user, get_db, get_read_db, get_redis, get_session_factory
+from app.api.pagination import Keyset
+from app.db.lazy_session import DBSessionRoute
+from app.db.writes import delete_returning, update_returning
 from app.models.user import User
+from app.schemas.user import CurrentUser
 from app.models.organization import Organization
 from app.models.provider import Provider
 from app.models.client import Client
 from app.models.guest import Guest
 from app.models.organization_member import OrganizationMember
+from app.core.team_session import bump_organization_teams
+from app.core import bulk_import
 from app.schemas.organization import (
     OrganizationCreate,
     OrganizationUpdate,
@@ -31,10 +38,14 @@ from app.schemas.organization_member import (
     OrganizationMemberCreate,
     OrganizationMemberUpdate,
     OrganizationMemberOut,
-    OrganizationMemberWithUser
+    OrganizationMemberWithUser,
+    MemberImportJobOut
 )
 
-router = APIRouter()
+router = APIRouter(route_class=DBSessionRoute)
+
+ORGANIZATIONS = Keyset("organizations", Organization.id)
+ORGANIZATION_MEMBERS = Keyset("organization_members", OrganizationMember.id)
 
 
 # ==================== Organization CRUD ====================
@@ -43,7 +54,7 @@ router = APIRouter()
 async def create_organization(
     org_data: OrganizationCreate,
     type_data: Optional[ProviderCreate | ClientCreate | GuestCreate] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -108,12 +119,14 @@ async def create_organization(
 
 @router.get("/", response_model=List[OrganizationOut])
 async def list_organizations(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     organization_type: Optional[str] = Query(None, pattern="^(provider|client|guest)$"),
     archived: bool = Query(False),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List organizations where the current user is a member.
@@ -121,6 +134,7 @@ async def list_organizations(
     Query parameters:
     - skip: Number of records to skip (pagination)
     - limit: Maximum number of records to return
+    - cursor: Resume after the last page (X-Next-Cursor of the previous response)
     - organization_type: Filter by type (provider, client, guest)
     - archived: Include archived organizations
     """
@@ -142,18 +156,17 @@ async def list_organizations(
         query = query.filter(Organization.archived == False)
 
     # Apply pagination
-    query = query.offset(skip).limit(limit)
+    query = ORGANIZATIONS.paginate(query, cursor, skip, limit)
 
     result = await db.execute(query)
-    organizations = result.scalars().all()
 
-    return organizations
+    return ORGANIZATIONS.page(result.scalars().all(), limit, response)
 
 
 @router.get("/{organization_id}", response_model=OrganizationWithDetails)
 async def get_organization(
     organization_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -212,7 +225,7 @@ async def get_organization(
 async def update_organization(
     organization_id: int,
     org_update: OrganizationUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -235,11 +248,9 @@ async def update_organization(
             detail="Only organization admins can update the organization"
         )
 
-    # Get organization
-    result = await db.execute(
-        select(Organization).filter(Organization.id == organization_id)
+    organization = await update_returning(
+        db, Organization, [Organization.id == organization_id], org_update.model_dump(exclude_unset=True)
     )
-    organization = result.scalar_one_or_none()
 
     if not organization:
         raise HTTPException(
@@ -247,13 +258,7 @@ async def update_organization(
             detail="Organization not found"
         )
 
-    # Update fields
-    update_data = org_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(organization, field, value)
-
     await db.commit()
-    await db.refresh(organization)
 
     return organization
 
@@ -261,8 +266,9 @@ async def update_organization(
 @router.delete("/{organization_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_organization(
     organization_id: int,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
 ):
     """
     Delete (archive) an organization.
@@ -285,11 +291,10 @@ async def delete_organization(
             detail="Only organization admins can delete the organization"
         )
 
-    # Get organization
-    result = await db.execute(
-        select(Organization).filter(Organization.id == organization_id)
+    # Soft delete
+    organization = await update_returning(
+        db, Organization, [Organization.id == organization_id], {"archived": True}
     )
-    organization = result.scalar_one_or_none()
 
     if not organization:
         raise HTTPException(
@@ -297,12 +302,9 @@ async def delete_organization(
             detail="Organization not found"
         )
 
-    # Soft delete
-    from datetime import datetime, timezone
-    organization.archived = True
-    organization.archived_at = datetime.now(timezone.utc)
-
     await db.commit()
+    # Team sessions resolved through this organization must be re-checked
+    await bump_organization_teams(db, redis, organization_id)
 
 
 # ==================== Organization Members ====================
@@ -311,8 +313,9 @@ async def delete_organization(
 async def add_organization_member(
     organization_id: int,
     member_data: OrganizationMemberCreate,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
 ):
     """
     Add a user as a member to the organization.
@@ -376,23 +379,132 @@ async def add_organization_member(
     )
     db.add(new_member)
     await db.commit()
+    # Team sessions resolved through this organization must be re-checked
+    await bump_organization_teams(db, redis, organization_id)
     await db.refresh(new_member)
 
     return new_member
 
 
+@router.post(
+    "/{organization_id}/members/import",
+    response_model=MemberImportJobOut,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def import_organization_members(
+    organization_id: int,
+    request: Request,
+    response: Response,
+    fmt: Optional[Literal["jsonl", "csv"]] = Query(None, alias="format", description="Defaults from Content-Type"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
+    session_factory=Depends(get_session_factory)
+):
+    """
+    Create users in bulk and add them to the organization.
+
+    The body is a JSON Lines or CSV stream (``text/csv``) of users with
+    ``name``, ``email``, ``password`` and optional ``role`` (admin|member).
+    Each user also gets a personal team. Rows are validated while the upload
+    streams in; hashing and inserts run in the background. Poll the returned
+    job for progress and per-row errors.
+
+    Only admin members can import users.
+    """
+    admin_check = await db.execute(
+        select(OrganizationMember).filter(
+            OrganizationMember.organization_id == organization_id,
+            OrganizationMember.user_id == current_user.id,
+            OrganizationMember.role == "admin",
+            OrganizationMember.status == "active"
+        )
+    )
+    if not admin_check.scalar_one_or_none():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only organization admins can import members"
+        )
+
+    org_result = await db.execute(
+        select(Organization).filter(Organization.id == organization_id, Organization.archived == False)
+    )
+    if not org_result.scalar_one_or_none():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Organization not found"
+        )
+
+    # Give the connection back before streaming the upload (up to BULK_IMPORT_MAX_ROWS rows)
+    await db.close()
+
+    if fmt is None:
+        fmt = "csv" if "csv" in request.headers.get("content-type", "") else "jsonl"
+    try:
+        rows, errors = await bulk_import.parse_upload(request.stream(), fmt)
+    except bulk_import.ImportTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload must be UTF-8")
+
+    job_id = await bulk_import.create_job(
+        redis, organization_id, current_user.id, len(rows) + len(errors), errors
+    )
+    bulk_import.start_import(
+        job_id, organization_id, rows, redis, session_factory,
+        errors_kept=min(len(errors), bulk_import.MAX_ERRORS)
+    )
+    response.headers["Location"] = f"{request.url.path}/{job_id}"
+    return await bulk_import.get_job(redis, job_id)
+
+
+@router.get("/{organization_id}/members/import/{job_id}", response_model=MemberImportJobOut)
+async def get_member_import(
+    organization_id: int,
+    job_id: str,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+):
+    """
+    Progress and row errors of a bulk import.
+
+    Visible to the admin who started it and to the organization's admins.
+    """
+    job = await bulk_import.get_job(redis, job_id)
+    if job is None or job["organization_id"] != organization_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+
+    # The uploader polls without touching the database
+    if job["created_by"] != current_user.id:
+        admin_check = await db.execute(
+            select(OrganizationMember).filter(
+                OrganizationMember.organization_id == organization_id,
+                OrganizationMember.user_id == current_user.id,
+                OrganizationMember.role == "admin",
+                OrganizationMember.status == "active"
+            )
+        )
+        if not admin_check.scalar_one_or_none():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return job
+
+
 @router.get("/{organization_id}/members", response_model=List[OrganizationMemberWithUser])
 async def list_organization_members(
     organization_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     List all members of an organization.
 
-    Only organization members can view the member list.
+    Only organization members can view the member list. Paginated with
+    skip/limit or cursor (X-Next-Cursor of the previous response).
     """
     # Check if user is a member
     member_check = await db.execute(
@@ -409,24 +521,23 @@ async def list_organization_members(
         )
 
     # Get all members with user info
-    result = await db.execute(
+    query = (
         select(OrganizationMember, User)
         .join(User, User.id == OrganizationMember.user_id)
         .filter(OrganizationMember.organization_id == organization_id)
-        .offset(skip)
-        .limit(limit)
     )
-    members = result.all()
+    result = await db.execute(ORGANIZATION_MEMBERS.paginate(query, cursor, skip, limit))
+    members = ORGANIZATION_MEMBERS.page(result.all(), limit, response, key=lambda row: row[0])
 
     # Build response with user details
-    response = []
+    details = []
     for member, user in members:
         member_data = OrganizationMemberWithUser.model_validate(member)
         member_data.user_name = user.name
         member_data.user_email = user.email
-        response.append(member_data)
+        details.append(member_data)
 
-    return response
+    return details
 
 
 @router.patch("/{organization_id}/members/{user_id}", response_model=OrganizationMemberOut)
@@ -434,8 +545,9 @@ async def update_organization_member(
     organization_id: int,
     user_id: int,
     member_update: OrganizationMemberUpdate,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
 ):
     """
     Update an organization member's role or status.
@@ -457,14 +569,15 @@ async def update_organization_member(
             detail="Only organization admins can update members"
         )
 
-    # Get member to update
-    result = await db.execute(
-        select(OrganizationMember).filter(
+    member = await update_returning(
+        db,
+        OrganizationMember,
+        [
             OrganizationMember.organization_id == organization_id,
             OrganizationMember.user_id == user_id
-        )
+        ],
+        member_update.model_dump(exclude_unset=True)
     )
-    member = result.scalar_one_or_none()
 
     if not member:
         raise HTTPException(
@@ -472,13 +585,9 @@ async def update_organization_member(
             detail="Member not found"
         )
 
-    # Update fields
-    update_data = member_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(member, field, value)
-
     await db.commit()
-    await db.refresh(member)
+    # Team sessions resolved through this organization must be re-checked
+    await bump_organization_teams(db, redis, organization_id)
 
     return member
 
@@ -487,8 +596,9 @@ async def update_organization_member(
 async def remove_organization_member(
     organization_id: int,
     user_id: int,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
 ):
     """
     Remove a member from the organization.
@@ -511,36 +621,37 @@ async def remove_organization_member(
             detail="Only organization admins can remove members"
         )
 
-    # Get member to remove
-    result = await db.execute(
-        select(OrganizationMember).filter(
+    # An admin can only be removed while there are other active admins
+    active_admins = (
+        select(func.count(OrganizationMember.id))
+        .filter(
             OrganizationMember.organization_id == organization_id,
-            OrganizationMember.user_id == user_id
+            OrganizationMember.role == "admin",
+            OrganizationMember.status == "active"
         )
+        .scalar_subquery()
+    )
+    member_filter = [
+        OrganizationMember.organization_id == organization_id,
+        OrganizationMember.user_id == user_id
+    ]
+    member = await delete_returning(
+        db, OrganizationMember, [*member_filter, or_(OrganizationMember.role != "admin", active_admins > 1)]
     )
-    member = result.scalar_one_or_none()
 
     if not member:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Member not found"
-        )
-
-    # If removing an admin, check if there are other admins
-    if member.role == "admin":
-        admin_count = await db.execute(
-            select(OrganizationMember).filter(
-                OrganizationMember.organization_id == organization_id,
-                OrganizationMember.role == "admin",
-                OrganizationMember.status == "active"
-            )
-        )
-        if len(admin_count.scalars().all()) <= 1:
+        # Missing (404) or the last admin (400)
+        result = await db.execute(select(OrganizationMember.id).filter(*member_filter))
+        if result.scalar_one_or_none() is None:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot remove the last admin from the organization"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Member not found"
             )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot remove the last admin from the organization"
+        )
 
-    # Remove member
-    await db.delete(member)
     await db.commit()
+    # Team sessions resolved through this organization must be re-checked
+    await bump_organization_teams(db, redis, organization_id)
@@ -5,18 +5,23 @@ Provides CRUD operations for teams and team management.
 Converted to async for better performance and scalability.
 """
 
-from typing import List, Literal
+from typing import List, Literal, Optional
 from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, or_
 from sqlalchemy.orm import selectinload
 
-from app.api.dependencies import get_current_user, get_db
+from app.api.dependencies import get_current_user, get_db, get_read_db, get_redis, get_team_member_context
+from app.api.pagination import Keyset
+from app.db.lazy_session import DBSessionRoute
+from app.db.writes import delete_returning, update_returning
 from app.models.user import User
+from app.schemas.user import CurrentUser
 from app.models.team import Team
 from app.models.team_member import TeamMember
-from app.schemas.team import TeamCreate, TeamUpdate, TeamOut, TeamWithMembers
+from app.schemas.team import TeamCreate, TeamUpdate, TeamOut, TeamWithMembers, TeamSessionOut
 from app.schemas.team_member import (
     TeamMemberAddUser,
     TeamMemberAddOrganization,
@@ -26,19 +31,31 @@ from app.schemas.team_member import (
 )
 from app.models.organization import Organization
 from app.core.permissions import Resource, Action
+from app.core.principal_cache import invalidate_user
+from app.core.team_session import (
+    create_team_session_token,
+    get_membership_version,
+    bump_membership_version,
+    TEAM_SESSION_EXPIRE_MINUTES
+)
 from app.api.dependencies import require_permission, require_team_owner
 
-router = APIRouter()
+router = APIRouter(route_class=DBSessionRoute)
+
+TEAMS = Keyset("teams", Team.id)
+TEAM_MEMBERS = Keyset("team_members", TeamMember.id)
 
 
 # ==================== Team CRUD ====================
 
 @router.get("/", response_model=List[TeamWithMembers])
 async def list_teams(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     include_archived: bool = Query(False),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -47,40 +64,38 @@ async def list_teams(
     Query parameters:
     - skip: Number of records to skip (pagination)
     - limit: Maximum number of records to return
+    - cursor: Resume after the last page (X-Next-Cursor of the previous response)
     - include_archived: Include archived teams
     """
-    query = select(Team).filter(Team.user_id == current_user.id)
+    # Member counts come from a correlated subquery instead of a COUNT per team
+    member_count = (
+        select(func.count(TeamMember.id))
+        .filter(TeamMember.team_id == Team.id, TeamMember.status == "active")
+        .correlate(Team)
+        .scalar_subquery()
+    )
+    query = select(Team, member_count.label("member_count")).filter(Team.user_id == current_user.id)
 
     if not include_archived:
         query = query.filter(Team.archived == False)
 
-    query = query.offset(skip).limit(limit)
+    query = TEAMS.paginate(query, cursor, skip, limit)
 
     result = await db.execute(query)
-    teams = result.scalars().all()
 
-    # Get member count for each team
-    response = []
-    for team in teams:
+    teams = []
+    for team, count in TEAMS.page(result.all(), limit, response, key=lambda row: row[0]):
         team_data = TeamWithMembers.model_validate(team)
+        team_data.member_count = count
+        teams.append(team_data)
 
-        # Count members
-        member_count_query = select(func.count(TeamMember.id)).filter(
-            TeamMember.team_id == team.id,
-            TeamMember.status == "active"
-        )
-        member_count_result = await db.execute(member_count_query)
-        team_data.member_count = member_count_result.scalar()
-
-        response.append(team_data)
-
-    return response
+    return teams
 
 
 @router.post("/", response_model=TeamOut, status_code=status.HTTP_201_CREATED)
 async def create_team(
     team_data: TeamCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -105,7 +120,7 @@ async def create_team(
 @router.get("/{team_id}", response_model=TeamOut)
 async def get_team(
     team_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -142,15 +157,14 @@ async def update_team(
 
     Requires TEAM:UPDATE permission (Admin or Member role).
     """
-    team = context["team"]
-
-    # Update fields
-    update_data = team_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(team, field, value)
+    team = await update_returning(db, Team, [Team.id == team_id], team_update.model_dump(exclude_unset=True))
+    if not team:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found"
+        )
 
     await db.commit()
-    await db.refresh(team)
 
     return team
 
@@ -159,7 +173,8 @@ async def update_team(
 async def delete_team(
     team_id: int,
     context = Depends(require_permission(Resource.TEAM, Action.DELETE)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
 ):
     """
     Delete (archive) a team.
@@ -168,19 +183,102 @@ async def delete_team(
     This performs a soft delete (sets archived=True).
     Personal teams cannot be deleted.
     """
-    team = context["team"]
-
-    if team.personal_team:
+    # Soft delete
+    team = await update_returning(
+        db,
+        Team,
+        [Team.id == team_id, Team.personal_team.isnot(True)],
+        {"archived": True, "archived_at": datetime.now(timezone.utc)}
+    )
+    if not team:
+        # Missing (404) or personal (400)
+        await _context_team(context, db)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete personal teams"
         )
 
-    # Soft delete
-    team.archived = True
-    team.archived_at = datetime.now(timezone.utc)
-
     await db.commit()
+    await bump_membership_version(redis, [team_id])
+
+
+async def _context_team(context: dict, db: AsyncSession) -> Team:
+    """Team row of a permission context (not preloaded for team session tokens)."""
+    team = context["team"] or await db.get(Team, context["team_id"])
+    if not team:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found"
+        )
+    return team
+
+
+# ==================== Team Sessions ====================
+
+async def _issue_team_session(team_id: int, current_user: CurrentUser, db: AsyncSession, redis: Redis) -> TeamSessionOut:
+    # Read the version before checking membership: a change committed in
+    # between bumps past it and invalidates the token we are about to issue
+    membership_version = await get_membership_version(redis, team_id, use_cache=False)
+    if membership_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Team sessions are temporarily unavailable"
+        )
+    context = await get_team_member_context(team_id, current_user, db)
+    token = create_team_session_token(current_user.id, current_user.token_version, context, membership_version)
+    return TeamSessionOut(
+        access_token=token,
+        team_id=team_id,
+        role=context["role"].value,
+        org_type=context["org_type"].value if context["org_type"] else None,
+        expires_in=TEAM_SESSION_EXPIRE_MINUTES * 60
+    )
+
+
+@router.post("/{team_id}/switch", response_model=TeamSessionOut)
+async def switch_team(
+    team_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+):
+    """
+    Switch the current team and get a team session token.
+
+    The token is short-lived and embeds team_id, role and org_type, so
+    permission checks on this team need no database queries. It stops being
+    accepted when the user's token_version or the team's membership changes;
+    use /api/teams/session/refresh to get a new one.
+    """
+    session = await _issue_team_session(team_id, current_user, db, redis)
+
+    if current_user.current_team_id != team_id:
+        user = await db.get(User, current_user.id)
+        user.current_team_id = team_id
+        await db.commit()
+        await invalidate_user(redis, current_user.id)
+
+    return session
+
+
+@router.post("/session/refresh", response_model=TeamSessionOut)
+async def refresh_team_session(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
+):
+    """
+    Issue a fresh team session token for the user's current team.
+
+    Accepts the regular access token or a team session token; membership is
+    re-checked, so the new token reflects the current role.
+    """
+    if current_user.current_team_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No current team; switch to a team first"
+        )
+    return await _issue_team_session(current_user.current_team_id, current_user, db, redis)
 
 
 # ==================== Team Member Management ====================
@@ -188,15 +286,18 @@ async def delete_team(
 @router.get("/{team_id}/members", response_model=List[TeamMemberWithDetails])
 async def list_team_members(
     team_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List all members of a team (Users and Organizations).
 
-    Only team owner or members can view the member list.
+    Only team owner or members can view the member list. Paginated with
+    skip/limit or cursor (X-Next-Cursor of the previous response).
     """
     # Check if user is owner or member
     owner_check = await db.execute(
@@ -222,40 +323,46 @@ async def list_team_members(
 
     # Get all team members
     result = await db.execute(
-        select(TeamMember)
-        .filter(TeamMember.team_id == team_id)
-        .offset(skip)
-        .limit(limit)
+        TEAM_MEMBERS.paginate(select(TeamMember).filter(TeamMember.team_id == team_id), cursor, skip, limit)
     )
-    members = result.scalars().all()
+    members = TEAM_MEMBERS.page(result.scalars().all(), limit, response)
+
+    # Load member details with one query per member type instead of one per member
+    user_ids = {m.member_id for m in members if m.member_type == "user"}
+    org_ids = {m.member_id for m in members if m.member_type == "organization"}
+    users = {}
+    if user_ids:
+        user_result = await db.execute(
+            select(User.id, User.name, User.email).filter(User.id.in_(user_ids))
+        )
+        users = {row.id: row for row in user_result}
+    orgs = {}
+    if org_ids:
+        org_result = await db.execute(
+            select(Organization.id, Organization.name, Organization.organization_type)
+            .filter(Organization.id.in_(org_ids))
+        )
+        orgs = {row.id: row for row in org_result}
 
     # Build response with details
-    response = []
+    details = []
     for member in members:
         member_data = TeamMemberWithDetails.model_validate(member)
 
         if member.member_type == "user":
-            # Get user details
-            user_result = await db.execute(
-                select(User).filter(User.id == member.member_id)
-            )
-            user = user_result.scalar_one_or_none()
+            user = users.get(member.member_id)
             if user:
                 member_data.user_name = user.name
                 member_data.user_email = user.email
         elif member.member_type == "organization":
-            # Get organization details
-            org_result = await db.execute(
-                select(Organization).filter(Organization.id == member.member_id)
-            )
-            org = org_result.scalar_one_or_none()
+            org = orgs.get(member.member_id)
             if org:
                 member_data.organization_name = org.name
                 member_data.organization_type = org.organization_type
 
-        response.append(member_data)
+        details.append(member_data)
 
-    return response
+    return details
 
 
 @router.post("/{team_id}/members/users", response_model=TeamMemberOut, status_code=status.HTTP_201_CREATED)
@@ -263,7 +370,8 @@ async def add_user_to_team(
     team_id: int,
     member_data: TeamMemberAddUser,
     context = Depends(require_permission(Resource.TEAM_MEMBER, Action.INVITE)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
 ):
     """
     Add a User as a member to the team.
@@ -308,6 +416,7 @@ async def add_user_to_team(
     )
     db.add(new_member)
     await db.commit()
+    await bump_membership_version(redis, [team_id])
     await db.refresh(new_member)
 
     return new_member
@@ -318,7 +427,8 @@ async def add_organization_to_team(
     team_id: int,
     member_data: TeamMemberAddOrganization,
     context = Depends(require_permission(Resource.TEAM_MEMBER, Action.INVITE)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
 ):
     """
     Add an Organization as a member to the team.
@@ -363,6 +473,7 @@ async def add_organization_to_team(
     )
     db.add(new_member)
     await db.commit()
+    await bump_membership_version(redis, [team_id])
     await db.refresh(new_member)
 
     return new_member
@@ -375,23 +486,24 @@ async def update_team_member(
     member_id: int,
     member_update: TeamMemberUpdate,
     context = Depends(require_permission(Resource.TEAM_MEMBER, Action.MANAGE)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
 ):
     """
     Update a team member's role or status.
 
     Requires TEAM_MEMBER:MANAGE permission (Admin role).
     """
-
-    # Get member to update
-    result = await db.execute(
-        select(TeamMember).filter(
+    member = await update_returning(
+        db,
+        TeamMember,
+        [
             TeamMember.team_id == team_id,
             TeamMember.member_type == member_type,
             TeamMember.member_id == member_id
-        )
+        ],
+        member_update.model_dump(exclude_unset=True)
     )
-    member = result.scalar_one_or_none()
 
     if not member:
         raise HTTPException(
@@ -399,13 +511,8 @@ async def update_team_member(
             detail="Team member not found"
         )
 
-    # Update fields
-    update_data = member_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(member, field, value)
-
     await db.commit()
-    await db.refresh(member)
+    await bump_membership_version(redis, [team_id])
 
     return member
 
@@ -416,23 +523,19 @@ async def remove_team_member(
     member_type: Literal["user", "organization"],
     member_id: int,
     context = Depends(require_permission(Resource.TEAM_MEMBER, Action.REMOVE)),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis)
 ):
     """
     Remove a member from the team.
 
     Requires TEAM_MEMBER:REMOVE permission (Admin role).
     """
-
-    # Get member to remove
-    result = await db.execute(
-        select(TeamMember).filter(
-            TeamMember.team_id == team_id,
-            TeamMember.member_type == member_type,
-            TeamMember.member_id == member_id
-        )
-    )
-    member = result.scalar_one_or_none()
+    member = await delete_returning(db, TeamMember, [
+        TeamMember.team_id == team_id,
+        TeamMember.member_type == member_type,
+        TeamMember.member_id == member_id
+    ])
 
     if not member:
         raise HTTPException(
@@ -440,6 +543,5 @@ async def remove_team_member(
             detail="Team member not found"
         )
 
-    # Remove member
-    await db.delete(member)
     await db.commit()
+    await bump_membership_version(redis, [team_id])
@@ -0,0 +1,108 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+With OFFSET, the database produces and throws away every row before the
+page, so deep pages get slower the deeper they are. A keyset page instead
+continues after the sort key of the last row already returned:
+
+    WHERE (created_at, id) < (:created_at, :id)
+    ORDER BY created_at DESC, id DESC
+    LIMIT :limit
+
+That is an index range scan, and its cost does not depend on how deep the
+page is.
+
+Every list endpoint accepts ``cursor`` next to the existing ``skip``/``limit``
+(both still work, also combined). It returns the cursor of the following page
+in the X-Next-Cursor header, which is absent on the last page. Response
+bodies stay plain lists. Cursors are opaque: URL-safe base64 of the
+endpoint's name and the last row's sort key. A cursor issued by one endpoint
+is rejected by the others.
+
+Usage:
+    TEAMS = Keyset("teams", Team.id)
+
+    query = TEAMS.paginate(query, cursor, skip, limit)
+    rows = (await db.execute(query)).scalars().all()
+    return TEAMS.page(rows, limit, response)
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, literal, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_CURSOR_LENGTH = 512
+
+
+class Keyset:
+    """A unique sort order for one list endpoint and the cursors that resume it."""
+
+    def __init__(self, name: str, *columns, descending: bool = False):
+        self.name = name
+        self.columns = columns
+        self.descending = descending
+
+    def encode(self, values: Sequence[Any]) -> str:
+        payload = [self.name] + [v.isoformat() if isinstance(v, datetime) else v for v in values]
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> Tuple:
+        """Sort key values of a cursor; HTTP 400 if it is malformed or from another endpoint."""
+        try:
+            if len(cursor) > MAX_CURSOR_LENGTH:
+                raise ValueError("cursor too long")
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if not isinstance(payload, list) or len(payload) != len(self.columns) + 1 or payload[0] != self.name:
+                raise ValueError("cursor from another endpoint")
+            return tuple(_parse(column, value) for column, value in zip(self.columns, payload[1:]))
+        except (ValueError, TypeError, binascii.Error):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    def paginate(self, query: Select, cursor: Optional[str], skip: int, limit: int) -> Select:
+        """Order ``query`` by the keyset, resume after ``cursor`` and fetch one extra row."""
+        query = query.order_by(*(c.desc() if self.descending else c.asc() for c in self.columns))
+        if cursor:
+            values = self.decode(cursor)
+            if len(self.columns) == 1:
+                key, after = self.columns[0], values[0]
+            else:
+                key = tuple_(*self.columns)
+                after = tuple_(*(literal(v, c.type) for c, v in zip(self.columns, values)))
+            query = query.where(key < after if self.descending else key > after)
+        # The extra row tells page() whether there is a next page
+        return query.offset(skip).limit(limit + 1)
+
+    def page(self, rows: Sequence[Any], limit: int, response: Response,
+             key: Optional[Callable[[Any], Any]] = None) -> List[Any]:
+        """First ``limit`` rows; sets X-Next-Cursor when paginate() found more.
+
+        ``key`` picks the ORM object holding the sort columns out of a result
+        row (for multi-entity selects).
+        """
+        rows = list(rows)
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = key(rows[-1]) if key else rows[-1]
+            response.headers[NEXT_CURSOR_HEADER] = self.encode([getattr(last, c.key) for c in self.columns])
+        return rows
+
+
+def _parse(column, value: Any) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is int:
+        # bool is an int subclass; JSON true is not an id
+        if type(value) is not int:
+            raise ValueError("expected an integer")
+        return value
+    if not isinstance(value, python_type):
+        raise ValueError(f"expected {python_type.__name__}")
+    return value
@@ -0,0 +1,355 @@
+"""
+Bulk user provisioning.
+
+Organization admins upload users as JSON Lines or CSV (columns ``name``,
+``email``, ``password`` and optional ``role``). The upload is parsed and
+validated as it streams in; rows that fail validation are reported by line
+number and never reach the database. The remaining rows are processed by a
+background task on the worker that received the upload:
+
+- passwords are hashed in batches on a dedicated process pool, separate from
+  the interactive hashing pool so logins keep their latency;
+- each batch is inserted with one multi-row statement that creates the users,
+  their personal teams and their organization memberships
+  (see registration.build_bulk_register_statement); emails that already
+  exist are reported as row errors, new ones are added to the email filter.
+
+Job progress and row errors live in Redis, so any worker can answer a poll.
+A job interrupted by a worker restart stays "running" until its key expires.
+
+Settings:
+    BULK_IMPORT_MAX_ROWS: Rows accepted per upload (default: 50000)
+    BULK_IMPORT_MAX_LINE_BYTES: Longest line accepted in an upload (default: 65536)
+    BULK_IMPORT_BATCH_SIZE: Rows hashed and inserted per statement (default: 500)
+    BULK_IMPORT_HASH_WORKERS: Processes hashing imported passwords (default: half the CPUs)
+    BULK_IMPORT_MAX_ERRORS: Row errors kept per job (default: 1000)
+    BULK_IMPORT_JOB_TTL: Seconds a finished job stays pollable (default: 86400)
+"""
+
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+import redis.asyncio as aioredis
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import security
+from app.core.config import settings
+from app.core.email_filter import email_filter
+from app.core.metrics import register_stats
+from app.core.registration import BulkRow, build_bulk_register_statement, personal_team_name
+from app.core.team_session import bump_organization_teams
+from app.models.team import Team
+from app.models.user import User
+from app.schemas.user import UserCreate
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY_PREFIX = "import:job:"
+FORMATS = ("jsonl", "csv")
+ROLES = ("admin", "member")
+
+MAX_ROWS = int(getattr(settings, "BULK_IMPORT_MAX_ROWS", 50000))
+MAX_LINE_BYTES = int(getattr(settings, "BULK_IMPORT_MAX_LINE_BYTES", 65536))
+BATCH_SIZE = int(getattr(settings, "BULK_IMPORT_BATCH_SIZE", 500))
+HASH_WORKERS = int(getattr(settings, "BULK_IMPORT_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+MAX_ERRORS = int(getattr(settings, "BULK_IMPORT_MAX_ERRORS", 1000))
+JOB_TTL = int(getattr(settings, "BULK_IMPORT_JOB_TTL", 86400))
+
+MAX_NAME_LENGTH = min(User.__table__.c.name.type.length,
+                      Team.__table__.c.name.type.length - len(personal_team_name("")))
+
+
+class ImportTooLarge(Exception):
+    """Raised when an upload has more than BULK_IMPORT_MAX_ROWS rows or a line over BULK_IMPORT_MAX_LINE_BYTES."""
+
+
+class PendingRow:
+    """A validated row waiting for its password to be hashed."""
+    __slots__ = ("line", "name", "email", "password", "role")
+
+    def __init__(self, line: int, name: str, email: str, password: str, role: str):
+        self.line = line
+        self.name = name
+        self.email = email
+        self.password = password
+        self.role = role
+
+
+def row_error(line: int, email: Optional[str], error: str) -> Dict[str, Any]:
+    return {"line": line, "email": email, "error": error}
+
+
+# ==================== Parsing ====================
+
+async def iter_lines(chunks: AsyncIterator[bytes],
+                     max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Yield (line number, text) from a byte stream, skipping blank lines.
+
+    Only each new chunk is split; the unfinished line is carried over and
+    may not grow past max_line_bytes.
+
+    Raises:
+        ImportTooLarge: If a line is longer than max_line_bytes
+    """
+    partial = bytearray()
+    number = 0
+    async for chunk in chunks:
+        *complete, rest = chunk.split(b"\n")
+        if complete:
+            complete[0] = bytes(partial) + complete[0]
+            partial.clear()
+        partial += rest
+        if len(partial) > max_line_bytes or any(len(raw) > max_line_bytes for raw in complete):
+            raise ImportTooLarge(f"Upload lines are limited to {max_line_bytes} bytes")
+        for raw in complete:
+            number += 1
+            text = raw.decode("utf-8-sig" if number == 1 else "utf-8").strip()
+            if text:
+                yield number, text
+    if partial.strip():
+        yield number + 1, bytes(partial).decode("utf-8-sig" if number == 0 else "utf-8").strip()
+
+
+def validate_record(line: int, record: Any) -> Tuple[Optional[PendingRow], Optional[Dict[str, Any]]]:
+    """Check one parsed record; returns either a row or an error."""
+    if not isinstance(record, dict):
+        return None, row_error(line, None, "Expected an object")
+    email = record.get("email")
+    try:
+        user = UserCreate(name=record.get("name"), email=email, password=record.get("password"))
+    except ValidationError as e:
+        first = e.errors()[0]
+        field = ".".join(str(part) for part in first["loc"])
+        return None, row_error(line, email, f"{field}: {first['msg']}")
+    name = user.name.strip()
+    if not name or len(name) > MAX_NAME_LENGTH:
+        return None, row_error(line, user.email, f"name: must be 1-{MAX_NAME_LENGTH} characters")
+    role = (record.get("role") or "member").strip().lower()
+    if role not in ROLES:
+        return None, row_error(line, user.email, f"role: must be one of {', '.join(ROLES)}")
+    return PendingRow(line, name, user.email, user.password, role), None
+
+
+async def parse_upload(chunks: AsyncIterator[bytes], fmt: str,
+                       max_rows: int = MAX_ROWS) -> Tuple[List[PendingRow], List[Dict[str, Any]]]:
+    """
+    Parse and validate an upload as it streams in.
+
+    CSV uploads need a header line; quoted fields may not span lines.
+    Repeated emails within the upload are reported after their first use.
+
+    Raises:
+        ImportTooLarge: If the upload has more than max_rows data rows or an
+            overlong line (see iter_lines)
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+    rows: List[PendingRow] = []
+    errors: List[Dict[str, Any]] = []
+    seen: Set[str] = set()
+    header: Optional[List[str]] = None
+
+    async for line, text in iter_lines(chunks):
+        if fmt == "csv":
+            fields = next(csv.reader([text]))
+            if header is None:
+                header = [field.strip().lower() for field in fields]
+                continue
+            record: Any = dict(zip(header, fields))
+        else:
+            try:
+                record = json.loads(text)
+            except ValueError:
+                errors.append(row_error(line, None, "Invalid JSON"))
+                continue
+
+        if len(rows) + len(errors) >= max_rows:
+            raise ImportTooLarge(f"Uploads are limited to {max_rows} rows")
+
+        row, error = validate_record(line, record)
+        if row is not None and row.email in seen:
+            row, error = None, row_error(line, row.email, "Duplicate email in upload")
+        if row is None:
+            errors.append(error)
+            continue
+        seen.add(row.email)
+        rows.append(row)
+    return rows, errors
+
+
+# ==================== Hashing ====================
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def hash_passwords(passwords: List[str], rounds: int) -> List[str]:
+    """Hash a chunk of passwords (runs in a pool process)."""
+    return [security.get_password_hash(password, rounds) for password in passwords]
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+    return _hash_pool
+
+
+async def hash_batch(passwords: List[str]) -> List[str]:
+    """Hash passwords across the import pool, one chunk per process."""
+    loop = asyncio.get_running_loop()
+    size = max(1, -(-len(passwords) // HASH_WORKERS))
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    # Rounds are passed explicitly so pool processes use the calibrated cost
+    results = await asyncio.gather(*(
+        loop.run_in_executor(_get_hash_pool(), hash_passwords, chunk, security.BCRYPT_ROUNDS)
+        for chunk in chunks
+    ))
+    return [hashed for chunk in results for hashed in chunk]
+
+
+# ==================== Jobs ====================
+
+_tasks: Set[asyncio.Task] = set()
+_counters = {"jobs_started": 0, "jobs_failed": 0, "rows_created": 0, "rows_failed": 0}
+
+
+def _job_key(job_id: str) -> str:
+    return f"{JOB_KEY_PREFIX}{job_id}"
+
+
+async def create_job(redis: aioredis.Redis, organization_id: int, created_by: int,
+                     total: int, errors: List[Dict[str, Any]]) -> str:
+    """Register a job; errors found while parsing count as processed rows."""
+    job_id = uuid.uuid4().hex
+    key = _job_key(job_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={
+            "status": "queued",
+            "organization_id": organization_id,
+            "created_by": created_by,
+            "total": total,
+            "processed": len(errors),
+            "created": 0,
+            "failed": len(errors),
+            "created_at": int(time.time()),
+        })
+        if errors:
+            pipe.rpush(f"{key}:errors", *(json.dumps(e) for e in errors[:MAX_ERRORS]))
+        pipe.expire(key, JOB_TTL)
+        pipe.expire(f"{key}:errors", JOB_TTL)
+        await pipe.execute()
+    return job_id
+
+
+async def get_job(redis: aioredis.Redis, job_id: str) -> Optional[Dict[str, Any]]:
+    """Job progress and its (capped) row errors, or None if unknown or expired."""
+    key = _job_key(job_id)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hgetall(key)
+        pipe.lrange(f"{key}:errors", 0, MAX_ERRORS - 1)
+        fields, errors = await pipe.execute()
+    if not fields:
+        return None
+    job = {k.decode(): v.decode() for k, v in fields.items()}
+    for name in ("organization_id", "created_by", "total", "processed", "created", "failed"):
+        job[name] = int(job[name])
+    job["job_id"] = job_id
+    job["errors"] = [json.loads(e) for e in errors]
+    job["errors_truncated"] = job["failed"] > len(job["errors"])
+    return job
+
+
+async def _record_batch(redis: aioredis.Redis, job_id: str, processed: int, created: int,
+                        errors: List[Dict[str, Any]], errors_kept: int) -> int:
+    key = _job_key(job_id)
+    room = max(0, MAX_ERRORS - errors_kept)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hincrby(key, "processed", processed)
+        pipe.hincrby(key, "created", created)
+        pipe.hincrby(key, "failed", len(errors))
+        if errors[:room]:
+            pipe.rpush(f"{key}:errors", *(json.dumps(e) for e in errors[:room]))
+        await pipe.execute()
+    return errors_kept + min(room, len(errors))
+
+
+async def run_import(job_id: str, organization_id: int, rows: List[PendingRow],
+                     redis: aioredis.Redis, session_factory: Callable[[], AsyncSession],
+                     errors_kept: int = 0) -> None:
+    """Hash and insert rows batch by batch, publishing progress to the job."""
+    key = _job_key(job_id)
+    await redis.hset(key, "status", "running")
+    try:
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            hashes = await hash_batch([row.password for row in batch])
+            bulk_rows = [
+                BulkRow(row.line, row.name, row.email, hashed, row.role)
+                for row, hashed in zip(batch, hashes)
+            ]
+            async with session_factory() as db:
+                result = await db.execute(build_bulk_register_statement(bulk_rows, organization_id))
+                inserted = set(result.scalars().all())
+                await db.commit()
+
+            await email_filter.add(redis, [row.email for row in batch if row.line in inserted])
+            errors = [row_error(row.line, row.email, "Email já cadastrado")
+                      for row in batch if row.line not in inserted]
+            _counters["rows_created"] += len(inserted)
+            _counters["rows_failed"] += len(errors)
+            errors_kept = await _record_batch(redis, job_id, len(batch), len(inserted), errors, errors_kept)
+
+        # New members may reach teams the organization belongs to
+        async with session_factory() as db:
+            await bump_organization_teams(db, redis, organization_id)
+        await redis.hset(key, mapping={"status": "done", "finished_at": int(time.time())})
+    except asyncio.CancelledError:
+        await redis.hset(key, mapping={"status": "failed", "error": "Interrupted by shutdown"})
+        raise
+    except Exception as e:
+        _counters["jobs_failed"] += 1
+        logger.exception(f"Bulk import {job_id} failed")
+        await redis.hset(key, mapping={"status": "failed", "error": str(e)[:500],
+                                       "finished_at": int(time.time())})
+
+
+def start_import(job_id: str, organization_id: int, rows: List[PendingRow],
+                 redis: aioredis.Redis, session_factory: Callable[[], AsyncSession],
+                 errors_kept: int = 0) -> asyncio.Task:
+    """Run the job in the background on this worker."""
+    _counters["jobs_started"] += 1
+    task = asyncio.create_task(
+        run_import(job_id, organization_id, rows, redis, session_factory, errors_kept)
+    )
+    # The event loop only keeps weak references to tasks
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+async def shutdown() -> None:
+    """Cancel running imports and stop the hashing pool (application shutdown)."""
+    global _hash_pool
+    for task in list(_tasks):
+        task.cancel()
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
+def stats() -> Dict[str, Any]:
+    return {**_counters, "jobs_running": len(_tasks), "hash_workers": HASH_WORKERS}
+
+
+register_stats("bulk_import", stats)
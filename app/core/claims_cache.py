@@ -0,0 +1,49 @@
+"""
+Verified JWT claims cache.
+
+Access tokens are long-lived, so the same token string is verified over and
+over. Verified claims are cached per worker, keyed by a SHA-256 digest of the
+token (the raw token is never stored), and expire at the token's own ``exp``.
+
+Settings:
+    JWT_CLAIMS_CACHE_SIZE: Maximum cached tokens per worker (default: 10000)
+"""
+
+import hashlib
+import time
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.core.metrics import register_stats
+from app.core.jwt_keys import key_ring
+from app.helpers.cache import TTLCache
+
+claims_cache = TTLCache(maxsize=int(getattr(settings, "JWT_CLAIMS_CACHE_SIZE", 10000)))
+register_stats("jwt_claims_cache", claims_cache.stats)
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Verify and decode an access token, reusing earlier verifications.
+
+    Raises:
+        JWTError: If the token is invalid or expired
+    """
+    key = token_digest(token)
+    claims = claims_cache.get(key)
+    if claims is not None:
+        return claims
+
+    claims = key_ring.verify(token)
+
+    exp = claims.get("exp")
+    if exp is not None:
+        # exp is wall-clock; the cache runs on a monotonic clock
+        remaining = float(exp) - time.time()
+        if remaining > 0:
+            claims_cache.set(key, claims, expires_at=time.monotonic() + remaining)
+    return claims
@@ -0,0 +1,286 @@
+"""
+Registered-email Bloom filter.
+
+Lets endpoints that look users up by email (forgot-password) answer for
+addresses that are certainly not registered without querying ``users``.
+A miss is definitive; a hit still goes to the database. Callers must return
+the same response either way so the filter does not reveal which emails
+exist.
+
+The filter's bit array lives in Redis (``emails:bloom:bits``) and every
+worker holds a copy:
+
+- new users are added incrementally: their bit positions are set in Redis
+  and the email is published on ``auth:email-added`` for the other workers;
+- workers reload the whole array every EMAIL_FILTER_SYNC_INTERVAL seconds to
+  catch messages missed while disconnected;
+- one worker (holding a Redis lock) rebuilds it from ``users`` every
+  EMAIL_FILTER_REBUILD_INTERVAL seconds, or when it does not exist yet.
+  Adds made while a rebuild runs are journaled and replayed atomically
+  when the new array is swapped in.
+
+Until a worker has loaded an array, and whenever Redis holds one with a
+different geometry, every email counts as a probable hit, i.e. lookups hit
+the database as before. Users inserted outside the application (manual SQL)
+are only seen after the next rebuild.
+
+Settings:
+    EMAIL_FILTER_ENABLED: Use the filter (default: true)
+    EMAIL_FILTER_CAPACITY: Expected number of registered emails (default: 1000000)
+    EMAIL_FILTER_ERROR_RATE: Target false positive rate (default: 0.001)
+    EMAIL_FILTER_SYNC_INTERVAL: Seconds between reloads from Redis (default: 300)
+    EMAIL_FILTER_REBUILD_INTERVAL: Seconds between rebuilds from the database (default: 86400)
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import redis.asyncio as aioredis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import register_stats
+from app.core.redis_pool import get_redis_client
+from app.helpers.bloom import BloomFilter
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+BITS_KEY = "emails:bloom:bits"
+META_KEY = "emails:bloom:meta"
+JOURNAL_KEY = "emails:bloom:journal"
+REBUILD_LOCK_KEY = "emails:bloom:rebuilding"
+EMAIL_CHANNEL = "auth:email-added"
+RELOAD_MESSAGE = "*"
+
+ENABLED = str(getattr(settings, "EMAIL_FILTER_ENABLED", "true")).lower() == "true"
+CAPACITY = int(getattr(settings, "EMAIL_FILTER_CAPACITY", 1000000))
+ERROR_RATE = float(getattr(settings, "EMAIL_FILTER_ERROR_RATE", 0.001))
+SYNC_INTERVAL = float(getattr(settings, "EMAIL_FILTER_SYNC_INTERVAL", 300))
+REBUILD_INTERVAL = float(getattr(settings, "EMAIL_FILTER_REBUILD_INTERVAL", 86400))
+REBUILD_LOCK_TTL = 600
+
+# KEYS = bits, meta, lock, journal; ARGV = Redis bit offsets of one email.
+# The journal is written first so adds racing the very first build are kept.
+_ADD_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('RPUSH', KEYS[4], table.concat(ARGV, ','))
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for _, offset in ipairs(ARGV) do
+    redis.call('SETBIT', KEYS[1], offset, 1)
+end
+redis.call('HINCRBY', KEYS[2], 'count', 1)
+return 1
+"""
+
+# KEYS = bits, meta, lock, journal; ARGV[1] = lock token, ARGV[2] = bits,
+# ARGV[3] = count, ARGV[4] = capacity, ARGV[5] = error rate, ARGV[6] = built_at.
+# Returns the number of journaled adds replayed, or -1 if the lock was lost.
+_SWAP_SCRIPT = """
+if redis.call('GET', KEYS[3]) ~= ARGV[1] then
+    return -1
+end
+redis.call('SET', KEYS[1], ARGV[2])
+local entries = redis.call('LRANGE', KEYS[4], 0, -1)
+for _, entry in ipairs(entries) do
+    for offset in string.gmatch(entry, '%d+') do
+        redis.call('SETBIT', KEYS[1], offset, 1)
+    end
+end
+redis.call('HSET', KEYS[2], 'count', tonumber(ARGV[3]) + #entries,
+           'capacity', ARGV[4], 'error_rate', ARGV[5], 'built_at', ARGV[6])
+redis.call('DEL', KEYS[3], KEYS[4])
+return #entries
+"""
+
+_KEYS = (BITS_KEY, META_KEY, REBUILD_LOCK_KEY, JOURNAL_KEY)
+
+
+def normalize_email(email: str) -> str:
+    # Lower-casing only merges keys, so it can add hits but never misses
+    return email.strip().lower()
+
+
+def redis_offset(position: int) -> int:
+    """Redis numbers bits from the most significant one; BloomFilter from the least."""
+    return (position & ~7) | (7 - (position & 7))
+
+
+class EmailFilter:
+    """Per-worker copy of the registered-email Bloom filter."""
+
+    def __init__(self, capacity: int = CAPACITY, error_rate: float = ERROR_RATE, enabled: bool = ENABLED):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.enabled = enabled
+        self.bloom = BloomFilter(capacity=capacity, error_rate=error_rate)
+        self.ready = False
+        self.last_load: Optional[float] = None
+        self.built_at: Optional[float] = None
+
+        self.checks = 0
+        self.definite_misses = 0
+        self.probable_hits = 0
+        self.false_positives = 0
+
+    def might_exist(self, email: str) -> bool:
+        """False only if the email is certainly not registered."""
+        self.checks += 1
+        if not (self.enabled and self.ready):
+            return True
+        if normalize_email(email) in self.bloom:
+            self.probable_hits += 1
+            return True
+        self.definite_misses += 1
+        return False
+
+    def record_lookup(self, found: bool) -> None:
+        """Report the database answer for a probable hit (feeds the observed FPR)."""
+        if self.ready and not found:
+            self.false_positives += 1
+
+    def add_local(self, email: str) -> None:
+        self.bloom.add(normalize_email(email))
+
+    async def add(self, redis: aioredis.Redis, emails: Iterable[str]) -> None:
+        """Add newly registered emails here, in Redis and in every other worker."""
+        emails = [normalize_email(email) for email in emails]
+        if not emails:
+            return
+        for email in emails:
+            self.bloom.add(email)
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for email in emails:
+                    offsets = [redis_offset(p) for p in self.bloom.positions(email)]
+                    pipe.eval(_ADD_SCRIPT, len(_KEYS), *_KEYS, *offsets)
+                    pipe.publish(EMAIL_CHANNEL, email)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to add {len(emails)} email(s) to the shared filter: {e}")
+
+    async def load(self, redis: aioredis.Redis) -> bool:
+        """Replace the local copy with the array in Redis; False if there is none usable."""
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.get(BITS_KEY)
+            pipe.hgetall(META_KEY)
+            bits, meta = await pipe.execute()
+        meta = {k.decode(): v.decode() for k, v in meta.items()}
+        if bits is None or not meta:
+            return False
+        if int(meta["capacity"]) != self.capacity or float(meta["error_rate"]) != self.error_rate:
+            logger.warning("Shared email filter has a different geometry; ignoring it until rebuilt")
+            self.ready = False
+            return False
+        bloom = BloomFilter(capacity=self.capacity, error_rate=self.error_rate)
+        bloom.load_bytes(bits, int(meta.get("count", 0)))
+        self.bloom = bloom
+        self.built_at = float(meta["built_at"])
+        self.last_load = time.time()
+        self.ready = True
+        return True
+
+    async def rebuild(self, redis: aioredis.Redis, session_factory: Callable[[], AsyncSession]) -> bool:
+        """
+        Rebuild the shared array from the database and tell workers to reload.
+
+        Returns False without doing anything if another worker is rebuilding.
+        """
+        token = uuid.uuid4().hex
+        if not await redis.set(REBUILD_LOCK_KEY, token, nx=True, ex=REBUILD_LOCK_TTL):
+            return False
+        start = time.perf_counter()
+        bloom = BloomFilter(capacity=self.capacity, error_rate=self.error_rate)
+        async with session_factory() as db:
+            emails = await db.stream_scalars(select(User.email).execution_options(yield_per=10000))
+            async for email in emails:
+                bloom.add(normalize_email(email))
+
+        replayed = await redis.eval(
+            _SWAP_SCRIPT, len(_KEYS), *_KEYS,
+            token, bloom.to_bytes(), bloom.count, self.capacity, self.error_rate, time.time()
+        )
+        if int(replayed) < 0:
+            logger.warning("Email filter rebuild lost its lock; discarding result")
+            return False
+        await redis.publish(EMAIL_CHANNEL, RELOAD_MESSAGE)
+        logger.info(
+            f"Email filter rebuilt with {bloom.count} emails ({len(bloom.to_bytes())} bytes) "
+            f"in {time.perf_counter() - start:.2f}s; {replayed} concurrent add(s) replayed"
+        )
+        return True
+
+    def reset(self) -> None:
+        """Forget the local copy (every email becomes a probable hit again)."""
+        self.bloom = BloomFilter(capacity=self.capacity, error_rate=self.error_rate)
+        self.ready = False
+        self.last_load = None
+        self.built_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        negatives = self.definite_misses + self.false_positives
+        return {
+            **self.bloom.stats(),
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "checks": self.checks,
+            "definite_misses": self.definite_misses,
+            "probable_hits": self.probable_hits,
+            "false_positives": self.false_positives,
+            # Share of unregistered emails the filter failed to rule out
+            "observed_fpr": round(self.false_positives / negatives, 6) if negatives else 0.0,
+            "last_load": self.last_load,
+            "built_at": self.built_at,
+        }
+
+
+email_filter = EmailFilter()
+register_stats("email_filter", email_filter.stats)
+
+
+async def _refresh(redis: aioredis.Redis, session_factory: Callable[[], AsyncSession]) -> None:
+    """Load the shared array, rebuilding it first if it is missing or too old."""
+    loaded = await email_filter.load(redis)
+    stale = not loaded or time.time() - (email_filter.built_at or 0) >= REBUILD_INTERVAL
+    if stale and await email_filter.rebuild(redis, session_factory):
+        await email_filter.load(redis)
+    email_filter.last_load = time.time()
+
+
+async def run_email_filter_sync(session_factory: Optional[Callable[[], AsyncSession]] = None,
+                                retry_delay: float = 5.0) -> None:
+    """Keep this worker's copy in sync until cancelled (no-op when disabled)."""
+    if not email_filter.enabled:
+        return
+    if session_factory is None:
+        from app.db.session import SessionAsync
+        session_factory = SessionAsync
+    while True:
+        redis = get_redis_client()
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(EMAIL_CHANNEL)
+                await _refresh(redis, session_factory)
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message.get("type") == "message":
+                        data = message["data"]
+                        data = data.decode() if isinstance(data, bytes) else str(data)
+                        if data == RELOAD_MESSAGE:
+                            await email_filter.load(redis)
+                        else:
+                            email_filter.add_local(data)
+                    if time.time() - (email_filter.last_load or 0) >= SYNC_INTERVAL:
+                        await _refresh(redis, session_factory)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Email filter sync error: {e}; retrying in {retry_delay}s")
+            await asyncio.sleep(retry_delay)
@@ -0,0 +1,287 @@
+"""
+Bounded executor for password hashing.
+
+bcrypt is CPU-bound (~200ms per call), so running it inside an async handler
+stalls every other request on the same uvicorn worker. This module moves the
+work to a thread or process pool, caps how many hashes may be in flight and
+fails fast once the queue is saturated instead of letting latency pile up.
+
+It also owns the bcrypt work factor: at startup the cost can be calibrated
+against a target latency for the hardware the pod runs on, and hashes with a
+lower cost are rewritten transparently after a successful login. The first
+worker to finish calibrating publishes its cost in Redis and every other
+worker adopts it, so a deployment hashes with one cost; for a fixed cost,
+run scripts/bench_bcrypt_cost.py once and set BCRYPT_ROUNDS instead.
+
+Hashes with a higher cost than the current one are kept as they are. To
+lower the cost of stored hashes, set BCRYPT_ALLOW_DOWNGRADE explicitly.
+
+Settings:
+    PASSWORD_HASH_EXECUTOR: "thread" (default) or "process"
+    PASSWORD_HASH_WORKERS: Number of pool workers (default: 4)
+    PASSWORD_HASH_MAX_QUEUE: Extra jobs allowed to wait for a worker (default: 16)
+    BCRYPT_TARGET_MS: Target hash latency for startup calibration (default: 0 = disabled)
+    BCRYPT_MIN_ROUNDS / BCRYPT_MAX_ROUNDS: Calibration bounds (default: 10 / 15)
+    BCRYPT_CALIBRATION_TTL: Seconds the published calibrated cost is reused (default: 86400)
+    BCRYPT_ALLOW_DOWNGRADE: Also rehash hashes with a higher cost (default: false)
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import bcrypt
+
+from app.core.config import settings
+from app.core.metrics import register_stats
+from app.core import security
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_TARGET_MS = float(getattr(settings, "BCRYPT_TARGET_MS", 0))
+BCRYPT_MIN_ROUNDS = int(getattr(settings, "BCRYPT_MIN_ROUNDS", 10))
+BCRYPT_MAX_ROUNDS = int(getattr(settings, "BCRYPT_MAX_ROUNDS", 15))
+BCRYPT_CALIBRATION_TTL = int(getattr(settings, "BCRYPT_CALIBRATION_TTL", 86400))
+BCRYPT_ALLOW_DOWNGRADE = str(getattr(settings, "BCRYPT_ALLOW_DOWNGRADE", "false")).lower() == "true"
+
+CALIBRATION_KEY = "bcrypt:rounds"
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the hashing queue is full and the job is rejected."""
+
+
+class HashingExecutor:
+    """
+    Async facade over a thread/process pool with a concurrency limit.
+
+    Admission is decided synchronously on the event loop: a job is accepted
+    only while ``in_flight < workers + max_queue``. Anything beyond that is
+    rejected immediately with HashingPoolSaturated.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 4, max_queue: int = 16):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing executor kind: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latency_total_ms = 0.0
+        self._latency_max_ms = 0.0
+        self._latency_last_ms = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers,
+                            thread_name_prefix="pwd-hash"
+                        )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Run a hashing function in the pool.
+
+        Args:
+            fn: Module-level (picklable) function to execute
+            *args: Positional arguments for fn
+
+        Returns:
+            Result of fn(*args)
+
+        Raises:
+            HashingPoolSaturated: If the pool and its queue are full
+        """
+        if self._in_flight >= self.capacity:
+            self._rejected += 1
+            raise HashingPoolSaturated("Password hashing queue is full")
+
+        self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._in_flight -= 1
+            self._completed += 1
+            self._latency_total_ms += elapsed_ms
+            self._latency_last_ms = elapsed_ms
+            if elapsed_ms > self._latency_max_ms:
+                self._latency_max_ms = elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and latency counters."""
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - self.workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "latency_avg_ms": round(self._latency_total_ms / self._completed, 2) if self._completed else 0.0,
+            "latency_max_ms": round(self._latency_max_ms, 2),
+            "latency_last_ms": round(self._latency_last_ms, 2),
+        }
+
+    def shutdown(self) -> None:
+        """Shut down the underlying pool (called on application shutdown)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hashing_executor = HashingExecutor(
+    kind=getattr(settings, "PASSWORD_HASH_EXECUTOR", "thread").lower(),
+    workers=int(getattr(settings, "PASSWORD_HASH_WORKERS", 4)),
+    max_queue=int(getattr(settings, "PASSWORD_HASH_MAX_QUEUE", 16)),
+)
+register_stats("password_hashing", lambda: {**hashing_executor.stats(), "bcrypt_rounds": security.BCRYPT_ROUNDS})
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Non-blocking variant of security.verify_password."""
+    return await hashing_executor.run(security.verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Non-blocking variant of security.get_password_hash."""
+    # Rounds are passed explicitly so process-pool workers use the calibrated cost
+    return await hashing_executor.run(security.get_password_hash, password, security.BCRYPT_ROUNDS)
+
+
+def needs_rehash(hashed_password: str, allow_downgrade: Optional[bool] = None) -> bool:
+    """
+    True if a stored hash was made with a lower cost than the current one.
+
+    Higher costs are only rewritten when allow_downgrade (default:
+    BCRYPT_ALLOW_DOWNGRADE) is set.
+    """
+    if allow_downgrade is None:
+        allow_downgrade = BCRYPT_ALLOW_DOWNGRADE
+    rounds = security.get_hash_rounds(hashed_password)
+    if rounds is None:
+        return True
+    if allow_downgrade:
+        return rounds != security.BCRYPT_ROUNDS
+    return rounds < security.BCRYPT_ROUNDS
+
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and produce a replacement hash if its cost is outdated
+    (see needs_rehash).
+
+    Returns:
+        (valid, new_hash): new_hash is None unless the password is valid and
+        the stored hash should be rewritten with the current cost
+    """
+    if not await verify_password_async(plain_password, hashed_password):
+        return False, None
+    if needs_rehash(hashed_password):
+        return True, await get_password_hash_async(plain_password)
+    return True, None
+
+
+# ==================== Cost calibration ====================
+
+def measure_bcrypt_ms(rounds: int, samples: int = 3) -> float:
+    """Median wall time of one bcrypt hash at the given cost."""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", bcrypt.gensalt(rounds=rounds))
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def bcrypt_cost_table(min_rounds: int = BCRYPT_MIN_ROUNDS, max_rounds: int = BCRYPT_MAX_ROUNDS,
+                      stop_after_ms: Optional[float] = None) -> List[Tuple[int, float]]:
+    """
+    Measure hash latency for each cost in [min_rounds, max_rounds].
+
+    Each extra round doubles the cost, so measuring stops once a cost exceeds
+    stop_after_ms (when given).
+    """
+    table = []
+    for rounds in range(min_rounds, max_rounds + 1):
+        # Costs above ~100ms are stable enough with a single sample
+        latency = measure_bcrypt_ms(rounds, samples=3 if not table or table[-1][1] < 100 else 1)
+        table.append((rounds, latency))
+        if stop_after_ms is not None and latency > stop_after_ms:
+            break
+    return table
+
+
+def choose_bcrypt_rounds(table: List[Tuple[int, float]], target_ms: float,
+                         min_rounds: int = BCRYPT_MIN_ROUNDS) -> int:
+    """Highest measured cost whose latency stays within target_ms (never below min_rounds)."""
+    chosen = min_rounds
+    for rounds, latency in table:
+        if latency <= target_ms:
+            chosen = max(chosen, rounds)
+    return chosen
+
+
+def calibrate_bcrypt_rounds(target_ms: float = BCRYPT_TARGET_MS) -> int:
+    """
+    Pick and apply the bcrypt cost for this host.
+
+    Does nothing (keeps BCRYPT_ROUNDS) when target_ms is not positive.
+    """
+    if target_ms <= 0:
+        return security.BCRYPT_ROUNDS
+    table = bcrypt_cost_table(stop_after_ms=target_ms)
+    security.BCRYPT_ROUNDS = choose_bcrypt_rounds(table, target_ms)
+    logger.info(
+        f"bcrypt calibrated to {security.BCRYPT_ROUNDS} rounds for {target_ms:.0f}ms target "
+        f"({', '.join(f'{r}={ms:.0f}ms' for r, ms in table)})"
+    )
+    return security.BCRYPT_ROUNDS
+
+
+async def calibrate_bcrypt_rounds_shared(redis: Any, target_ms: float = BCRYPT_TARGET_MS,
+                                         ttl: int = BCRYPT_CALIBRATION_TTL) -> int:
+    """
+    Calibrate once per deployment: adopt the cost published in Redis, or
+    calibrate and publish it (SET NX, so concurrent workers settle on the
+    first value written).
+
+    Falls back to a local calibration when Redis is unavailable. Does
+    nothing when target_ms is not positive.
+    """
+    if target_ms <= 0:
+        return security.BCRYPT_ROUNDS
+    try:
+        published = await redis.get(CALIBRATION_KEY)
+        if published is None:
+            rounds = await asyncio.to_thread(calibrate_bcrypt_rounds, target_ms)
+            if not await redis.set(CALIBRATION_KEY, rounds, nx=True, ex=ttl):
+                published = await redis.get(CALIBRATION_KEY)
+        if published is not None:
+            security.BCRYPT_ROUNDS = int(published)
+            logger.info(f"bcrypt cost {security.BCRYPT_ROUNDS} adopted from the deployment calibration")
+    except Exception as e:
+        logger.warning(f"bcrypt calibration could not be shared through Redis: {e}")
+        await asyncio.to_thread(calibrate_bcrypt_rounds, target_ms)
+    return security.BCRYPT_ROUNDS
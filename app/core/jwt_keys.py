@@ -0,0 +1,146 @@
+"""
+Access token signing keys.
+
+By default access tokens are HS256-signed with the application secret, so only
+this API can verify them. Setting JWT_ALGORITHM to RS256 or ES256 switches to
+asymmetric signing: the private key stays here and other services verify
+tokens locally with the public keys published at ``/.well-known/jwks.json``.
+
+Keys live in JWT_KEYS_DIR as PEM files named ``<kid>.pem``. The key named by
+JWT_ACTIVE_KID signs new tokens (its ``kid`` goes in the token header); every
+other key in the directory, private or public-only, is still accepted for
+verification. Rotation is therefore: drop in the new key, switch
+JWT_ACTIVE_KID, and delete the old file once its tokens have expired. All keys
+are parsed once at import and kept in memory.
+
+python-jose has no EdDSA support, so Ed25519 keys are not accepted.
+
+Settings:
+    JWT_ALGORITHM: HS256 (default), RS256 or ES256
+    JWT_KEYS_DIR: Directory of <kid>.pem keys (asymmetric algorithms only)
+    JWT_ACTIVE_KID: kid of the key that signs new tokens
+    JWT_ACCEPT_HS256: Keep accepting HS256 tokens after switching (default: true)
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+JWT_ALGORITHM = str(getattr(settings, "JWT_ALGORITHM", "HS256")).upper()
+JWT_KEYS_DIR = getattr(settings, "JWT_KEYS_DIR", None)
+JWT_ACTIVE_KID = getattr(settings, "JWT_ACTIVE_KID", None)
+JWT_ACCEPT_HS256 = str(getattr(settings, "JWT_ACCEPT_HS256", "true")).lower() == "true"
+
+
+class KeyRing:
+    """
+    Signing key plus every verification key, indexed by kid.
+
+    With HS256 the ring only holds the shared secret and publishes no JWKS.
+    """
+
+    def __init__(
+        self,
+        secret: str,
+        algorithm: str = "HS256",
+        keys: Optional[Dict[str, Key]] = None,
+        active_kid: Optional[str] = None,
+        accept_hs256: bool = True
+    ):
+        if algorithm != "HS256" and algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+        self.secret = secret
+        self.algorithm = algorithm
+        self.accept_hs256 = accept_hs256 or algorithm == "HS256"
+        self.active_kid = active_kid
+        self._signing_key: Optional[Key] = None
+        self._verification_keys: Dict[str, Key] = {}
+
+        if algorithm in ASYMMETRIC_ALGORITHMS:
+            keys = keys or {}
+            signing_key = keys.get(active_kid)
+            if signing_key is None or signing_key.is_public():
+                raise ValueError(f"JWT_ACTIVE_KID '{active_kid}' must name a private key")
+            self._signing_key = signing_key
+            self._verification_keys = {
+                kid: key if key.is_public() else key.public_key()
+                for kid, key in keys.items()
+            }
+        self._jwks_body = json.dumps(self._build_jwks(), separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    def from_directory(cls, secret: str, algorithm: str, path: str,
+                       active_kid: Optional[str], accept_hs256: bool = True) -> "KeyRing":
+        """Load every ``<kid>.pem`` in path."""
+        keys = {}
+        for name in sorted(os.listdir(path)):
+            if not name.endswith(".pem"):
+                continue
+            with open(os.path.join(path, name), "rb") as f:
+                keys[name[:-4]] = jwk.construct(f.read(), algorithm)
+        logger.info(f"Loaded {len(keys)} JWT key(s) from {path}; signing with kid '{active_kid}' ({algorithm})")
+        return cls(secret, algorithm, keys=keys, active_kid=active_kid, accept_hs256=accept_hs256)
+
+    def _build_jwks(self) -> Dict[str, Any]:
+        jwks = []
+        for kid, key in self._verification_keys.items():
+            entry = key.to_dict()
+            entry.update({"kid": kid, "use": "sig", "alg": self.algorithm})
+            jwks.append(entry)
+        return {"keys": jwks}
+
+    @property
+    def jwks(self) -> Dict[str, Any]:
+        return json.loads(self._jwks_body)
+
+    @property
+    def jwks_body(self) -> bytes:
+        """Serialized JWKS, built once."""
+        return self._jwks_body
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        if self._signing_key is None:
+            return jwt.encode(claims, self.secret, algorithm="HS256")
+        return jwt.encode(claims, self._signing_key, algorithm=self.algorithm,
+                          headers={"kid": self.active_kid})
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Verify a token with the key its header points at.
+
+        Raises:
+            JWTError: If the token is invalid, expired or signed with an unknown key
+        """
+        header = jwt.get_unverified_header(token)
+        if header.get("alg") == "HS256":
+            if not self.accept_hs256:
+                raise JWTError("HS256 tokens are no longer accepted")
+            return jwt.decode(token, self.secret, algorithms=["HS256"])
+
+        key = self._verification_keys.get(header.get("kid"))
+        if key is None:
+            raise JWTError("Unknown signing key")
+        # Pin the algorithm: never let the header choose it
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+
+def load_key_ring() -> KeyRing:
+    if JWT_ALGORITHM == "HS256":
+        return KeyRing(settings.KEY)
+    if not JWT_KEYS_DIR:
+        raise RuntimeError(f"JWT_KEYS_DIR is required for {JWT_ALGORITHM}")
+    return KeyRing.from_directory(settings.KEY, JWT_ALGORITHM, JWT_KEYS_DIR,
+                                  JWT_ACTIVE_KID, accept_hs256=JWT_ACCEPT_HS256)
+
+
+key_ring = load_key_ring()
@@ -0,0 +1,185 @@
+"""
+Credential-stuffing shield for password logins.
+
+Runs before the user lookup and the bcrypt check. Failed logins are counted
+per account (email) and per client IP in Redis. Once a counter passes its
+free allowance, every further failure locks that key for an exponentially
+growing delay (base * 2^n, capped). While either key is locked, attempts are
+refused with 429 without touching the database or bcrypt.
+
+Locks seen by a worker are also kept in a local cache until they expire, so
+a client hammering a locked account or IP is rejected without a Redis round
+trip.
+
+The IP is app.core.rate_limit.client_ip: the TCP peer, or behind a
+TRUSTED_PROXIES entry the hop that proxy appended, never a client-supplied
+X-Forwarded-For.
+
+Counters exist for unknown emails too, so responses do not reveal which
+accounts exist. A successful login clears the account counter; the IP counter
+only decays through its TTL.
+
+Settings:
+    LOGIN_ACCOUNT_FREE_ATTEMPTS: Failures per account before backoff starts (default: 5)
+    LOGIN_IP_FREE_ATTEMPTS: Failures per IP before backoff starts (default: 20)
+    LOGIN_BACKOFF_BASE_SECONDS: First lock duration (default: 1)
+    LOGIN_BACKOFF_MAX_SECONDS: Longest lock duration (default: 900)
+    LOGIN_FAILURE_WINDOW_SECONDS: Counters reset after this long without failures (default: 3600)
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.metrics import register_stats
+from app.helpers.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_KEY_PREFIX = "login:fail:acct:"
+IP_KEY_PREFIX = "login:fail:ip:"
+
+ACCOUNT_FREE_ATTEMPTS = int(getattr(settings, "LOGIN_ACCOUNT_FREE_ATTEMPTS", 5))
+IP_FREE_ATTEMPTS = int(getattr(settings, "LOGIN_IP_FREE_ATTEMPTS", 20))
+BACKOFF_BASE_SECONDS = float(getattr(settings, "LOGIN_BACKOFF_BASE_SECONDS", 1))
+BACKOFF_MAX_SECONDS = float(getattr(settings, "LOGIN_BACKOFF_MAX_SECONDS", 900))
+FAILURE_WINDOW_SECONDS = float(getattr(settings, "LOGIN_FAILURE_WINDOW_SECONDS", 3600))
+
+# KEYS = counter keys; returns the remaining lock in ms per key (0 = open)
+_CHECK_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local waits = {}
+for i, key in ipairs(KEYS) do
+    local locked_until = tonumber(redis.call('HGET', key, 'until') or '0')
+    waits[i] = math.max(0, locked_until - now)
+end
+return waits
+"""
+
+# KEYS = counter keys; ARGV[1] = window ms, ARGV[2] = base ms, ARGV[3] = max ms,
+# ARGV[3 + i] = free attempts for KEYS[i]. Returns the lock in ms per key.
+_FAIL_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local window = tonumber(ARGV[1])
+local base = tonumber(ARGV[2])
+local max_delay = tonumber(ARGV[3])
+local locks = {}
+for i, key in ipairs(KEYS) do
+    local count = redis.call('HINCRBY', key, 'count', 1)
+    local excess = count - tonumber(ARGV[3 + i])
+    local delay = 0
+    if excess > 0 then
+        delay = math.min(max_delay, base * 2 ^ (excess - 1))
+        redis.call('HSET', key, 'until', string.format('%d', now + delay))
+    end
+    redis.call('PEXPIRE', key, math.max(window, math.ceil(delay)))
+    locks[i] = math.ceil(delay)
+end
+return locks
+"""
+
+
+class LoginGuard:
+    """Per-account / per-IP failure counters with exponential backoff."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._locks = TTLCache(maxsize=50000, clock=clock)
+
+        self.checks = 0
+        self.local_rejections = 0
+        self.redis_rejections = 0
+        self.failures = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def _keys(email: str, ip: str) -> list:
+        return [f"{ACCOUNT_KEY_PREFIX}{email.strip().lower()}", f"{IP_KEY_PREFIX}{ip}"]
+
+    def _remember_lock(self, key: str, seconds: float) -> None:
+        if seconds > 0:
+            locked_until = self._clock() + seconds
+            self._locks.set(key, locked_until, expires_at=locked_until)
+
+    def _local_wait(self, keys: list) -> float:
+        now = self._clock()
+        return max((self._locks.get(key, now) - now for key in keys), default=0.0)
+
+    async def retry_after(self, redis: aioredis.Redis, email: str, ip: str) -> float:
+        """
+        Seconds until this email/IP may try again, 0 if allowed now.
+
+        Redis errors allow the attempt (fail open); local locks still apply.
+        """
+        self.checks += 1
+        keys = self._keys(email, ip)
+
+        wait = self._local_wait(keys)
+        if wait > 0:
+            self.local_rejections += 1
+            return wait
+
+        try:
+            waits_ms = [int(w) for w in await redis.eval(_CHECK_SCRIPT, len(keys), *keys)]
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Login guard check failed: {e}; allowing attempt")
+            return 0.0
+        wait_ms = max(waits_ms, default=0)
+        if wait_ms > 0:
+            self.redis_rejections += 1
+            # Only cache the keys that are locked: a locked account must not lock the caller's IP
+            for key, key_wait_ms in zip(keys, waits_ms):
+                self._remember_lock(key, key_wait_ms / 1000)
+            return wait_ms / 1000
+        return 0.0
+
+    async def record_failure(self, redis: aioredis.Redis, email: str, ip: str) -> None:
+        self.failures += 1
+        keys = self._keys(email, ip)
+        try:
+            locks = await redis.eval(
+                _FAIL_SCRIPT, len(keys), *keys,
+                int(FAILURE_WINDOW_SECONDS * 1000),
+                int(BACKOFF_BASE_SECONDS * 1000),
+                int(BACKOFF_MAX_SECONDS * 1000),
+                ACCOUNT_FREE_ATTEMPTS,
+                IP_FREE_ATTEMPTS,
+            )
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Login guard failed to record failure: {e}")
+            return
+        for key, lock_ms in zip(keys, locks):
+            self._remember_lock(key, int(lock_ms) / 1000)
+
+    async def record_success(self, redis: aioredis.Redis, email: str) -> None:
+        key = self._keys(email, "")[0]
+        self._locks.pop(key)
+        try:
+            await redis.delete(key)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Login guard failed to reset account counter: {e}")
+
+    def reset_local(self) -> None:
+        self._locks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "checks": self.checks,
+            "local_rejections": self.local_rejections,
+            "redis_rejections": self.redis_rejections,
+            "failures": self.failures,
+            "redis_errors": self.redis_errors,
+            "locally_locked_keys": len(self._locks),
+        }
+
+
+login_guard = LoginGuard()
+register_stats("login_guard", login_guard.stats)
@@ -0,0 +1,45 @@
+"""
+In-process metrics registry.
+
+Subsystems (hashing pool, caches, connection pools, ...) register a callable
+returning a dict of counters. The callables are evaluated lazily when the
+metrics endpoint is hit, so registering is free on the hot path.
+"""
+
+import logging
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_stats(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """
+    Register a stats provider under a unique name.
+
+    Args:
+        name: Subsystem name (e.g. "password_hashing")
+        provider: Zero-argument callable returning a JSON-serializable dict
+    """
+    _providers[name] = provider
+
+
+def collect_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Snapshot all registered providers.
+
+    A failing provider is reported as an error entry instead of breaking
+    the whole snapshot.
+
+    Returns:
+        Dict mapping subsystem name to its stats
+    """
+    snapshot = {}
+    for name, provider in _providers.items():
+        try:
+            snapshot[name] = provider()
+        except Exception as e:
+            logger.warning(f"Stats provider '{name}' failed: {e}")
+            snapshot[name] = {"error": str(e)}
+    return snapshot
@@ -0,0 +1,141 @@
+"""
+Redis-backed one-time password store for the password reset flow.
+
+OTPs are never stored in clear or bcrypt-hashed: the record keeps an
+HMAC-SHA256 digest keyed with the application secret, which is as strong as
+bcrypt for a short-lived 6-digit code behind an attempt counter, and orders
+of magnitude cheaper. Expiry is handled by Redis TTL and the
+compare-and-count step runs atomically in a single Lua script.
+
+Record layout (hash ``otp:pwd_reset:{email}``):
+    digest, user_id, token_version, require_totp, attempts
+
+Settings:
+    OTP_MAX_ATTEMPTS: Wrong codes accepted before the record locks (default: 5)
+"""
+
+import hashlib
+import hmac
+from dataclasses import dataclass
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.security import SECRET_KEY, OTP_TTL_MINUTES
+
+KEY_PREFIX = "otp:pwd_reset:"
+OTP_MAX_ATTEMPTS = int(getattr(settings, "OTP_MAX_ATTEMPTS", 5))
+
+# Return codes of the verify script
+OTP_MISSING = -1
+OTP_LOCKED = -2
+OTP_MISMATCH = 0
+OTP_OK = 1
+
+# KEYS[1] = record key; ARGV[1] = candidate digest; ARGV[2] = max attempts
+# Records that still need a TOTP check are kept so a wrong authenticator code
+# can be retried with the same OTP; the caller consumes them afterwards.
+_VERIFY_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {-1}
+end
+local attempts = tonumber(redis.call('HGET', KEYS[1], 'attempts') or '0')
+if attempts >= tonumber(ARGV[2]) then
+    return {-2}
+end
+if redis.call('HGET', KEYS[1], 'digest') ~= ARGV[1] then
+    redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+    return {0}
+end
+local fields = redis.call('HMGET', KEYS[1], 'user_id', 'token_version', 'require_totp')
+if fields[3] ~= '1' then
+    redis.call('DEL', KEYS[1])
+end
+return {1, fields[1], fields[2], fields[3]}
+"""
+
+
+@dataclass(frozen=True)
+class OTPRecord:
+    """Data returned by a successful OTP verification."""
+    user_id: int
+    token_version: int
+    require_totp: bool
+
+
+def _key(email: str) -> str:
+    return f"{KEY_PREFIX}{email.lower()}"
+
+
+def otp_digest(email: str, otp: str) -> str:
+    message = f"{email.lower()}:{otp}".encode("utf-8")
+    return hmac.new(SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+async def issue_otp(
+    redis: aioredis.Redis,
+    email: str,
+    otp: str,
+    user_id: int,
+    token_version: int,
+    require_totp: bool,
+    ttl_seconds: int = OTP_TTL_MINUTES * 60
+) -> None:
+    """Store a new OTP for email, replacing any previous one."""
+    key = _key(email)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(key)
+        pipe.hset(key, mapping={
+            "digest": otp_digest(email, otp),
+            "user_id": user_id,
+            "token_version": token_version,
+            "require_totp": "1" if require_totp else "0",
+            "attempts": 0,
+        })
+        pipe.expire(key, ttl_seconds)
+        await pipe.execute()
+
+
+async def verify_otp_code(
+    redis: aioredis.Redis,
+    email: str,
+    otp: str,
+    max_attempts: int = OTP_MAX_ATTEMPTS
+) -> tuple[int, Optional[OTPRecord]]:
+    """
+    Atomically check an OTP and count the attempt.
+
+    Returns:
+        (status, record): status is OTP_OK, OTP_MISMATCH, OTP_LOCKED or
+        OTP_MISSING; record is set only when status is OTP_OK
+    """
+    result = await redis.eval(_VERIFY_SCRIPT, 1, _key(email), otp_digest(email, otp), max_attempts)
+    status = int(result[0])
+    if status != OTP_OK:
+        return status, None
+    user_id, token_version, require_totp = (
+        v.decode() if isinstance(v, bytes) else v for v in result[1:4]
+    )
+    return status, OTPRecord(
+        user_id=int(user_id),
+        token_version=int(token_version),
+        require_totp=str(require_totp) == "1"
+    )
+
+
+async def record_failed_attempt(redis: aioredis.Redis, email: str) -> None:
+    """Count a failed second factor against the OTP record, if it still exists."""
+    key = _key(email)
+    if await redis.exists(key):
+        await redis.hincrby(key, "attempts", 1)
+
+
+async def consume_otp(redis: aioredis.Redis, email: str) -> bool:
+    """
+    Delete the OTP record.
+
+    Returns:
+        True if this call consumed it, False if it was already gone
+    """
+    return bool(await redis.delete(_key(email)))
@@ -0,0 +1,114 @@
+"""
+Authenticated principal cache.
+
+get_current_user used to run ``SELECT * FROM users`` on every authenticated
+request just to compare token_version. Principals are now cached per worker,
+keyed by (user_id, token_version), with a short TTL as a safety net.
+
+Whenever token_version, the password or 2FA state changes, the writer calls
+``invalidate_user`` which drops the local entries and publishes the user id on
+a Redis channel; every worker runs ``run_invalidation_listener`` and drops its
+own entries when a message arrives.
+
+Settings:
+    AUTH_USER_CACHE_SIZE: Maximum cached principals per worker (default: 10000)
+    AUTH_USER_CACHE_TTL: Seconds a principal may be served from cache (default: 60)
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import redis.asyncio as aioredis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import register_stats
+from app.core.redis_pool import get_redis_client
+from app.db.statements import PRINCIPAL_BY_ID
+from app.helpers.cache import TTLCache
+from app.schemas.user import CurrentUser
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "auth:user-invalidate"
+
+principal_cache = TTLCache(
+    maxsize=int(getattr(settings, "AUTH_USER_CACHE_SIZE", 10000)),
+    ttl=float(getattr(settings, "AUTH_USER_CACHE_TTL", 60)),
+)
+register_stats("principal_cache", principal_cache.stats)
+
+
+async def load_principal(db: AsyncSession, user_id: int, token_version: int) -> Optional[CurrentUser]:
+    """
+    Return the principal for (user_id, token_version), hitting the DB on a miss.
+
+    Returns:
+        CurrentUser if the user exists and its token_version matches, else None
+    """
+    key = (user_id, token_version)
+    principal = principal_cache.get(key)
+    if principal is not None:
+        return principal
+
+    result = await db.execute(PRINCIPAL_BY_ID, {"user_id": user_id})
+    row = result.first()
+    if row is None:
+        return None
+
+    principal = CurrentUser.model_validate(row._mapping)
+    if int(principal.token_version or 1) != int(token_version):
+        return None
+
+    principal_cache.set(key, principal)
+    return principal
+
+
+def evict_user(user_id: int) -> int:
+    """Drop every cached principal for user_id in this worker."""
+    return principal_cache.invalidate_where(lambda key: key[0] == user_id)
+
+
+async def invalidate_user(redis: Optional[aioredis.Redis], user_id: int) -> None:
+    """
+    Invalidate a user's cached principal in this and every other worker.
+
+    Publishing is best effort: if Redis is unavailable the TTL bounds how long
+    other workers can serve the stale entry.
+    """
+    evict_user(user_id)
+    if redis is None:
+        return
+    try:
+        await redis.publish(INVALIDATION_CHANNEL, str(user_id))
+    except Exception as e:
+        logger.warning(f"Failed to publish principal invalidation for user {user_id}: {e}")
+
+
+async def run_invalidation_listener(retry_delay: float = 5.0) -> None:
+    """
+    Subscribe to invalidation messages until cancelled.
+
+    Intended to run as a background task for the lifetime of the worker.
+    Reconnects after Redis errors and clears the whole cache on reconnect,
+    since messages published while disconnected were lost.
+    """
+    while True:
+        redis = get_redis_client()
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                principal_cache.clear()
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        evict_user(int(message["data"]))
+                    except (TypeError, ValueError):
+                        logger.warning(f"Ignoring malformed invalidation message: {message['data']!r}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Principal invalidation listener error: {e}; retrying in {retry_delay}s")
+            await asyncio.sleep(retry_delay)
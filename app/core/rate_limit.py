@@ -0,0 +1,246 @@
+"""
+Rate limiting.
+
+Limits are enforced with GCRA (generic cell rate algorithm) in a single Lua
+script, so the check and the update are one atomic Redis round trip. Each key
+stores only its theoretical arrival time (TAT) and expires when the client is
+back to a full burst, so sustained abuse cannot keep a window open forever.
+
+In front of Redis each worker keeps a local token bucket per key with the same
+rate. A worker only sees part of the traffic, so a client that exhausts its
+local bucket is certainly over the global limit and is rejected without a
+round trip; the same happens while a previous Redis rejection is still in
+force. Everything else is decided by Redis.
+
+Per-IP keys use the address of the TCP peer. X-Forwarded-For is only
+consulted when that peer is one of TRUSTED_PROXIES, and then only the hops
+appended by trusted proxies are believed: the rightmost hop that is not a
+trusted proxy is the client. Anything further left was written by the client
+and is ignored, so rotating the header does not yield fresh keys.
+
+Settings:
+    RATE_LIMIT_LOCAL_CACHE_SIZE: Keys tracked by the local pre-filter (default: 10000)
+    TRUSTED_PROXIES: Comma-separated IPs/CIDRs of reverse proxies allowed to set X-Forwarded-For (default: none)
+"""
+
+import ipaddress
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+import redis.asyncio as aioredis
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.metrics import register_stats
+from app.helpers.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ratelimit:"
+LOCAL_CACHE_SIZE = int(getattr(settings, "RATE_LIMIT_LOCAL_CACHE_SIZE", 10000))
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in str(getattr(settings, "TRUSTED_PROXIES", "")).split(",") if entry.strip()
+]
+
+# KEYS[1] = TAT key; ARGV[1] = emission interval (us); ARGV[2] = burst tolerance (us)
+# Returns {allowed, remaining, retry_after_us}. Time comes from Redis so every
+# worker agrees on the clock.
+_GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000000 + tonumber(t[2])
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local diff = new_tat - now
+if diff > tolerance then
+    return {0, 0, diff - tolerance}
+end
+redis.call('SET', KEYS[1], string.format('%d', new_tat), 'PX', math.ceil(diff / 1000))
+return {1, math.floor((tolerance - diff) / interval), 0}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """
+    A named limit: ``limit`` requests per ``period`` seconds per key.
+
+    ``burst`` is how many requests may arrive back to back (defaults to
+    ``limit``, i.e. the whole period's allowance at once).
+    """
+    name: str
+    limit: int
+    period: float
+    burst: Optional[int] = None
+    detail: str = "Too many requests"
+
+    @property
+    def capacity(self) -> int:
+        return self.burst or self.limit
+
+    @property
+    def interval(self) -> float:
+        """Seconds between requests at the sustained rate."""
+        return self.period / self.limit
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+class _LocalBucket:
+    __slots__ = ("tokens", "updated", "blocked_until")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    """GCRA limiter backed by Redis with a per-worker token bucket pre-filter."""
+
+    def __init__(self, local_cache_size: int = LOCAL_CACHE_SIZE,
+                 clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._buckets = TTLCache(maxsize=local_cache_size, clock=clock)
+
+        self.checks = 0
+        self.local_rejections = 0
+        self.redis_rejections = 0
+        self.redis_errors = 0
+
+    def _take_local(self, policy: RateLimitPolicy, key: str) -> Optional[RateLimitResult]:
+        """Spend a local token; return a rejection if the pre-filter decides."""
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _LocalBucket(tokens=float(policy.capacity), updated=now)
+        else:
+            bucket.tokens = min(
+                float(policy.capacity),
+                bucket.tokens + (now - bucket.updated) / policy.interval
+            )
+            bucket.updated = now
+        # By then the bucket is full again and carries no information
+        self._buckets.set(key, bucket, expires_at=now + policy.period)
+
+        if bucket.blocked_until > now:
+            return RateLimitResult(False, 0, bucket.blocked_until - now)
+        if bucket.tokens < 1:
+            return RateLimitResult(False, 0, (1 - bucket.tokens) * policy.interval)
+        bucket.tokens -= 1
+        return None
+
+    def _block_local(self, policy: RateLimitPolicy, key: str, retry_after: float) -> None:
+        """Remember a Redis rejection and refund the token it did not use."""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.tokens = min(float(policy.capacity), bucket.tokens + 1)
+            bucket.blocked_until = self._clock() + retry_after
+
+    async def hit(self, redis: aioredis.Redis, policy: RateLimitPolicy, identity: str) -> RateLimitResult:
+        """
+        Count one request for identity under policy.
+
+        If Redis is unreachable the request is allowed (fail open), still
+        subject to the local pre-filter.
+        """
+        self.checks += 1
+        key = f"{KEY_PREFIX}{policy.name}:{identity}"
+
+        rejected = self._take_local(policy, key)
+        if rejected is not None:
+            self.local_rejections += 1
+            return rejected
+
+        interval_us = max(1, int(policy.interval * 1_000_000))
+        try:
+            allowed, remaining, retry_us = await redis.eval(
+                _GCRA_SCRIPT, 1, key, interval_us, interval_us * policy.capacity
+            )
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Rate limit check failed for {policy.name}: {e}; allowing request")
+            return RateLimitResult(True, 0, 0.0)
+
+        if not int(allowed):
+            self.redis_rejections += 1
+            retry_after = int(retry_us) / 1_000_000
+            self._block_local(policy, key, retry_after)
+            return RateLimitResult(False, 0, retry_after)
+        return RateLimitResult(True, int(remaining), 0.0)
+
+    def reset_local(self) -> None:
+        self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "checks": self.checks,
+            "local_rejections": self.local_rejections,
+            "redis_rejections": self.redis_rejections,
+            "redis_errors": self.redis_errors,
+            "local_keys": len(self._buckets),
+        }
+
+
+rate_limiter = RateLimiter()
+register_stats("rate_limit", rate_limiter.stats)
+
+
+# ==================== Key functions ====================
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """
+    Client address for per-IP keys.
+
+    The TCP peer, unless it is a trusted proxy: then the rightmost
+    X-Forwarded-For hop that is not a trusted proxy.
+    """
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    # Only proxies in the chain: the leftmost one is as close to the client as we get
+    return hops[0] if hops else peer
+
+
+async def by_ip(request: Request) -> str:
+    return client_ip(request)
+
+
+async def by_email_and_ip(request: Request) -> str:
+    """Key on the JSON body's email plus the client IP."""
+    email = ""
+    try:
+        body = await request.json()
+        if isinstance(body, dict):
+            email = str(body.get("email") or "")
+    except ValueError:
+        pass
+    return f"{email.lower()}:{client_ip(request)}"
+
+
+def retry_after_header(result: RateLimitResult) -> str:
+    return str(max(1, math.ceil(result.retry_after)))
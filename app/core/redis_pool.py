@@ -0,0 +1,104 @@
+"""
+Shared Redis connection pool.
+
+Each worker owns one blocking connection pool, opened in the application
+lifespan and shared by every Redis user: the ``get_redis`` dependency, the
+rate limiter, revocation checks and the cache invalidation listeners. When
+all connections are busy callers wait up to REDIS_POOL_TIMEOUT seconds for one
+instead of opening new sockets without bound.
+
+Long-running pub/sub listeners hold one pool connection each for as long as
+they are subscribed; size the pool with that in mind.
+
+Settings:
+    REDIS_MAX_CONNECTIONS: Connections per worker (default: 50)
+    REDIS_POOL_TIMEOUT: Seconds to wait for a free connection (default: 5)
+    REDIS_SOCKET_TIMEOUT: Seconds to wait for a reply (default: 5)
+    REDIS_SOCKET_CONNECT_TIMEOUT: Seconds to wait for a TCP connect (default: 2)
+    REDIS_HEALTH_CHECK_INTERVAL: Idle seconds before a connection is PINGed on checkout (default: 30)
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.metrics import register_stats
+from app.helpers.getters import getRedisUrl
+
+logger = logging.getLogger(__name__)
+
+REDIS_MAX_CONNECTIONS = int(getattr(settings, "REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT = float(getattr(settings, "REDIS_POOL_TIMEOUT", 5))
+REDIS_SOCKET_TIMEOUT = float(getattr(settings, "REDIS_SOCKET_TIMEOUT", 5))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(getattr(settings, "REDIS_SOCKET_CONNECT_TIMEOUT", 2))
+REDIS_HEALTH_CHECK_INTERVAL = int(getattr(settings, "REDIS_HEALTH_CHECK_INTERVAL", 30))
+
+_pool: Optional[aioredis.BlockingConnectionPool] = None
+_client: Optional[aioredis.Redis] = None
+
+
+def create_redis_pool(url: Optional[str] = None) -> aioredis.BlockingConnectionPool:
+    return aioredis.BlockingConnectionPool.from_url(
+        url or getRedisUrl(),
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    )
+
+
+def get_redis_client() -> aioredis.Redis:
+    """
+    Return the worker's shared Redis client.
+
+    The pool is normally opened by the lifespan; outside the app (scripts,
+    Celery tasks) it is created on first use. Connections are opened lazily.
+    """
+    global _pool, _client
+    if _client is None:
+        _pool = create_redis_pool()
+        _client = aioredis.Redis(connection_pool=_pool)
+    return _client
+
+
+async def init_redis() -> aioredis.Redis:
+    """Open the shared pool and check connectivity (startup)."""
+    client = get_redis_client()
+    try:
+        await client.ping()
+    except Exception as e:
+        # Redis-backed features degrade on their own; do not block startup
+        logger.warning(f"Redis not reachable at startup: {e}")
+    return client
+
+
+async def close_redis() -> None:
+    """Close the shared client and every pooled connection (shutdown)."""
+    global _pool, _client
+    if _client is not None:
+        await _client.aclose()
+    if _pool is not None:
+        await _pool.disconnect()
+    _pool = None
+    _client = None
+
+
+def pool_stats() -> Dict[str, Any]:
+    if _pool is None:
+        return {"initialized": False}
+    available = len(_pool._available_connections)
+    in_use = len(_pool._in_use_connections)
+    return {
+        "initialized": True,
+        "max_connections": _pool.max_connections,
+        "created": available + in_use,
+        "in_use": in_use,
+        "idle": available,
+        "timeout": _pool.timeout,
+    }
+
+
+register_stats("redis_pool", pool_stats)
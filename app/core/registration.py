@@ -0,0 +1,146 @@
+"""
+Single-statement user registration.
+
+A new user and their personal team reference each other (users.current_team_id
+and teams.user_id), which used to take an INSERT + flush per row and a
+follow-up UPDATE. Here both ids are drawn from their sequences up front and
+the two rows are inserted by data-modifying CTEs of one statement:
+
+    WITH ids AS (SELECT nextval(users seq) AS user_id, nextval(teams seq) AS team_id),
+         new_team AS (INSERT INTO teams ... SELECT ... FROM ids),
+         new_user AS (INSERT INTO users ... SELECT ... FROM ids RETURNING id, token_version)
+    SELECT id, token_version FROM new_user
+
+PostgreSQL checks the (non-deferred) foreign keys at the end of the statement,
+so the cycle is fine. Duplicate emails are caught by the unique index on
+users.email instead of a SELECT beforehand.
+
+build_bulk_register_statement is the multi-row variant used by the bulk
+import: rows come in as one VALUES list, existing emails are skipped with
+ON CONFLICT DO NOTHING, and only the users actually inserted get a team (and
+an organization membership).
+"""
+
+from datetime import datetime, timezone
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import Integer, Select, String, column, func, insert, literal, select, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.organization_member import OrganizationMember
+from app.models.team import Team
+from app.models.user import User
+
+UNIQUE_VIOLATION = "23505"
+
+
+class RegisteredUser(NamedTuple):
+    id: int
+    token_version: int
+
+
+class BulkRow(NamedTuple):
+    """One user of a bulk import; ``line`` identifies it in the source file."""
+    line: int
+    name: str
+    email: str
+    password_hash: str
+    role: str = "member"
+
+
+def personal_team_name(user_name: str) -> str:
+    return f"Time de {user_name}"
+
+
+def build_register_statement(name: str, email: str, password_hash: str) -> Select:
+    """INSERT the user and their personal team, returning (id, token_version)."""
+    now = datetime.now(timezone.utc)
+    ids = select(
+        func.nextval(func.pg_get_serial_sequence(User.__tablename__, "id")).label("user_id"),
+        func.nextval(func.pg_get_serial_sequence(Team.__tablename__, "id")).label("team_id"),
+    ).cte("ids")
+
+    new_team = insert(Team).from_select(
+        ["id", "name", "user_id", "personal_team", "created_at", "updated_at"],
+        select(ids.c.team_id, literal(personal_team_name(name)), ids.c.user_id,
+               literal(True), literal(now), literal(now)),
+    ).cte("new_team")
+
+    new_user = insert(User).from_select(
+        ["id", "name", "email", "password", "current_team_id", "created_at", "updated_at"],
+        select(ids.c.user_id, literal(name), literal(email), literal(password_hash),
+               ids.c.team_id, literal(now), literal(now)),
+    ).returning(User.id, User.token_version).cte("new_user")
+
+    return select(new_user.c.id, new_user.c.token_version).add_cte(new_team)
+
+
+def build_bulk_register_statement(rows: Iterable[BulkRow],
+                                  organization_id: Optional[int] = None) -> Select:
+    """
+    INSERT many users with their personal teams; returns the ``line`` of every row inserted.
+
+    Rows whose email already exists are skipped. With organization_id, each
+    inserted user also becomes an active member of it with the row's role.
+    """
+    now = datetime.now(timezone.utc)
+    data = values(
+        column("line", Integer), column("name", String), column("email", String),
+        column("password", String), column("team_name", String), column("role", String),
+        name="rows",
+    ).data([
+        (row.line, row.name, row.email, row.password_hash, personal_team_name(row.name), row.role)
+        for row in rows
+    ])
+    ids = select(
+        data,
+        func.nextval(func.pg_get_serial_sequence(User.__tablename__, "id")).label("user_id"),
+        func.nextval(func.pg_get_serial_sequence(Team.__tablename__, "id")).label("team_id"),
+    ).cte("ids")
+
+    new_user = pg_insert(User).from_select(
+        ["id", "name", "email", "password", "current_team_id", "created_at", "updated_at"],
+        select(ids.c.user_id, ids.c.name, ids.c.email, ids.c.password,
+               ids.c.team_id, literal(now), literal(now)),
+    ).on_conflict_do_nothing(index_elements=["email"]).returning(User.id).cte("new_user")
+    inserted = select(ids).join_from(ids, new_user, new_user.c.id == ids.c.user_id).cte("inserted")
+
+    new_team = insert(Team).from_select(
+        ["id", "name", "user_id", "personal_team", "created_at", "updated_at"],
+        select(inserted.c.team_id, inserted.c.team_name, inserted.c.user_id,
+               literal(True), literal(now), literal(now)),
+    ).cte("new_team")
+    ctes = [new_team]
+
+    if organization_id is not None:
+        ctes.append(insert(OrganizationMember).from_select(
+            ["organization_id", "user_id", "role", "status", "joined_at"],
+            select(literal(organization_id), inserted.c.user_id, inserted.c.role,
+                   literal("active"), literal(now)),
+        ).cte("new_member"))
+
+    return select(inserted.c.line).add_cte(*ctes)
+
+
+def is_unique_violation(error: IntegrityError) -> bool:
+    return getattr(error.orig, "pgcode", None) == UNIQUE_VIOLATION
+
+
+async def register_user(db: AsyncSession, name: str, email: str,
+                        password_hash: str) -> Optional[RegisteredUser]:
+    """
+    Create a user with their personal team and commit.
+
+    Returns None (after rolling back) if the email is already registered.
+    """
+    try:
+        row = (await db.execute(build_register_statement(name, email, password_hash))).one()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_unique_violation(e):
+            return None
+        raise
+    return RegisteredUser(id=row.id, token_version=row.token_version)
@@ -0,0 +1,191 @@
+"""
+Access token revocation.
+
+Revoked token ids (the ``jti`` claim) live in Redis as ``revoked:{jti}`` keys
+with a TTL equal to the token's remaining lifetime, indexed in the
+``revoked:index`` sorted set (score = exp) so workers can rebuild their view.
+
+Each worker keeps a Bloom filter of revoked ids. Checking a token is a local
+bit lookup; only probable hits pay a Redis round trip to confirm. Workers
+learn about new revocations through the ``auth:token-revoked`` channel and
+rebuild the filter from the index periodically to drop expired ids.
+
+Until the filter has been loaded from Redis once (startup, or Redis down
+when the worker started), a miss proves nothing, so every token is looked up
+in Redis and rejected if that lookup fails.
+
+Settings:
+    REVOCATION_BLOOM_CAPACITY: Expected revoked tokens alive at once (default: 100000)
+    REVOCATION_BLOOM_ERROR_RATE: Target false positive rate (default: 0.001)
+    REVOCATION_SYNC_INTERVAL: Seconds between full rebuilds (default: 60)
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.core.metrics import register_stats
+from app.core.redis_pool import get_redis_client
+from app.core.claims_cache import token_digest
+from app.helpers.bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY_PREFIX = "revoked:"
+REVOKED_INDEX_KEY = "revoked:index"
+REVOCATION_CHANNEL = "auth:token-revoked"
+
+BLOOM_CAPACITY = int(getattr(settings, "REVOCATION_BLOOM_CAPACITY", 100000))
+BLOOM_ERROR_RATE = float(getattr(settings, "REVOCATION_BLOOM_ERROR_RATE", 0.001))
+SYNC_INTERVAL = float(getattr(settings, "REVOCATION_SYNC_INTERVAL", 60))
+
+
+class RevocationFilter:
+    """Per-worker Bloom filter front for the Redis revocation set."""
+
+    def __init__(self, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity=capacity, error_rate=error_rate)
+        self.last_sync: Optional[float] = None
+        self._added_during_rebuild: Optional[list] = None
+
+        self.checks = 0
+        self.probable_hits = 0
+        self.confirmed = 0
+        self.false_positives = 0
+        self.unloaded_lookups = 0
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the filter has been rebuilt from Redis at least once."""
+        return self.last_sync is not None
+
+    def add(self, jti: str) -> None:
+        self.bloom.add(jti)
+        if self._added_during_rebuild is not None:
+            self._added_during_rebuild.append(jti)
+
+    def might_be_revoked(self, jti: str) -> bool:
+        self.checks += 1
+        if jti in self.bloom:
+            self.probable_hits += 1
+            return True
+        return False
+
+    async def rebuild(self, redis: aioredis.Redis) -> None:
+        """Reload live revoked ids from Redis, pruning expired ones."""
+        now = int(time.time())
+        self._added_during_rebuild = []
+        try:
+            await redis.zremrangebyscore(REVOKED_INDEX_KEY, "-inf", now)
+            members = await redis.zrangebyscore(REVOKED_INDEX_KEY, now, "+inf")
+            bloom = BloomFilter.from_items(
+                (m.decode() if isinstance(m, bytes) else m for m in members),
+                capacity=self.capacity,
+                error_rate=self.error_rate,
+            )
+            # Keep ids revoked locally while Redis was being read
+            for jti in self._added_during_rebuild:
+                bloom.add(jti)
+            self.bloom = bloom
+        finally:
+            self._added_during_rebuild = None
+        self.last_sync = time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.bloom.stats(),
+            "checks": self.checks,
+            "probable_hits": self.probable_hits,
+            "confirmed_revoked": self.confirmed,
+            "false_positives": self.false_positives,
+            "unloaded_lookups": self.unloaded_lookups,
+            "loaded": self.loaded,
+            "last_sync": self.last_sync,
+        }
+
+
+revocation_filter = RevocationFilter()
+register_stats("token_revocation", revocation_filter.stats)
+
+
+def token_id(claims: Dict[str, Any], token: str) -> str:
+    """
+    Return the revocation id of a token.
+
+    Tokens issued before ``jti`` existed fall back to a digest of the token.
+    """
+    jti = claims.get("jti")
+    if jti:
+        return str(jti)
+    return token_digest(token).hex()[:22]
+
+
+async def revoke_token(redis: aioredis.Redis, jti: str, exp: int) -> None:
+    """Mark a token id as revoked until its expiry and notify every worker."""
+    ttl = int(exp) - int(time.time())
+    if ttl <= 0:
+        return
+    revocation_filter.add(jti)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.set(f"{REVOKED_KEY_PREFIX}{jti}", "1", ex=ttl)
+        pipe.zadd(REVOKED_INDEX_KEY, {jti: int(exp)})
+        pipe.publish(REVOCATION_CHANNEL, jti)
+        await pipe.execute()
+
+
+async def is_revoked(redis: aioredis.Redis, jti: str) -> bool:
+    """
+    Check whether a token id has been revoked.
+
+    Bloom misses are answered locally once the filter has been loaded; before
+    that every token is looked up. Probable hits are confirmed in Redis. If
+    Redis is unreachable the token is treated as revoked (fail closed).
+    """
+    probable_hit = revocation_filter.might_be_revoked(jti)
+    if not probable_hit:
+        if revocation_filter.loaded:
+            return False
+        revocation_filter.unloaded_lookups += 1
+    try:
+        revoked = bool(await redis.exists(f"{REVOKED_KEY_PREFIX}{jti}"))
+    except Exception as e:
+        logger.warning(f"Revocation lookup failed for {jti}: {e}; failing closed")
+        return True
+    if revoked:
+        revocation_filter.confirmed += 1
+    elif probable_hit:
+        revocation_filter.false_positives += 1
+    return revoked
+
+
+async def run_revocation_sync(retry_delay: float = 5.0) -> None:
+    """
+    Keep the local filter in sync with Redis until cancelled.
+
+    Rebuilds on (re)connect and every REVOCATION_SYNC_INTERVAL seconds, and
+    adds ids announced on the revocation channel in between.
+    """
+    while True:
+        redis = get_redis_client()
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                await revocation_filter.rebuild(redis)
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message.get("type") == "message":
+                        data = message["data"]
+                        revocation_filter.add(data.decode() if isinstance(data, bytes) else str(data))
+                    if time.time() - (revocation_filter.last_sync or 0) >= SYNC_INTERVAL:
+                        await revocation_filter.rebuild(redis)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Revocation sync error: {e}; retrying in {retry_delay}s")
+            await asyncio.sleep(retry_delay)
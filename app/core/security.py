@@ -5,15 +5,21 @@ from jose import jwt
 import bcrypt
 import pyotp
 from app.core.config import settings
+from app.core.jwt_keys import key_ring
 
 SECRET_KEY = settings.KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 99999
+# /me only reissues a token once the current one is this close to expiring
+ACCESS_TOKEN_REFRESH_WINDOW_MINUTES = int(getattr(settings, "ACCESS_TOKEN_REFRESH_WINDOW_MINUTES", 1440))
 
 RESET_SESSION_EXPIRE_MINUTES = 15       # short-lived session for changing password
 OTP_TTL_MINUTES = 10
 OTP_LENGTH = 6
 
+# bcrypt work factor for new hashes; may be recalibrated at startup (app.core.hashing)
+BCRYPT_ROUNDS = int(getattr(settings, "BCRYPT_ROUNDS", 12))
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     password_bytes = plain_password.encode('utf-8')
@@ -21,15 +27,35 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         hashed_password = hashed_password.encode('utf-8')
     return bcrypt.checkpw(password_bytes, hashed_password)
 
-def get_password_hash(password: str) -> str:
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+def get_password_hash(password: str, rounds: int | None = None) -> str:
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS))
     return hashed.decode('utf-8')
 
+def get_hash_rounds(hashed_password: str) -> int | None:
+    # bcrypt hashes look like $2b$12$<salt+hash>
+    try:
+        return int(hashed_password.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def generate_token_id() -> str:
+    # 72 random bits, 12 url-safe chars: compact revocation key
+    return secrets.token_urlsafe(9)
+
 def create_access_token(data: dict, token_version: int, expires_delta: timedelta | None = None):
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "tv": token_version})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"exp": expire, "iat": now, "tv": token_version, "jti": generate_token_id()})
+    # HS256 with SECRET_KEY unless JWT_ALGORITHM selects asymmetric keys
+    return key_ring.sign(to_encode)
+
+def token_needs_refresh(claims: dict, window_minutes: int = ACCESS_TOKEN_REFRESH_WINDOW_MINUTES) -> bool:
+    exp = claims.get("exp")
+    if exp is None:
+        return True
+    remaining = float(exp) - datetime.now(timezone.utc).timestamp()
+    return remaining <= window_minutes * 60
 
 def generate_otp() -> str:
     return "".join(secrets.choice(string.digits) for _ in range(OTP_LENGTH))
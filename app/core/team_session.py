@@ -0,0 +1,180 @@
+"""
+Team session tokens.
+
+A team session token is a short-lived access token issued when a user switches
+to a team. Besides the usual ``sub``/``tv`` it carries the membership resolved
+at issue time (team_id, role, member type, org_type) plus the team's
+membership version (``mv``). require_permission trusts those claims as long
+as:
+
+- the token_version still matches (principal cache), and
+- the team's membership version still matches ``mv``.
+
+Neither check touches the database on the hot path. Membership versions live
+in Redis (``team:mv:{team_id}``), are cached per worker, and are bumped by
+every write that can change who is in a team or with which role. A bump
+publishes the team id so all workers drop their cached version at once.
+
+Settings:
+    TEAM_SESSION_EXPIRE_MINUTES: Lifetime of team session tokens (default: 15)
+    TEAM_MEMBERSHIP_CACHE_TTL: Seconds a membership version may be served from cache (default: 30)
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+
+import redis.asyncio as aioredis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.jwt_keys import key_ring
+from app.core.metrics import register_stats
+from app.core.permissions import TeamRole, OrganizationType
+from app.core.redis_pool import get_redis_client
+from app.core.security import generate_token_id
+from app.helpers.cache import TTLCache
+from app.models.team_member import TeamMember
+from app.schemas.user import CurrentUser
+
+logger = logging.getLogger(__name__)
+
+TEAM_SCOPE = "team"
+MEMBERSHIP_KEY_PREFIX = "team:mv:"
+MEMBERSHIP_CHANNEL = "team:membership-changed"
+
+TEAM_SESSION_EXPIRE_MINUTES = int(getattr(settings, "TEAM_SESSION_EXPIRE_MINUTES", 15))
+
+membership_versions = TTLCache(
+    maxsize=10000,
+    ttl=float(getattr(settings, "TEAM_MEMBERSHIP_CACHE_TTL", 30))
+)
+register_stats("team_membership_versions", membership_versions.stats)
+
+
+def create_team_session_token(
+    user_id: int,
+    token_version: int,
+    context: Dict[str, Any],
+    membership_version: int,
+    expires_delta: Optional[timedelta] = None
+) -> str:
+    """Sign a team session token for a context from get_team_member_context."""
+    now = datetime.now(timezone.utc)
+    org_type = context.get("org_type")
+    claims = {
+        "sub": str(user_id),
+        "tv": token_version,
+        "scope": TEAM_SCOPE,
+        "team_id": context["team_id"],
+        "role": TeamRole(context["role"]).value,
+        "mt": context["member_type"],
+        "org_type": OrganizationType(org_type).value if org_type else None,
+        "mv": membership_version,
+        "iat": now,
+        "exp": now + (expires_delta or timedelta(minutes=TEAM_SESSION_EXPIRE_MINUTES)),
+        "jti": generate_token_id(),
+    }
+    return key_ring.sign(claims)
+
+
+def context_from_claims(claims: Dict[str, Any], user: CurrentUser) -> Dict[str, Any]:
+    """
+    Build a team member context from team session claims.
+
+    Same shape as get_team_member_context, but ``team`` and ``organization``
+    are not loaded (None); handlers that need the Team row fetch it themselves.
+    """
+    org_type = claims.get("org_type")
+    return {
+        "team_id": int(claims["team_id"]),
+        "team": None,
+        "user": user,
+        "role": TeamRole(claims["role"]),
+        "member_type": claims.get("mt"),
+        "organization": None,
+        "org_type": OrganizationType(org_type) if org_type else None,
+    }
+
+
+async def get_membership_version(redis: aioredis.Redis, team_id: int, use_cache: bool = True) -> Optional[int]:
+    """
+    Current membership version of a team, or None if it cannot be read.
+
+    Callers must treat None as "unknown" and fall back to a database check.
+    Issuers pass use_cache=False so a token never embeds a stale version.
+    """
+    if use_cache:
+        version = membership_versions.get(team_id)
+        if version is not None:
+            return version
+    try:
+        raw = await redis.get(f"{MEMBERSHIP_KEY_PREFIX}{team_id}")
+    except Exception as e:
+        logger.warning(f"Membership version lookup failed for team {team_id}: {e}")
+        return None
+    version = int(raw) if raw is not None else 0
+    membership_versions.set(team_id, version)
+    return version
+
+
+async def bump_membership_version(redis: Optional[aioredis.Redis], team_ids: Iterable[int]) -> None:
+    """
+    Invalidate team session tokens for the given teams in every worker.
+
+    If Redis is unavailable the local entries are still dropped, but other
+    workers may accept old tokens until their cache TTL runs out.
+    """
+    team_ids = list(team_ids)
+    for team_id in team_ids:
+        membership_versions.pop(team_id)
+    if redis is None or not team_ids:
+        return
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for team_id in team_ids:
+                pipe.incr(f"{MEMBERSHIP_KEY_PREFIX}{team_id}")
+                pipe.publish(MEMBERSHIP_CHANNEL, str(team_id))
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to bump membership version for teams {team_ids}: {e}")
+
+
+async def bump_organization_teams(db: AsyncSession, redis: Optional[aioredis.Redis], organization_id: int) -> None:
+    """Bump every team the organization is a member of."""
+    result = await db.execute(
+        select(TeamMember.team_id).filter(
+            TeamMember.member_type == "organization",
+            TeamMember.member_id == organization_id
+        )
+    )
+    await bump_membership_version(redis, result.scalars().all())
+
+
+async def run_membership_listener(retry_delay: float = 5.0) -> None:
+    """
+    Drop cached membership versions announced by other workers until cancelled.
+
+    Clears the whole cache on (re)connect, since messages published while
+    disconnected were lost.
+    """
+    while True:
+        redis = get_redis_client()
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(MEMBERSHIP_CHANNEL)
+                membership_versions.clear()
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        membership_versions.pop(int(message["data"]))
+                    except (TypeError, ValueError):
+                        logger.warning(f"Ignoring malformed membership message: {message['data']!r}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Membership listener error: {e}; retrying in {retry_delay}s")
+            await asyncio.sleep(retry_delay)
@@ -0,0 +1,201 @@
+"""
+Lazily opened request sessions and connection hold metrics.
+
+``get_db`` yields a LazySession: the AsyncSession behind it is only created
+when the endpoint or a dependency first uses it, and (as with any
+AsyncSession) a pool connection is only checked out on the first statement.
+Requests answered from a cache or rejected before touching the database
+(401/403/429) therefore never create a session or take a connection.
+
+A connection stays checked out until the session's transaction ends. For
+read-only requests that used to be the dependency teardown, which FastAPI
+runs after the response has been serialized and sent. Routes built with
+DBSessionRoute close the request's sessions as soon as the endpoint returns,
+before serialization. Objects returned by the endpoint keep their loaded
+attributes (sessions use expire_on_commit=False); uncommitted changes are
+rolled back, as they were at teardown.
+
+Every checkout and checkin of any pool is timed and charged to the endpoint
+that took the connection, labelled "<module>.<function>" (e.g.
+"teams.list_teams"); checkouts outside a request, such as background tasks,
+scripts or pool warm-up, count as "background". Compare
+held_ms_per_request with request_ms_per_request under the
+"db_connection_hold" stats to size DB_POOL_SIZE for the time connections
+are really in use.
+
+Settings:
+    DB_EARLY_RELEASE: Close request sessions when the endpoint returns (default: true)
+"""
+
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+from app.core.config import settings
+from app.core.metrics import register_stats
+
+DB_EARLY_RELEASE = str(getattr(settings, "DB_EARLY_RELEASE", "true")).lower() == "true"
+
+BACKGROUND = "background"
+
+_endpoint: ContextVar[str] = ContextVar("db_endpoint", default=BACKGROUND)
+_request_sessions: ContextVar[Optional[List[Any]]] = ContextVar("db_request_sessions", default=None)
+
+
+class LazySession:
+    """AsyncSession stand-in that creates the real session on first use."""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._session = None
+        hold_stats.sessions_created += 1
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes not defined here, i.e. the AsyncSession API
+        if self._session is None:
+            self._session = self._factory()
+            hold_stats.sessions_opened += 1
+        return getattr(self._session, name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+
+def track_session(session: Any) -> None:
+    """Close ``session`` when the current request's endpoint returns."""
+    sessions = _request_sessions.get()
+    if sessions is not None:
+        sessions.append(session)
+
+
+async def release_sessions() -> None:
+    """Close the sessions tracked for the current request (idempotent)."""
+    sessions = _request_sessions.get()
+    while sessions:
+        await sessions.pop().close()
+
+
+def _release_after(endpoint: Callable) -> Callable:
+    if getattr(endpoint, "releases_db_sessions", False):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            await release_sessions()
+
+    wrapper.releases_db_sessions = True
+    return wrapper
+
+
+class DBSessionRoute(APIRoute):
+    """
+    Route that labels connection use with its endpoint and releases the
+    request's sessions when the endpoint returns.
+
+    Usage:
+        router = APIRouter(route_class=DBSessionRoute)
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # Sync endpoints run in the threadpool and use get_db_sync; leave them alone
+        if DB_EARLY_RELEASE and inspect.iscoroutinefunction(endpoint):
+            endpoint = _release_after(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        # Routers are included lazily, so the prefixed path is not known here
+        label = f"{self.endpoint.__module__.rsplit('.', 1)[-1]}.{self.name}"
+
+        async def labelled_handler(request):
+            endpoint_token = _endpoint.set(label)
+            sessions_token = _request_sessions.set([])
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                # Also covers dependencies that used the database and then raised
+                await release_sessions()
+                hold_stats.record_request(label, (time.perf_counter() - start) * 1000)
+                _request_sessions.reset(sessions_token)
+                _endpoint.reset(endpoint_token)
+
+        return labelled_handler
+
+
+class HoldStats:
+    """Connection hold time per endpoint, from pool checkout to checkin."""
+
+    def __init__(self):
+        self.sessions_created = 0
+        self.sessions_opened = 0
+        self.endpoints: Dict[str, Dict[str, float]] = {}
+
+    def _entry(self, label: str) -> Dict[str, float]:
+        entry = self.endpoints.get(label)
+        if entry is None:
+            entry = self.endpoints[label] = {
+                "requests": 0, "request_ms": 0.0, "checkouts": 0, "held_ms": 0.0, "held_max_ms": 0.0
+            }
+        return entry
+
+    def record_request(self, label: str, elapsed_ms: float) -> None:
+        entry = self._entry(label)
+        entry["requests"] += 1
+        entry["request_ms"] += elapsed_ms
+
+    def record_hold(self, label: str, held_ms: float) -> None:
+        entry = self._entry(label)
+        entry["checkouts"] += 1
+        entry["held_ms"] += held_ms
+        entry["held_max_ms"] = max(entry["held_max_ms"], held_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        endpoints = {}
+        for label, e in sorted(self.endpoints.items()):
+            requests = e["requests"]
+            endpoints[label] = {
+                "requests": requests,
+                "checkouts": e["checkouts"],
+                "held_ms_per_request": round(e["held_ms"] / requests, 3) if requests else None,
+                "request_ms_per_request": round(e["request_ms"] / requests, 3) if requests else None,
+                "held_ms_per_checkout": round(e["held_ms"] / e["checkouts"], 3) if e["checkouts"] else 0.0,
+                "held_max_ms": round(e["held_max_ms"], 3),
+            }
+        return {
+            "early_release": DB_EARLY_RELEASE,
+            "sessions_created": self.sessions_created,
+            "sessions_opened": self.sessions_opened,
+            "endpoints": endpoints,
+        }
+
+
+hold_stats = HoldStats()
+register_stats("db_connection_hold", hold_stats.stats)
+
+
+@event.listens_for(Pool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["held_since"] = (time.perf_counter(), _endpoint.get())
+
+
+@event.listens_for(Pool, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    held = connection_record.info.pop("held_since", None)
+    if held is not None:
+        started, label = held
+        hold_stats.record_hold(label, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,220 @@
+"""
+Database connection pool tuning and instrumentation.
+
+Both engines (async for requests, sync for scripts and Celery) are built
+with the options below and an instrumented QueuePool that counts checkouts,
+time spent waiting for a connection and pool timeouts. Checked-out, idle
+and overflow connections are read from the pool itself when stats are
+collected.
+
+Pre-ping strategies:
+    always: SQLAlchemy's pool_pre_ping, a round trip on every checkout
+    idle:   ping only connections that sat in the pool longer than
+            DB_PRE_PING_IDLE_SECONDS (the ones a firewall or failover may
+            have dropped); recently used connections go out untouched
+    never:  no pings; dead connections surface as errors and are replaced
+
+Statement caches (async engine):
+    SQLAlchemy keeps up to DB_QUERY_CACHE_SIZE compiled statements per
+    engine; the asyncpg dialect additionally keeps DB_STATEMENT_CACHE_SIZE
+    server-side prepared statements per connection, so a repeated query
+    skips parsing and planning. Size the latter above the number of distinct
+    statements the app runs, or hot ones get evicted by rare ones.
+
+    Behind PgBouncer in transaction mode a connection may land on another
+    server between statements, so prepared statements cannot be reused:
+    DB_PGBOUNCER=true turns both asyncpg caches off and gives each prepared
+    statement a unique name.
+
+Settings:
+    DB_POOL_SIZE: Persistent connections per worker (default: 5)
+    DB_MAX_OVERFLOW: Extra connections under load (default: 10)
+    DB_POOL_RECYCLE: Seconds before a connection is replaced, -1 = never (default: 1800)
+    DB_POOL_TIMEOUT: Seconds to wait for a free connection (default: 30)
+    DB_PRE_PING: always, idle or never (default: idle)
+    DB_PRE_PING_IDLE_SECONDS: Idle time after which "idle" pings (default: 30)
+    DB_POOL_WARMUP: Connections opened at startup, capped at DB_POOL_SIZE (default: DB_POOL_SIZE)
+    DB_STATEMENT_CACHE_SIZE: Prepared statements cached per asyncpg connection, 0 = off (default: 256)
+    DB_QUERY_CACHE_SIZE: Compiled statements cached per engine (default: 500)
+    DB_PGBOUNCER: PgBouncer transaction-mode compatibility (default: false)
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Dict, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PRE_PING_STRATEGIES = ("always", "idle", "never")
+
+DB_POOL_SIZE = int(getattr(settings, "DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(getattr(settings, "DB_MAX_OVERFLOW", 10))
+DB_POOL_RECYCLE = int(getattr(settings, "DB_POOL_RECYCLE", 1800))
+DB_POOL_TIMEOUT = float(getattr(settings, "DB_POOL_TIMEOUT", 30))
+DB_PRE_PING = str(getattr(settings, "DB_PRE_PING", "idle")).lower()
+DB_PRE_PING_IDLE_SECONDS = float(getattr(settings, "DB_PRE_PING_IDLE_SECONDS", 30))
+DB_POOL_WARMUP = int(getattr(settings, "DB_POOL_WARMUP", DB_POOL_SIZE))
+DB_STATEMENT_CACHE_SIZE = int(getattr(settings, "DB_STATEMENT_CACHE_SIZE", 256))
+DB_QUERY_CACHE_SIZE = int(getattr(settings, "DB_QUERY_CACHE_SIZE", 500))
+DB_PGBOUNCER = str(getattr(settings, "DB_PGBOUNCER", "false")).lower() == "true"
+
+if DB_PRE_PING not in PRE_PING_STRATEGIES:
+    raise ValueError(f"DB_PRE_PING must be one of {', '.join(PRE_PING_STRATEGIES)}, got '{DB_PRE_PING}'")
+
+
+class PoolCounters:
+    """Counters shared by a pool and the pools it is recreated into (dispose)."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.pings = 0
+        self.ping_failures = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+
+    def record_wait(self, elapsed_ms: float) -> None:
+        self.checkouts += 1
+        self.wait_total_ms += elapsed_ms
+        if elapsed_ms > self.wait_max_ms:
+            self.wait_max_ms = elapsed_ms
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "pings": self.pings,
+            "ping_failures": self.ping_failures,
+            "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max_ms, 3),
+        }
+
+
+def instrumented_pool_class(base: Type[QueuePool], counters: PoolCounters) -> Type[QueuePool]:
+    """Subclass of base that times every checkout into counters."""
+
+    class InstrumentedPool(base):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                counters.timeouts += 1
+                raise
+            finally:
+                counters.record_wait((time.perf_counter() - start) * 1000)
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+def unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4().hex}__"
+
+
+def asyncpg_connect_args(statement_cache_size: int = DB_STATEMENT_CACHE_SIZE,
+                         pgbouncer: bool = DB_PGBOUNCER) -> Dict[str, Any]:
+    """DBAPI arguments for the asyncpg dialect's statement caches."""
+    if pgbouncer:
+        return {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": unique_statement_name,
+        }
+    return {"prepared_statement_cache_size": statement_cache_size}
+
+
+def engine_options(counters: PoolCounters, is_async: bool) -> Dict[str, Any]:
+    """Keyword arguments for create_engine / create_async_engine."""
+    base = AsyncAdaptedQueuePool if is_async else QueuePool
+    options = {
+        "poolclass": instrumented_pool_class(base, counters),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": DB_PRE_PING == "always",
+        "query_cache_size": DB_QUERY_CACHE_SIZE,
+    }
+    if is_async:
+        options["connect_args"] = asyncpg_connect_args()
+    return options
+
+
+def instrument_engine(engine: Engine, counters: PoolCounters,
+                      pre_ping: str = DB_PRE_PING,
+                      idle_seconds: float = DB_PRE_PING_IDLE_SECONDS) -> None:
+    """Count new connections and install the "idle" pre-ping (for async engines pass sync_engine)."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        counters.connects += 1
+
+    if pre_ping != "idle":
+        return
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.pop("checked_in_at", None)
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        counters.pings += 1
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            counters.ping_failures += 1
+            # The pool discards this connection and retries the checkout with a new one
+            raise exc.DisconnectionError(f"Idle connection failed pre-ping: {e}") from e
+
+
+def pool_stats(pool: Pool, counters: PoolCounters) -> Dict[str, Any]:
+    return {
+        "size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # QueuePool counts overflow from -size while the pool is filling
+        "overflow": max(0, pool.overflow()),
+        "timeout": DB_POOL_TIMEOUT,
+        "pre_ping": DB_PRE_PING,
+        "pgbouncer": DB_PGBOUNCER,
+        **counters.as_dict(),
+    }
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int = DB_POOL_WARMUP) -> int:
+    """
+    Open up to DB_POOL_SIZE connections at once and return them to the pool.
+
+    Failures are logged, not raised: a cold pool only makes first requests slower.
+    """
+    connections = min(connections, DB_POOL_SIZE)
+    if connections <= 0:
+        return 0
+    start = time.perf_counter()
+    results = await asyncio.gather(*(engine.connect().start() for _ in range(connections)), return_exceptions=True)
+    opened = [conn for conn in results if not isinstance(conn, BaseException)]
+    for conn in opened:
+        await conn.close()
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        logger.warning(f"DB pool warm-up: {len(errors)} of {connections} connection(s) failed: {errors[0]}")
+    if opened:
+        logger.info(f"DB pool warmed up with {len(opened)} connection(s) "
+                    f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return len(opened)
@@ -0,0 +1,190 @@
+"""
+Per-request SQL instrumentation.
+
+Every engine's cursor executions are timed through SQLAlchemy engine events
+and charged to the recorder active in the current context:
+QueryStatsMiddleware opens one per HTTP request, ``capture_queries`` one
+around any block of code (tests, scripts). Recorders nest, so a capture
+around a test client call also sees the queries of the request it makes.
+
+Per request this yields the number of statements, the time spent in them
+and the statement shapes (SQL text with placeholders, so the same query
+with different parameters counts as one shape) that ran more than once.
+A shape repeated DB_N_PLUS_ONE_THRESHOLD times or more is logged as a
+probable N+1: a query per row of an earlier result.
+
+Outside production the totals are also returned as response headers:
+    X-DB-Queries:    statements executed
+    X-DB-Time-Ms:    time spent executing them
+    X-DB-Duplicates: extra executions of repeated shapes
+
+Settings:
+    DB_QUERY_HEADERS: Add the X-DB-* headers (default: true when MODE is development or test)
+    DB_N_PLUS_ONE_THRESHOLD: Executions of one shape in a request that get logged (default: 5)
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+# Any MODE other than development/test runs as production (see app/core/config.py)
+NON_PRODUCTION_MODES = ("development", "test")
+DB_QUERY_HEADERS = str(getattr(
+    settings, "DB_QUERY_HEADERS", str(getattr(settings, "MODE", "development")).lower() in NON_PRODUCTION_MODES
+)).lower() == "true"
+DB_N_PLUS_ONE_THRESHOLD = int(getattr(settings, "DB_N_PLUS_ONE_THRESHOLD", 5))
+
+_current: ContextVar[Optional["QueryRecorder"]] = ContextVar("db_query_recorder", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with whitespace collapsed (parameters are already placeholders)."""
+    return " ".join(statement.split())
+
+
+class QueryRecorder:
+    """Statements executed within one request or capture block."""
+
+    def __init__(self, parent: Optional["QueryRecorder"] = None):
+        self.parent = parent
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        shape = statement_shape(statement)
+        recorder = self
+        while recorder is not None:
+            recorder.count += 1
+            recorder.total_ms += elapsed_ms
+            recorder.shapes[shape] += 1
+            recorder = recorder.parent
+
+    @property
+    def duplicates(self) -> int:
+        """Executions beyond the first of every shape."""
+        return self.count - len(self.shapes)
+
+    def repeated(self, threshold: int = 2) -> List[Tuple[str, int]]:
+        """Shapes executed at least ``threshold`` times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        lines = [f"{self.count} statement(s), {self.total_ms:.1f}ms"]
+        lines += [f"  {n}x {shape}" for shape, n in self.shapes.most_common()]
+        return "\n".join(lines)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryRecorder]:
+    """Record the statements executed in this context (including nested requests)."""
+    recorder = QueryRecorder(parent=_current.get())
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recorder = _current.get()
+    starts = conn.info.get("query_start")
+    if recorder is None or not starts:
+        return
+    recorder.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+class QueryStats:
+    """Worker-wide totals of the per-request recorders."""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.total_ms = 0.0
+        self.max_queries = 0
+        self.n_plus_one_requests = 0
+
+    def add(self, recorder: QueryRecorder, n_plus_one: bool) -> None:
+        self.requests += 1
+        self.queries += recorder.count
+        self.total_ms += recorder.total_ms
+        self.max_queries = max(self.max_queries, recorder.count)
+        if n_plus_one:
+            self.n_plus_one_requests += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "queries_per_request": round(self.queries / self.requests, 2) if self.requests else 0.0,
+            "db_ms_per_request": round(self.total_ms / self.requests, 3) if self.requests else 0.0,
+            "max_queries": self.max_queries,
+            "n_plus_one_requests": self.n_plus_one_requests,
+            "n_plus_one_threshold": DB_N_PLUS_ONE_THRESHOLD,
+        }
+
+
+query_stats = QueryStats()
+register_stats("db_queries", query_stats.stats)
+
+
+class QueryStatsMiddleware:
+    """Opens a recorder per HTTP request, adds the X-DB-* headers and logs probable N+1s."""
+
+    def __init__(self, app: ASGIApp, headers: bool = DB_QUERY_HEADERS,
+                 n_plus_one_threshold: int = DB_N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.headers = headers
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with capture_queries() as recorder:
+            async def send_with_headers(message: Message) -> None:
+                if self.headers and message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-db-queries", str(recorder.count).encode()),
+                        (b"x-db-time-ms", f"{recorder.total_ms:.1f}".encode()),
+                        (b"x-db-duplicates", str(recorder.duplicates).encode()),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_headers)
+            finally:
+                suspects = recorder.repeated(self.n_plus_one_threshold)
+                for shape, n in suspects:
+                    logger.warning(
+                        f"Probable N+1 in {scope['method']} {scope['path']}: {n}x {shape[:300]}"
+                    )
+                query_stats.add(recorder, n_plus_one=bool(suspects))
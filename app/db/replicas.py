@@ -0,0 +1,285 @@
+"""
+Read replica routing.
+
+Read-only endpoints take their session from ``get_read_db`` instead of
+``get_db``. When DB_REPLICA_URLS lists one or more replicas, those sessions
+are opened on a replica (round robin); otherwise, and in the cases below,
+they are the request's primary session.
+
+Lag-aware fallback: every DB_REPLICA_CHECK_INTERVAL seconds each replica
+reports its replay lag. A replica is only used while its last check
+succeeded and the lag is at most DB_REPLICA_MAX_LAG seconds; a replica that
+has not been checked yet, cannot be reached or falls behind is skipped until
+a later check clears it. With no usable replica, reads go to the primary.
+
+Read-your-writes: a successful write request (any method other than GET,
+HEAD or OPTIONS answered with a status below 400) pins the client's reads to
+the primary for DB_READ_YOUR_WRITES seconds, so a client never reads a list
+that is missing what it just created. The client is the user of the bearer
+token, or the IP for anonymous requests. Pins are kept locally and in Redis
+(``db:sticky:{client}``) so they hold across workers; if Redis cannot be
+asked, reads go to the primary.
+
+A server that is not in recovery reports zero lag, so two independent
+PostgreSQL instances (the primary and a copy migrated to the same schema)
+are enough to exercise the routing locally.
+
+Settings:
+    DB_REPLICA_URLS: Comma-separated async URLs of read replicas (default: none)
+    DB_REPLICA_MAX_LAG: Seconds of replay lag tolerated on a replica (default: 5)
+    DB_REPLICA_CHECK_INTERVAL: Seconds between lag checks (default: 5)
+    DB_READ_YOUR_WRITES: Seconds a client's reads stay on the primary after a write (default: 10)
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import redis.asyncio as aioredis
+from fastapi import Request
+from jose import JWTError
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.claims_cache import decode_access_token
+from app.core.config import settings
+from app.core.metrics import register_stats
+from app.core.rate_limit import client_ip
+from app.core.redis_pool import get_redis_client
+from app.db.pool import PoolCounters, engine_options, instrument_engine, pool_stats
+from app.helpers.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+STICKY_KEY_PREFIX = "db:sticky:"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+DB_REPLICA_URLS = [url.strip() for url in str(getattr(settings, "DB_REPLICA_URLS", "")).split(",") if url.strip()]
+DB_REPLICA_MAX_LAG = float(getattr(settings, "DB_REPLICA_MAX_LAG", 5))
+DB_REPLICA_CHECK_INTERVAL = float(getattr(settings, "DB_REPLICA_CHECK_INTERVAL", 5))
+DB_READ_YOUR_WRITES = float(getattr(settings, "DB_READ_YOUR_WRITES", 10))
+
+# Zero when everything received has been replayed (an idle primary leaves the
+# last replay timestamp behind), or when the server is not a standby at all.
+# NULL (never replayed anything) counts as unusable.
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+class Replica:
+    """One read replica: its engine, session factory and last known lag."""
+
+    def __init__(self, name: str, engine: Optional[AsyncEngine], session_factory: Callable[[], AsyncSession],
+                 counters: Optional[PoolCounters] = None):
+        self.name = name
+        self.engine = engine
+        self.session_factory = session_factory
+        self.counters = counters or PoolCounters()
+        self.lag: Optional[float] = None
+        self.last_check: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.reads = 0
+        self.check_failures = 0
+
+    @classmethod
+    def from_url(cls, url: str) -> "Replica":
+        counters = PoolCounters()
+        engine = create_async_engine(url, future=True, echo=False, **engine_options(counters, is_async=True))
+        instrument_engine(engine.sync_engine, counters)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        return cls(make_url(url).render_as_string(hide_password=True), engine, session_factory, counters)
+
+    async def measure_lag(self) -> Optional[float]:
+        async with self.session_factory() as db:
+            lag = (await db.execute(LAG_QUERY)).scalar()
+        return None if lag is None else float(lag)
+
+    def usable(self, max_lag: float) -> bool:
+        return self.lag is not None and self.lag <= max_lag
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "lag": self.lag,
+            "last_check": self.last_check,
+            "last_error": self.last_error,
+            "reads": self.reads,
+            "check_failures": self.check_failures,
+        }
+        if self.engine is not None:
+            stats["pool"] = pool_stats(self.engine.sync_engine.pool, self.counters)
+        return stats
+
+
+class ReplicaRouter:
+    """Chooses a replica for each read, or None for the primary."""
+
+    def __init__(self, replicas: List[Replica], max_lag: float = DB_REPLICA_MAX_LAG,
+                 sticky_seconds: float = DB_READ_YOUR_WRITES, clock: Callable[[], float] = time.monotonic):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self._clock = clock
+        self._sticky = TTLCache(maxsize=50000, clock=clock)
+        self._turn = itertools.count()
+
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.sticky_reads = 0
+        self.fallbacks = 0
+        self.writes_marked = 0
+        self.redis_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """Next usable replica in round robin order; None when none is usable."""
+        usable = [replica for replica in self.replicas if replica.usable(self.max_lag)]
+        if not usable:
+            self.fallbacks += 1
+            return None
+        return usable[next(self._turn) % len(usable)]
+
+    async def mark_write(self, redis: aioredis.Redis, client: str) -> None:
+        """Pin this client's reads to the primary for sticky_seconds."""
+        self.writes_marked += 1
+        self._sticky.set(client, True, expires_at=self._clock() + self.sticky_seconds)
+        try:
+            await redis.set(f"{STICKY_KEY_PREFIX}{client}", 1, px=int(self.sticky_seconds * 1000))
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Failed to record write for read-your-writes: {e}")
+
+    async def is_sticky(self, redis: aioredis.Redis, client: str) -> bool:
+        """True if the client wrote recently (or Redis cannot tell)."""
+        if self._sticky.get(client):
+            return True
+        try:
+            return bool(await redis.exists(f"{STICKY_KEY_PREFIX}{client}"))
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Read-your-writes check failed: {e}; reading from the primary")
+            return True
+
+    async def route(self, redis: aioredis.Redis, client: str) -> Optional[Replica]:
+        """Replica to serve this client's read from, or None for the primary."""
+        if not self.enabled:
+            return None
+        replica = None
+        if await self.is_sticky(redis, client):
+            self.sticky_reads += 1
+        else:
+            replica = self.choose()
+        if replica is None:
+            self.primary_reads += 1
+        else:
+            self.replica_reads += 1
+            replica.reads += 1
+        return replica
+
+    def mark_failed(self, replica: Replica, error: Exception) -> None:
+        """Take a replica out of rotation until its next successful lag check."""
+        logger.warning(f"Replica {replica.name} unavailable: {error!r}; reading from the primary")
+        replica.lag = None
+        replica.last_error = repr(error)
+        self.fallbacks += 1
+        self.replica_reads -= 1
+        self.primary_reads += 1
+
+    async def check_lag(self) -> None:
+        """Refresh the lag of every replica; failures make it unusable until the next check."""
+        async def check(replica: Replica) -> None:
+            try:
+                replica.lag = await asyncio.wait_for(replica.measure_lag(), timeout=DB_REPLICA_CHECK_INTERVAL)
+                replica.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                replica.check_failures += 1
+                if replica.last_error is None:
+                    logger.warning(f"Replica {replica.name} lag check failed: {e!r}")
+                replica.lag = None
+                replica.last_error = repr(e)
+            replica.last_check = time.time()
+
+        await asyncio.gather(*(check(replica) for replica in self.replicas))
+
+    def reset_local(self) -> None:
+        self._sticky.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "max_lag": self.max_lag,
+            "sticky_seconds": self.sticky_seconds,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+            "fallbacks": self.fallbacks,
+            "writes_marked": self.writes_marked,
+            "redis_errors": self.redis_errors,
+            "replicas": {replica.name: replica.stats() for replica in self.replicas},
+        }
+
+
+replica_router = ReplicaRouter([Replica.from_url(url) for url in DB_REPLICA_URLS])
+register_stats("db_replicas", replica_router.stats)
+
+
+def client_key(request: Request) -> str:
+    """Identity that read-your-writes pins: the token's user, else the client IP."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            user_id = decode_access_token(token).get("sub")
+        except JWTError:
+            user_id = None
+        if user_id is not None:
+            return f"user:{user_id}"
+    return f"ip:{client_ip(request)}"
+
+
+class ReadYourWritesMiddleware:
+    """Pins the client to the primary once a write request succeeds, before the response goes out."""
+
+    def __init__(self, app: ASGIApp, router: ReplicaRouter = replica_router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not self.router.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marking_writes(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                await self.router.mark_write(get_redis_client(), client_key(Request(scope)))
+            await send(message)
+
+        await self.app(scope, receive, send_marking_writes)
+
+
+async def run_replica_monitor(interval: float = DB_REPLICA_CHECK_INTERVAL) -> None:
+    """Check replica lag until cancelled (no-op without replicas)."""
+    if not replica_router.enabled:
+        return
+    while True:
+        await replica_router.check_lag()
+        await asyncio.sleep(interval)
+
+
+async def dispose_replicas() -> None:
+    for replica in replica_router.replicas:
+        if replica.engine is not None:
+            await replica.engine.dispose()
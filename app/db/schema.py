@@ -0,0 +1,133 @@
+"""
+Schema check at application startup.
+
+Workers used to run ``Base.metadata.create_all`` on import, which needed a
+psycopg2 engine of its own and inspected every table on each cold start.
+Migrations are Alembic's job, so by default a worker now only compares the
+database's ``alembic_version`` with the head revision(s) of migrations/
+(one query, run once per worker in the lifespan; the result is kept for the
+metrics endpoint) and refuses to start when they differ.
+
+Modes:
+    check:  compare alembic_version with the migration head (default)
+    create: create missing tables from the models (throwaway dev databases
+            without migrations); runs on the async engine
+    off:    no check at all
+
+A database that cannot be reached at startup is logged, not fatal: the
+pool reconnects when it comes back, as it would after a restart of
+PostgreSQL.
+
+Settings:
+    DB_SCHEMA_STARTUP: check, create or off (default: check)
+"""
+
+import logging
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_STARTUP_MODES = ("check", "create", "off")
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+DB_SCHEMA_STARTUP = str(getattr(settings, "DB_SCHEMA_STARTUP", "check")).lower()
+
+if DB_SCHEMA_STARTUP not in SCHEMA_STARTUP_MODES:
+    raise ValueError(
+        f"DB_SCHEMA_STARTUP must be one of {', '.join(SCHEMA_STARTUP_MODES)}, got '{DB_SCHEMA_STARTUP}'"
+    )
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is not at the migration head this code was written for."""
+
+
+@lru_cache(maxsize=None)
+def expected_heads(migrations_dir: str = str(MIGRATIONS_DIR)) -> FrozenSet[str]:
+    """Head revision(s) of the migration scripts shipped with this code."""
+    from alembic.script import ScriptDirectory
+
+    return frozenset(ScriptDirectory(migrations_dir).get_heads())
+
+
+async def current_revisions(engine: AsyncEngine) -> FrozenSet[str]:
+    """Revisions recorded in alembic_version; empty if the table does not exist."""
+    async with engine.connect() as conn:
+        try:
+            rows = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except ProgrammingError:
+            return frozenset()
+        return frozenset(row.version_num for row in rows)
+
+
+class SchemaStatus:
+    """Outcome of this worker's startup check."""
+
+    def __init__(self):
+        self.mode: Optional[str] = None
+        self.expected: FrozenSet[str] = frozenset()
+        self.current: FrozenSet[str] = frozenset()
+        self.ok: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "expected": sorted(self.expected),
+            "current": sorted(self.current),
+            "ok": self.ok,
+            "error": self.error,
+            "duration_ms": self.duration_ms,
+        }
+
+
+schema_status = SchemaStatus()
+register_stats("db_schema", schema_status.stats)
+
+
+async def ensure_schema(engine: AsyncEngine, mode: str = DB_SCHEMA_STARTUP,
+                        migrations_dir: str = str(MIGRATIONS_DIR)) -> None:
+    """
+    Run the startup schema step for ``mode``.
+
+    Raises:
+        SchemaOutOfDate: In check mode, if the database is not at the migration head
+    """
+    schema_status.mode = mode
+    if mode == "off":
+        return
+    start = time.perf_counter()
+    try:
+        if mode == "create":
+            from app.db.base import Base
+
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            schema_status.ok = True
+            return
+
+        schema_status.expected = expected_heads(migrations_dir)
+        schema_status.current = await current_revisions(engine)
+        schema_status.ok = schema_status.current == schema_status.expected
+        if not schema_status.ok:
+            schema_status.error = (
+                f"database at {', '.join(sorted(schema_status.current)) or 'no revision'}, "
+                f"code expects {', '.join(sorted(schema_status.expected))}"
+            )
+            raise SchemaOutOfDate(f"Schema out of date ({schema_status.error}); run 'alembic upgrade head'")
+    except (DBAPIError, OSError) as e:
+        schema_status.error = repr(e)
+        logger.warning(f"Schema check could not query the database: {e}")
+    finally:
+        schema_status.duration_ms = round((time.perf_counter() - start) * 1000, 3)
@@ -1,8 +1,13 @@
+from typing import Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import register_stats
+from app.db.pool import PoolCounters, engine_options, instrument_engine, pool_stats
 from app.helpers.getters import isDebugMode
 import logging
 logging.basicConfig(level=logging.INFO)
@@ -15,19 +20,58 @@ POSTGRES_EXTERNAL_URL = settings.POSTGRES_EXTERNAL_URL
 POSTGRES_EXTERNAL_URL_SYNC = settings.POSTGRES_EXTERNAL_URL_SYNC
 
 if isDebugMode():
-    logger.info("Using EXTERNAL database URL for debug mode")
     # PostgreSQL EXTERNAL URL LOCALHOST
-    engine_internal = create_async_engine(POSTGRES_EXTERNAL_URL, future=True, echo=False)
-    SessionAsync = sessionmaker(engine_internal, class_=AsyncSession, expire_on_commit=False)
-    # PostgreSQL EXTERNAL URL LOCALHOST sync
-    engine_internal_sync = create_engine(POSTGRES_EXTERNAL_URL_SYNC, pool_pre_ping=True)
-    SessionSync = sessionmaker(bind=engine_internal_sync, expire_on_commit=False)
+    logger.info("Using EXTERNAL database URL for debug mode")
+    DATABASE_URL, DATABASE_URL_SYNC = POSTGRES_EXTERNAL_URL, POSTGRES_EXTERNAL_URL_SYNC
 else:
-    logger.info("Using INTERNAL database URL for production mode")
     # PostgreSQL internal
-    engine_internal = create_async_engine(POSTGRES_INTERNAL_URL, future=True, echo=False)
-    SessionAsync = sessionmaker(engine_internal, class_=AsyncSession, expire_on_commit=False)
+    logger.info("Using INTERNAL database URL for production mode")
+    DATABASE_URL, DATABASE_URL_SYNC = POSTGRES_INTERNAL_URL, POSTGRES_INTERNAL_URL_SYNC
+
+# Pool sizing, recycling and pre-ping come from settings (see app/db/pool.py)
+async_pool_counters = PoolCounters()
+engine_internal = create_async_engine(
+    DATABASE_URL, future=True, echo=False, **engine_options(async_pool_counters, is_async=True)
+)
+instrument_engine(engine_internal.sync_engine, async_pool_counters)
+SessionAsync = sessionmaker(engine_internal, class_=AsyncSession, expire_on_commit=False)
+
+# The sync (psycopg2) engine only serves scripts, Celery and get_db_sync, so
+# API workers don't build it, or import its driver, unless something asks.
+sync_pool_counters = PoolCounters()
+_engine_sync: Optional[Engine] = None
+_session_sync: Optional[sessionmaker] = None
+
+
+def get_sync_engine() -> Engine:
+    global _engine_sync
+    if _engine_sync is None:
+        _engine_sync = create_engine(DATABASE_URL_SYNC, **engine_options(sync_pool_counters, is_async=False))
+        instrument_engine(_engine_sync, sync_pool_counters)
+    return _engine_sync
+
+
+def get_sync_sessionmaker() -> sessionmaker:
+    global _session_sync
+    if _session_sync is None:
+        _session_sync = sessionmaker(bind=get_sync_engine(), expire_on_commit=False)
+    return _session_sync
+
+
+def __getattr__(name: str):
+    # engine_internal_sync / SessionSync were module attributes before the sync engine became lazy
+    if name == "engine_internal_sync":
+        return get_sync_engine()
+    if name == "SessionSync":
+        return get_sync_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def sync_pool_stats():
+    if _engine_sync is None:
+        return {"initialized": False}
+    return pool_stats(_engine_sync.pool, sync_pool_counters)
+
 
-    # PostgreSQL internal sync
-    engine_internal_sync = create_engine(POSTGRES_INTERNAL_URL_SYNC, pool_pre_ping=True)
-    SessionSync = sessionmaker(bind=engine_internal_sync, expire_on_commit=False)
\ No newline at end of file
+register_stats("db_pool", lambda: pool_stats(engine_internal.sync_engine.pool, async_pool_counters))
+register_stats("db_pool_sync", sync_pool_stats)
@@ -0,0 +1,73 @@
+"""
+Prebuilt statements for the queries run on (nearly) every request.
+
+Building a ``select()`` per call costs tens of microseconds in Python before
+SQLAlchemy can even look the statement up in its compiled cache (the cache
+key is generated from the freshly built construct each time). These are
+built once at import with named bind parameters, so their cache key is
+memoized and every execution goes straight to the compiled form and, on the
+asyncpg side, to the connection's prepared statement (see
+DB_STATEMENT_CACHE_SIZE in app/db/pool.py).
+
+Usage:
+    result = await db.execute(USER_BY_EMAIL, {"email": email})
+
+Statements are immutable; derive variants with ``.where()`` etc. at module
+level, not per request.
+"""
+
+from sqlalchemy import and_, bindparam, select
+
+from app.models.organization import Organization
+from app.models.organization_member import OrganizationMember
+from app.models.team import Team
+from app.models.team_member import TeamMember
+from app.models.user import User
+
+# Columns needed to authenticate and describe the current user
+PRINCIPAL_COLUMNS = (
+    User.id,
+    User.name,
+    User.email,
+    User.current_team_id,
+    User.token_version,
+    User.two_factor_enabled,
+    User.created_at,
+    User.updated_at,
+)
+
+# get_current_user on a principal cache miss; params: user_id
+PRINCIPAL_BY_ID = select(*PRINCIPAL_COLUMNS).where(User.id == bindparam("user_id"))
+
+# Login, forgot-password; params: email
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+# params: user_id
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+# get_team_member_context; params: team_id
+TEAM_BY_ID = select(Team).where(Team.id == bindparam("team_id"))
+
+# Active direct (user) membership; params: team_id, user_id
+DIRECT_TEAM_MEMBERSHIP = select(TeamMember).where(
+    TeamMember.team_id == bindparam("team_id"),
+    TeamMember.member_type == "user",
+    TeamMember.member_id == bindparam("user_id"),
+    TeamMember.status == "active",
+)
+
+# Active membership through an organization the user belongs to; params: team_id, user_id
+ORGANIZATION_TEAM_MEMBERSHIP = (
+    select(TeamMember, Organization)
+    .join(Organization, and_(
+        TeamMember.member_type == "organization",
+        TeamMember.member_id == Organization.id
+    ))
+    .join(OrganizationMember, OrganizationMember.organization_id == Organization.id)
+    .where(
+        TeamMember.team_id == bindparam("team_id"),
+        OrganizationMember.user_id == bindparam("user_id"),
+        TeamMember.status == "active",
+        OrganizationMember.status == "active"
+    )
+)
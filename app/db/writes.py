@@ -0,0 +1,114 @@
+"""
+Single-statement writes: UPDATE ... RETURNING and DELETE ... RETURNING.
+
+Loading a row, changing the ORM object, committing and refreshing it costs
+three round trips, and the row lock taken by the UPDATE is held across them.
+These helpers send one statement that filters, writes and returns the row:
+
+    team = await update_returning(db, Team, [Team.id == team_id], {"name": "Ops"})
+    if team is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    await db.commit()
+
+The returned object is the session's copy of the row with every column as
+written (onupdate columns such as updated_at included), so no refresh is
+needed after the commit. Conditions that used to be checked in Python after
+the SELECT (personal teams, the last admin) go into ``criteria``; when
+nothing matched, the caller can look the row up to tell the cases apart,
+which only costs a round trip on the failure path.
+
+Optimistic concurrency: pass an integer ``version_column`` and it is bumped
+by every write. With ``expected_version`` the write only applies to that
+version; if the row exists at another version, VersionConflict is raised.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import delete, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class VersionConflict(Exception):
+    """Raised when the row exists but no longer has the expected version."""
+
+    def __init__(self, model: Any, expected_version: Any):
+        super().__init__(f"{model.__name__} was modified concurrently (expected version {expected_version})")
+        self.model = model
+        self.expected_version = expected_version
+
+
+def _versioned(criteria: Sequence[Any], version_column: Any, expected_version: Any) -> list:
+    if version_column is not None and expected_version is not None:
+        return [*criteria, version_column == expected_version]
+    return list(criteria)
+
+
+async def _check_version(
+    db: AsyncSession, model: Any, criteria: Sequence[Any], version_column: Any, expected_version: Any
+) -> None:
+    """After a miss: raise VersionConflict if only the version kept the row from matching."""
+    if version_column is None or expected_version is None:
+        return
+    exists = await db.execute(select(literal(1)).select_from(model).where(*criteria).limit(1))
+    if exists.scalar() is not None:
+        raise VersionConflict(model, expected_version)
+
+
+async def update_returning(
+    db: AsyncSession,
+    model: Any,
+    criteria: Sequence[Any],
+    values: Dict[str, Any],
+    version_column: Any = None,
+    expected_version: Any = None,
+) -> Optional[Any]:
+    """
+    UPDATE the rows of ``model`` matching ``criteria`` and return the row.
+
+    Returns None when no row matched. ``criteria`` should identify one row.
+    With nothing to write (an empty PATCH body) and no version column, the
+    row is only read.
+    """
+    values = dict(values)
+    if version_column is not None:
+        values[version_column.key] = version_column + 1
+    elif not values:
+        result = await db.execute(select(model).where(*criteria))
+        return result.scalar_one_or_none()
+
+    result = await db.execute(
+        update(model)
+        .where(*_versioned(criteria, version_column, expected_version))
+        .values(**values)
+        .returning(model)
+        .execution_options(synchronize_session="fetch")
+    )
+    row = result.scalar_one_or_none()
+    if row is None:
+        await _check_version(db, model, criteria, version_column, expected_version)
+    return row
+
+
+async def delete_returning(
+    db: AsyncSession,
+    model: Any,
+    criteria: Sequence[Any],
+    version_column: Any = None,
+    expected_version: Any = None,
+) -> Optional[Any]:
+    """
+    DELETE the row of ``model`` matching ``criteria`` and return it.
+
+    Returns None when no row matched. The deleted object is detached from
+    the session.
+    """
+    result = await db.execute(
+        delete(model)
+        .where(*_versioned(criteria, version_column, expected_version))
+        .returning(model)
+        .execution_options(synchronize_session="fetch")
+    )
+    row = result.scalar_one_or_none()
+    if row is None:
+        await _check_version(db, model, criteria, version_column, expected_version)
+    return row
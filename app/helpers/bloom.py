@@ -0,0 +1,82 @@
+# app/helpers/bloom.py
+"""
+Pure-Python Bloom filter.
+
+Used as an in-process front for sets that live in Redis or Postgres: a miss
+is definitive, a hit only means "probably present" and must be confirmed
+against the source of truth.
+"""
+
+import hashlib
+import math
+from typing import Any, Dict, Iterable, Optional
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter sized from an expected capacity and error rate.
+
+    Uses double hashing over a single BLAKE2b digest to derive k bit positions.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    @classmethod
+    def from_items(cls, items: Iterable[str], capacity: int = 100000,
+                   error_rate: float = 0.001) -> "BloomFilter":
+        bloom = cls(capacity=capacity, error_rate=error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def positions(self, item: str):
+        """Bit positions of item (bit ``p`` is ``1 << (p & 7)`` of byte ``p >> 3``)."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self.positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self.positions(item))
+
+    def estimated_false_positive_rate(self, count: Optional[int] = None) -> float:
+        """Theoretical FPR for the number of inserted items."""
+        n = self.count if count is None else count
+        if n == 0:
+            return 0.0
+        return (1 - math.exp(-self.num_hashes * n / self.num_bits)) ** self.num_hashes
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits)
+
+    def load_bytes(self, data: bytes, count: int) -> None:
+        """Replace the bit array with a serialized one of the same geometry."""
+        if len(data) != len(self._bits):
+            raise ValueError("Serialized filter size does not match")
+        self._bits = bytearray(data)
+        self.count = count
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "items": self.count,
+            "capacity": self.capacity,
+            "num_bits": self.num_bits,
+            "num_hashes": self.num_hashes,
+            "memory_bytes": len(self._bits),
+            "target_fpr": self.error_rate,
+            "estimated_fpr": round(self.estimated_false_positive_rate(), 6),
+        }
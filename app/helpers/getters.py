@@ -2,3 +2,6 @@ from app.core.config import settings
 
 def isDebugMode() -> bool:
     return settings.MODE.lower() == "development"
+
+def getRedisUrl() -> str:
+    return settings.CELERY_BROKER_URL_EXTERNAL if isDebugMode() else settings.CELERY_BROKER_URL
@@ -1,79 +1,160 @@
 # app/helpers/qrcode_generator.py
-import qrcode
+"""
+Geração de QR Codes.
+
+O pacote ``qrcode`` (e o PIL que ele carrega) só é importado na primeira
+geração, não no boot da aplicação. Além do PNG, há uma saída SVG montada em
+Python puro a partir da matriz de módulos, sem rasterização pelo PIL: é mais
+rápida e o tamanho não cresce com box_size. ``render_qr_code`` roda a geração em uma thread para não
+bloquear o event loop.
+"""
+import asyncio
 import io
 import base64
-from typing import Optional
+from typing import List, Optional
+
+_MIME_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def _build_qr(data: str, box_size: int = 10, border: int = 4):
+    """Cria e codifica o QRCode (import tardio do pacote qrcode)."""
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=1,  # Tamanho automático
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def generate_qr_matrix(data: str, border: int = 4) -> List[List[bool]]:
+    """
+    Retorna a matriz de módulos do QR Code (True = módulo escuro), incluindo a borda.
+    """
+    return _build_qr(data, box_size=1, border=border).get_matrix()
+
+
+def generate_qr_code_svg(data: str, box_size: int = 10, border: int = 4) -> str:
+    """
+    Gera o QR Code como SVG, sem passar pelo PIL.
+
+    O desenho usa unidades de módulo no viewBox; o tamanho final em pixels vem
+    de width/height, então o markup não cresce com box_size.
+
+    Returns:
+        Markup SVG
+    """
+    try:
+        matrix = generate_qr_matrix(data, border=border)
+    except Exception as e:
+        print(f"Erro ao gerar QR Code: {str(e)}")
+        raise ValueError("Falha ao gerar QR Code") from e
+
+    # Um traço horizontal de 1 módulo de altura por sequência de módulos
+    # escuros, com movimentos relativos para manter o path curto.
+    size = len(matrix)
+    parts = []
+    cx, cy = 0, 0
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            parts.append(f"m{start - cx} {y - cy}h{x - start}")
+            cx, cy = x, y
+
+    pixels = size * box_size
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="M0 .5{"".join(parts)}" stroke="#000"/></svg>'
+    )
+
+
+def generate_qr_code_png(data: str, box_size: int = 10, border: int = 4) -> bytes:
+    """
+    Gera o QR Code como PNG (via PIL).
+
+    Returns:
+        Bytes da imagem PNG
+    """
+    try:
+        qr = _build_qr(data, box_size=box_size, border=border)
+        img = qr.make_image(fill_color="black", back_color="white")
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        return buffer.getvalue()
+    except Exception as e:
+        # Log do erro em produção
+        print(f"Erro ao gerar QR Code: {str(e)}")
+        raise ValueError("Falha ao gerar QR Code") from e
+
 
 def generate_qr_code_base64(data: str, box_size: int = 10, border: int = 4) -> str:
     """
     Gera um QR Code a partir de uma string e retorna como Base64.
-    
+
     Args:
         data: String a ser codificada no QR Code (ex: otpauth_url)
         box_size: Tamanho de cada "box" do QR Code (padrão: 10)
         border: Tamanho da borda em boxes (padrão: 4)
-    
+
     Returns:
         String Base64 da imagem PNG do QR Code
-    
+
     Example:
         >>> qr_b64 = generate_qr_code_base64("otpauth://totp/...")
         >>> # No frontend: <img src="data:image/png;base64,{qr_b64}" />
     """
-    try:
-        # Cria o QR Code
-        qr = qrcode.QRCode(
-            version=1,  # Tamanho automático
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=box_size,
-            border=border,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
-
-        # Gera a imagem
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        # Converte para Base64
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        img_bytes = buffer.getvalue()
-        img_base64 = base64.b64encode(img_bytes).decode("utf-8")
+    return base64.b64encode(generate_qr_code_png(data, box_size, border)).decode("utf-8")
 
-        return img_base64
 
-    except Exception as e:
-        # Log do erro em produção
-        print(f"Erro ao gerar QR Code: {str(e)}")
-        raise ValueError("Falha ao gerar QR Code") from e
-
-def generate_qr_code_data_url(data: str, box_size: int = 10, border: int = 4) -> str:
+def generate_qr_code_data_url(data: str, box_size: int = 10, border: int = 4, fmt: str = "png") -> str:
     """
     Gera QR Code e retorna como Data URL pronto para usar em <img src="...">
-    
+
+    Args:
+        fmt: "png" ou "svg"
+
     Returns:
         String no formato: "data:image/png;base64,iVBORw0KGgo..."
     """
-    img_base64 = generate_qr_code_base64(data, box_size, border)
-    return f"data:image/png;base64,{img_base64}"
+    if fmt == "svg":
+        payload = generate_qr_code_svg(data, box_size, border).encode("utf-8")
+    elif fmt == "png":
+        payload = generate_qr_code_png(data, box_size, border)
+    else:
+        raise ValueError(f"Formato de QR Code inválido: {fmt}")
+    return f"data:{_MIME_TYPES[fmt]};base64,{base64.b64encode(payload).decode('utf-8')}"
+
+
+async def render_qr_code(data: str, fmt: str = "png", box_size: int = 10, border: int = 4) -> str:
+    """
+    Versão não bloqueante de generate_qr_code_data_url: a geração roda em uma
+    thread do executor padrão.
+    """
+    return await asyncio.to_thread(generate_qr_code_data_url, data, box_size, border, fmt)
+
 
 def generate_qr_for_terminal_api(data: str) -> Optional[str]:
     """
     Gera um QR Code simples para exibir no terminal (ASCII).
     Útil para testes rápidos em ambientes sem GUI.
-    
+
     Returns:
         String ASCII do QR Code ou None se falhar.
     """
     try:
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=1,
-            border=1,
-        )
-        qr.add_data(data)
-        qr.make(fit=True)
+        qr = _build_qr(data, box_size=1, border=1)
         return qr.print_ascii(invert=True)
     except Exception as e:
         print(f"Erro ao gerar QR Code para terminal: {str(e)}")
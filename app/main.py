@@ -1,11 +1,59 @@
-from fastapi import FastAPI
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.endpoints import auth, teams, organizations, logs
-from app.db.session import engine_internal_sync
-from app.db.base import Base
+from fastapi.responses import JSONResponse
+from app.api.endpoints import auth, teams, organizations, logs, metrics, jwks
+from app.db.session import engine_internal
+from app.db.pool import warm_up_pool
+from app.db.replicas import ReadYourWritesMiddleware, dispose_replicas, run_replica_monitor
+from app.db import base  # noqa: F401  (registers every model before the first query)
+from app.db.schema import ensure_schema
+from app.db.query_stats import QueryStatsMiddleware
 from app.core.logging import init_sentry, setup_logging
 from app.middleware.logging import AccessLoggingMiddleware
 from app.helpers.getters import isDebugMode
+from app.core.hashing import hashing_executor, HashingPoolSaturated, calibrate_bcrypt_rounds_shared
+from app.core.principal_cache import run_invalidation_listener
+from app.core.revocation import run_revocation_sync
+from app.core.redis_pool import init_redis, close_redis
+from app.core.team_session import run_membership_listener
+from app.core import bulk_import
+from app.core.email_filter import run_email_filter_sync
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: open the shared Redis pool before anything uses it
+    redis = await init_redis()
+    # Startup: size the bcrypt cost once per deployment (no-op unless BCRYPT_TARGET_MS is set)
+    await calibrate_bcrypt_rounds_shared(redis)
+    # Startup: refuse to serve a database that is not at the migration head (DB_SCHEMA_STARTUP)
+    await ensure_schema(engine_internal)
+    # Startup: pre-fill the DB pool so the first requests after a deploy don't pay for connects
+    await warm_up_pool(engine_internal)
+    # Startup: listen for cross-worker cache invalidations, revocations, membership changes
+    # and new registrations; watch replica lag
+    background_tasks = [
+        asyncio.create_task(run_invalidation_listener()),
+        asyncio.create_task(run_revocation_sync()),
+        asyncio.create_task(run_membership_listener()),
+        asyncio.create_task(run_email_filter_sync()),
+        asyncio.create_task(run_replica_monitor()),
+    ]
+    yield
+    # Shutdown: stop background tasks and release worker pools
+    for task in background_tasks:
+        task.cancel()
+    for task in background_tasks:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    await bulk_import.shutdown()
+    hashing_executor.shutdown()
+    await dispose_replicas()
+    await close_redis()
+
 
 app = FastAPI(
     title="API Applicativo - Multi-Tenant System",
@@ -48,19 +96,14 @@ Esta API suporta:
 ### Endpoints protegidos:
 Endpoints que requerem autenticação terão um ícone de cadeado 🔒
     """,
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # Initialize logging and error tracking
 setup_logging()
 init_sentry()
 
-# Only create tables automatically in non-test mode
-# In test mode, we use Alembic migrations for better control
-import os
-if os.getenv("MODE") != "test":
-    Base.metadata.create_all(bind=engine_internal_sync)
-
 origins = [
     "*"
 ]
@@ -71,8 +114,12 @@ app.add_middleware(
     allow_credentials=True,        # Permite o envio de cookies e credenciais
     allow_methods=["*"],           # Permite todos os métodos (GET, POST, etc.)
     allow_headers=["*"],           # Permite todos os cabeçalhos
+    expose_headers=["X-Next-Cursor"],  # Cursor da próxima página nas listagens
 )
 
+# Count SQL statements per request: X-DB-* headers outside production, N+1 warnings in the log
+app.add_middleware(QueryStatsMiddleware)
+
 # Add access logging middleware (unless in debug mode, can be disabled)
 if not isDebugMode():
     app.add_middleware(AccessLoggingMiddleware, enabled=True)
@@ -80,11 +127,26 @@ else:
     # In debug mode, logging is optional
     app.add_middleware(AccessLoggingMiddleware, enabled=False)
 
+# Pin clients to the primary after their writes (no-op without read replicas)
+app.add_middleware(ReadYourWritesMiddleware)
+
 
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(teams.router, prefix="/api/teams", tags=["teams"])
 app.include_router(organizations.router, prefix="/api/organizations", tags=["organizations"])
 app.include_router(logs.router, prefix="/api/logs", tags=["logs"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
+app.include_router(jwks.router, prefix="/.well-known", tags=["auth"])
+
+
+@app.exception_handler(HashingPoolSaturated)
+async def hashing_pool_saturated_handler(request: Request, exc: HashingPoolSaturated):
+    # Fail fast instead of queueing bcrypt work behind a login burst
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server busy, try again shortly"},
+        headers={"Retry-After": "1"}
+    )
 
 @app.get("/")
 def root():
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, BigInteger, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, BigInteger, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -40,12 +40,19 @@ class APIAccessLog(Base):
     response_size = Column(Integer, nullable=True)  # Response size in bytes
 
     # Timestamp
-    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     # Relationships
     user = relationship("User", foreign_keys=[user_id])
     organization = relationship("Organization", foreign_keys=[organization_id])
     team = relationship("Team", foreign_keys=[team_id])
 
+    # Indexes matched to query shapes (migration 9d4e1f6a2b73)
+    __table_args__ = (
+        # Cursor pagination (created_at, id) and time-window analytics; status_code
+        # is included so error counts and per-status totals are index-only scans
+        Index("ix_api_access_logs_created_at_id", "created_at", "id", postgresql_include=["status_code"]),
+    )
+
     def __repr__(self):
         return f"<APIAccessLog(id={self.id}, endpoint='{self.endpoint}', method='{self.method}', status={self.status_code})>"
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, BigInteger, Boolean, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, BigInteger, Boolean, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -41,11 +41,17 @@ class ErrorLog(Base):
     resolved_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
 
     # Timestamp
-    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     # Relationships
     user = relationship("User", foreign_keys=[user_id])
     resolver = relationship("User", foreign_keys=[resolved_by])
 
+    # Indexes matched to query shapes (migration 9d4e1f6a2b73)
+    __table_args__ = (
+        # Cursor pagination, most recent first
+        Index("ix_error_logs_created_at_id", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<ErrorLog(id={self.id}, type='{self.error_type}', severity='{self.severity}', resolved={self.resolved})>"
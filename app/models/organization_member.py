@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -13,7 +13,7 @@ class OrganizationMember(Base):
     __tablename__ = "organization_members"
 
     id = Column(Integer, primary_key=True, index=True)
-    organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     role = Column(String(20), nullable=False, default="member")  # 'admin', 'member'
     joined_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -26,6 +26,12 @@ class OrganizationMember(Base):
     # Constraints
     __table_args__ = (
         UniqueConstraint('organization_id', 'user_id', name='uq_organization_user'),
+        # Indexes matched to query shapes (migration 9d4e1f6a2b73)
+        # list_organization_members: an organization's members paginated by id
+        Index('ix_organization_members_organization_id_id', 'organization_id', 'id'),
+        # The user's active organizations (list_organizations, organization team membership)
+        Index('ix_organization_members_user_active', 'user_id', 'organization_id',
+              postgresql_where=text("status = 'active'")),
     )
 
     def __repr__(self):
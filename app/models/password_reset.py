@@ -1,5 +1,5 @@
 # app/models/password_reset.py
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone, timedelta
 from app.db.base import Base
@@ -10,7 +10,7 @@ class PasswordReset(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)
     email = Column(String(100), index=True, nullable=False)
-    otp_hash = Column(String(255), nullable=True)  # bcrypt of 6-digit OTP
+    otp_hash = Column(String(255), nullable=True)  # legacy: OTPs now live in Redis (app.core.otp_store)
     otp_expires_at = Column(DateTime(timezone=True), nullable=True)
     otp_verified = Column(Boolean, default=False, nullable=False)
 
@@ -25,3 +25,10 @@ class PasswordReset(Base):
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     user = relationship("User")
+
+    # Indexes matched to query shapes (migration 9d4e1f6a2b73)
+    __table_args__ = (
+        # forgot_password_confirm: the user's latest unconsumed reset
+        Index("ix_password_resets_user_open", "user_id", text("id DESC"),
+              postgresql_where=text("consumed_at IS NULL")),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Text, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.db.base import Base
@@ -6,7 +6,7 @@ from app.db.base import Base
 class Team(Base):
     __tablename__ = "teams"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     name = Column(String(50), index=True)
     description = Column(Text, nullable=True)  # New: Team description
     personal_team = Column(Boolean, default=False)
@@ -18,3 +18,9 @@ class Team(Base):
     # Relationships
     owner = relationship("User", foreign_keys=[user_id], back_populates="teams")
     members = relationship("TeamMember", back_populates="team", cascade="all, delete-orphan")  # New: Multi-user support
+
+    # Indexes matched to query shapes (migration 9d4e1f6a2b73)
+    __table_args__ = (
+        # list_teams: the owner's non-archived teams, paginated by id
+        Index("ix_teams_user_id_active", "user_id", "id", postgresql_where=text("archived = false")),
+    )
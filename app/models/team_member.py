@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -17,11 +17,11 @@ class TeamMember(Base):
     __tablename__ = "team_members"
 
     id = Column(Integer, primary_key=True, index=True)
-    team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), nullable=False, index=True)
+    team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), nullable=False)
 
     # Polymorphic fields
-    member_type = Column(String(20), nullable=False, index=True)  # 'user' or 'organization'
-    member_id = Column(Integer, nullable=False, index=True)  # Polymorphic FK
+    member_type = Column(String(20), nullable=False)  # 'user' or 'organization'
+    member_id = Column(Integer, nullable=False)  # Polymorphic FK
 
     # Role and status
     role = Column(String(20), nullable=False)  # 'admin', 'member', 'viewer'
@@ -41,6 +41,11 @@ class TeamMember(Base):
     # Constraints
     __table_args__ = (
         UniqueConstraint('team_id', 'member_type', 'member_id', name='uq_team_member'),
+        # Indexes matched to query shapes (migration 9d4e1f6a2b73)
+        # list_team_members: a team's members paginated by id
+        Index('ix_team_members_team_id_id', 'team_id', 'id'),
+        # Teams an organization belongs to (bump_organization_teams)
+        Index('ix_team_members_member', 'member_type', 'member_id', 'team_id'),
     )
 
     def __repr__(self):
@@ -3,7 +3,7 @@ Pydantic schemas for Organization Members.
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -42,3 +42,24 @@ class OrganizationMemberWithUser(OrganizationMemberOut):
 
     class Config:
         from_attributes = True
+
+
+class MemberImportRowError(BaseModel):
+    """A rejected row of a bulk import"""
+    line: int
+    email: Optional[str] = None
+    error: str
+
+
+class MemberImportJobOut(BaseModel):
+    """Progress of a bulk member import"""
+    job_id: str
+    status: str  # 'queued', 'running', 'done', 'failed'
+    organization_id: int
+    total: int
+    processed: int
+    created: int
+    failed: int
+    error: Optional[str] = None
+    errors: List[MemberImportRowError] = []
+    errors_truncated: bool = False
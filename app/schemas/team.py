@@ -43,3 +43,13 @@ class TeamWithMembers(TeamOut):
 
     class Config:
         from_attributes = True
+
+
+class TeamSessionOut(BaseModel):
+    """Team session token issued on team switch / refresh"""
+    access_token: str
+    token_type: str = "bearer"
+    team_id: int
+    role: str
+    org_type: Optional[str] = None
+    expires_in: int  # seconds
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, EmailStr
 
 class UserBase(BaseModel):
@@ -14,3 +15,23 @@ class UserCreate(BaseModel):
     name: str
     email: EmailStr
     password: str
+
+class CurrentUser(BaseModel):
+    """
+    Authenticated principal returned by get_current_user.
+
+    Holds only the columns the auth path needs so it can be cached per
+    worker; handlers that mutate the user must load the ORM row explicitly.
+    """
+    id: int
+    name: str | None = None
+    email: str
+    current_team_id: int | None = None
+    token_version: int = 1
+    two_factor_enabled: bool = False
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+        frozen = True
@@ -6,6 +6,10 @@ case "$1" in
     exec uvicorn app.main:app \
       --host 0.0.0.0 --port 8000 --workers 2
     ;;
+  migrate)
+    # API workers only check the schema revision; apply migrations before starting them
+    exec alembic upgrade head
+    ;;
   worker)
     exec celery -A app.mycelery.app:celery_app worker \
       --loglevel=info --concurrency=2
@@ -19,7 +23,7 @@ case "$1" in
       --port=5555 --loglevel=info
     ;;
   *)
-    echo "Usage: $0 {api|worker|beat|flower}"
+    echo "Usage: $0 {api|migrate|worker|beat|flower}"
     exit 1
     ;;
 esac
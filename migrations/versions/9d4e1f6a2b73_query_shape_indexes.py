@@ -0,0 +1,80 @@
+"""query_shape_indexes
+
+Composite and partial indexes matched to the endpoint query shapes, replacing
+single-column indexes they make redundant.
+
+Indexes are built with CREATE INDEX CONCURRENTLY so the log and membership
+tables stay writable during the upgrade; that cannot run in a transaction,
+hence the autocommit block.
+
+Revision ID: 9d4e1f6a2b73
+Revises: 5babe8458929
+Create Date: 2026-10-16 10:12:41.208317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4e1f6a2b73'
+down_revision: Union[str, Sequence[str], None] = '5babe8458929'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, options)
+NEW_INDEXES = [
+    # list_teams: owner's teams, archived ones hidden by default
+    ('ix_teams_user_id', 'teams', ['user_id'], {}),
+    ('ix_teams_user_id_active', 'teams', ['user_id', 'id'],
+     {'postgresql_where': sa.text('archived = false')}),
+    # Member listings by team in id (cursor) order; also serves the team_id FK
+    ('ix_team_members_team_id_id', 'team_members', ['team_id', 'id'], {}),
+    # bump_organization_teams: teams an organization belongs to (index-only)
+    ('ix_team_members_member', 'team_members', ['member_type', 'member_id', 'team_id'], {}),
+    # Member listings by organization in id (cursor) order; also serves the FK
+    ('ix_organization_members_organization_id_id', 'organization_members', ['organization_id', 'id'], {}),
+    # list_organizations and ORGANIZATION_TEAM_MEMBERSHIP: the user's active organizations
+    ('ix_organization_members_user_active', 'organization_members', ['user_id', 'organization_id'],
+     {'postgresql_where': sa.text("status = 'active'")}),
+    # forgot_password_confirm: the user's latest unconsumed reset
+    ('ix_password_resets_user_open', 'password_resets', ['user_id', sa.text('id DESC')],
+     {'postgresql_where': sa.text('consumed_at IS NULL')}),
+    # Cursor pagination and time-window analytics; status_code makes error counts index-only
+    ('ix_api_access_logs_created_at_id', 'api_access_logs', ['created_at', 'id'],
+     {'postgresql_include': ['status_code']}),
+    ('ix_error_logs_created_at_id', 'error_logs', ['created_at', 'id'], {}),
+]
+
+# Leading columns of the indexes above
+SUPERSEDED_INDEXES = [
+    ('ix_team_members_team_id', 'team_members', ['team_id']),
+    ('ix_team_members_member_type', 'team_members', ['member_type']),
+    ('ix_team_members_member_id', 'team_members', ['member_id']),
+    ('ix_organization_members_organization_id', 'organization_members', ['organization_id']),
+    ('ix_api_access_logs_created_at', 'api_access_logs', ['created_at']),
+    ('ix_error_logs_created_at', 'error_logs', ['created_at']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in NEW_INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True,
+                            if_not_exists=True, **options)
+        for name, table, _ in SUPERSEDED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in SUPERSEDED_INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True,
+                            if_not_exists=True)
+        for name, table, _, _ in reversed(NEW_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
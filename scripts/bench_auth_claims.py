@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Benchmark: per-request JWT verification cost with and without the claims cache.
+
+Usage:
+    python scripts/bench_auth_claims.py [--iterations 20000] [--tokens 100]
+
+Simulates a steady stream of authenticated requests spread over a pool of
+distinct tokens (as if N users were active) and reports microseconds per
+verification for plain ``jwt.decode`` versus ``decode_access_token``.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("KEY", "benchmark-secret-key")
+
+from jose import jwt  # noqa: E402
+
+from app.core.security import create_access_token, SECRET_KEY, ALGORITHM  # noqa: E402
+from app.core.claims_cache import decode_access_token, claims_cache  # noqa: E402
+
+
+def bench(label: str, fn, tokens, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(tokens[i % len(tokens)])
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / iterations * 1e6
+    print(f"{label:<28} {per_call_us:>10.2f} us/request   ({iterations} requests)")
+    return per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=100, help="Distinct active tokens")
+    args = parser.parse_args()
+
+    tokens = [
+        create_access_token({"sub": str(user_id)}, token_version=1)
+        for user_id in range(1, args.tokens + 1)
+    ]
+
+    claims_cache.clear()
+    baseline = bench("jwt.decode (no cache)", lambda t: jwt.decode(t, SECRET_KEY, algorithms=[ALGORITHM]),
+                     tokens, args.iterations)
+    cached = bench("decode_access_token", decode_access_token, tokens, args.iterations)
+
+    print(f"\nspeedup: {baseline / cached:.1f}x")
+    print(f"cache stats: {claims_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
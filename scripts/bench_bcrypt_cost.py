@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+Benchmark: bcrypt cost/latency table for the current host.
+
+Usage:
+    python scripts/bench_bcrypt_cost.py [--min 10] [--max 15] [--target-ms 250]
+
+Prints the median hash latency per work factor and the cost that startup
+calibration would pick for the given target (see BCRYPT_TARGET_MS).
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("KEY", "benchmark-secret-key")
+
+from app.core.hashing import bcrypt_cost_table, choose_bcrypt_rounds  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min", dest="min_rounds", type=int, default=10)
+    parser.add_argument("--max", dest="max_rounds", type=int, default=15)
+    parser.add_argument("--target-ms", type=float, default=250)
+    args = parser.parse_args()
+
+    table = bcrypt_cost_table(args.min_rounds, args.max_rounds)
+
+    print(f"{'cost':>4}  {'latency':>10}  {'hashes/s/core':>14}")
+    for rounds, latency in table:
+        print(f"{rounds:>4}  {latency:>8.1f}ms  {1000 / latency:>14.1f}")
+
+    chosen = choose_bcrypt_rounds(table, args.target_ms, min_rounds=args.min_rounds)
+    print(f"\nrecommended cost for {args.target_ms:.0f}ms target: {chosen}")
+
+
+if __name__ == "__main__":
+    main()
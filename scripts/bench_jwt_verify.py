@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+Benchmark: access token signature verification cost per algorithm.
+
+Usage:
+    python scripts/bench_jwt_verify.py [--iterations 5000]
+
+Signs one token per algorithm with an in-memory key ring and reports
+microseconds per uncached ``KeyRing.verify`` (what a sibling service pays per
+request when it verifies locally). Raw Ed25519 signature verification is
+listed for reference only: python-jose cannot issue EdDSA tokens.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("KEY", "benchmark-secret-key")
+
+from cryptography.hazmat.primitives.asymmetric import ed25519  # noqa: E402
+from jose import jwk  # noqa: E402
+
+from app.core.jwt_keys import KeyRing  # noqa: E402
+from scripts.generate_jwt_key import generate_private_key, private_pem  # noqa: E402
+
+CLAIMS = {"sub": "42", "tv": 1, "exp": int(time.time()) + 3600, "jti": "bench"}
+
+
+def bench(label: str, fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call_us = (time.perf_counter() - start) / iterations * 1e6
+    print(f"{label:<28} {per_call_us:>10.2f} us/verify")
+    return per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    rings = {"HS256": KeyRing("benchmark-secret-key")}
+    for alg in ("RS256", "ES256"):
+        key = jwk.construct(private_pem(generate_private_key(alg)), alg)
+        rings[alg] = KeyRing("benchmark-secret-key", alg, keys={"k1": key}, active_kid="k1")
+
+    for alg, ring in rings.items():
+        token = ring.sign(CLAIMS)
+        bench(f"{alg} ({len(token)} B token)", lambda: ring.verify(token), args.iterations)
+
+    ed_key = ed25519.Ed25519PrivateKey.generate()
+    message = b"x" * 200
+    signature = ed_key.sign(message)
+    public = ed_key.public_key()
+    bench("Ed25519 (raw signature)", lambda: public.verify(signature, message), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
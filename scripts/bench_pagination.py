@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Benchmark: access log page latency by depth, offset vs cursor.
+
+Usage:
+    python scripts/bench_pagination.py [--rows 200000] [--limit 100] [--repeat 5] [--url postgresql+asyncpg://...]
+
+Inserts ``--rows`` access logs under a marker endpoint (removed afterwards),
+then times fetching the page at several depths the way GET /api/logs/access
+does it: with ``skip`` (OFFSET), and with the cursor of the previous page.
+The cursor timings should stay flat while OFFSET grows with the depth.
+Depths are reached by following cursors first, so the cursor column times
+exactly the query a client paging through would run.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("KEY", "benchmark-secret-key")
+
+from fastapi import Response  # noqa: E402
+from sqlalchemy import delete, insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+
+from app.api.endpoints.logs import ACCESS_LOGS  # noqa: E402
+from app.api.pagination import NEXT_CURSOR_HEADER  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.models.api_access_log import APIAccessLog  # noqa: E402
+
+MARKER = "/bench/pagination"
+
+
+async def seed(db: AsyncSession, rows: int) -> None:
+    start = datetime.now(timezone.utc)
+    batch = 5000
+    for offset in range(0, rows, batch):
+        await db.execute(insert(APIAccessLog), [
+            {
+                "endpoint": MARKER,
+                "method": "GET",
+                "status_code": 200,
+                # A few rows share each timestamp, as under real load
+                "created_at": start - timedelta(milliseconds=i // 3),
+            }
+            for i in range(offset, min(offset + batch, rows))
+        ])
+    await db.commit()
+
+
+async def timed(db: AsyncSession, query, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        (await db.execute(query)).scalars().all()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def bench(url: str, rows: int, limit: int, repeat: int) -> None:
+    engine = create_async_engine(url)
+    base = select(APIAccessLog).where(APIAccessLog.endpoint == MARKER)
+    try:
+        async with AsyncSession(engine) as db:
+            print(f"Inserting {rows} access logs...")
+            await seed(db, rows)
+
+            depths = [d for d in (0, 10, 100, 1000, rows // limit - 1) if d * limit < rows]
+            print(f"{'page':>8} {'offset':>10} {'cursor':>10}   (ms, median of {repeat})")
+            cursor, page = None, 0
+            for depth in sorted(set(depths)):
+                # Follow cursors up to this depth, as a client would
+                while page < depth:
+                    response = Response()
+                    result = await db.execute(ACCESS_LOGS.paginate(base, cursor, 0, limit))
+                    ACCESS_LOGS.page(result.scalars().all(), limit, response)
+                    cursor, page = response.headers[NEXT_CURSOR_HEADER], page + 1
+
+                offset_ms = await timed(db, ACCESS_LOGS.paginate(base, None, depth * limit, limit), repeat)
+                cursor_ms = await timed(db, ACCESS_LOGS.paginate(base, cursor, 0, limit), repeat)
+                print(f"{depth:>8} {offset_ms:>10.2f} {cursor_ms:>10.2f}")
+    finally:
+        async with AsyncSession(engine) as db:
+            await db.execute(delete(APIAccessLog).where(APIAccessLog.endpoint == MARKER))
+            await db.commit()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", default=settings.POSTGRES_INTERNAL_URL)
+    args = parser.parse_args()
+
+    asyncio.run(bench(args.url, args.rows, args.limit, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
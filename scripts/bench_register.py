@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Benchmark: registration round trips and throughput, ORM flow vs single statement.
+
+Usage:
+    python scripts/bench_register.py [--users 500] [--concurrency 20] [--url postgresql+asyncpg://...]
+
+Needs a migrated PostgreSQL database (defaults to POSTGRES_INTERNAL_URL).
+Registers ``--users`` throwaway accounts with each strategy and reports the
+SQL statements sent per registration (counted with a cursor-execute event,
+COMMIT included) and registrations per second. Passwords are hashed once up
+front so bcrypt does not drown out the database cost. Rows created by the
+benchmark are deleted afterwards.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("KEY", "benchmark-secret-key")
+
+from sqlalchemy import delete, event, select, update  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import get_password_hash  # noqa: E402
+from app.core.registration import personal_team_name, register_user  # noqa: E402
+from app.db import base  # noqa: E402,F401  (registers every model)
+from app.models.team import Team  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+async def register_orm(db: AsyncSession, name: str, email: str, password_hash: str) -> None:
+    """The previous flow: pre-check, two flushes, UPDATE, commit, refresh."""
+    result = await db.execute(select(User).filter(User.email == email))
+    if result.scalar_one_or_none():
+        return
+    user = User(name=name, email=email, password=password_hash)
+    db.add(user)
+    await db.flush()
+    team = Team(name=personal_team_name(user.name), user_id=user.id, personal_team=True)
+    db.add(team)
+    await db.flush()
+    user.current_team_id = team.id
+    await db.commit()
+    await db.refresh(user)
+
+
+async def register_cte(db: AsyncSession, name: str, email: str, password_hash: str) -> None:
+    await register_user(db, name, email, password_hash)
+
+
+async def run(label, strategy, session_factory, counter, prefix, users, concurrency, password_hash):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore, session_factory() as db:
+            await strategy(db, f"Bench {i}", f"{prefix}-{label.split()[0]}-{i}@bench.invalid", password_hash)
+
+    counter["n"] = 0
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(users)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<18} {counter['n'] / users:>6.1f} statements/registration"
+          f"   {users / elapsed:>8.1f} registrations/s   ({elapsed * 1000 / users:.2f} ms each)")
+
+
+async def cleanup(session_factory, prefix: str) -> None:
+    async with session_factory() as db:
+        user_ids = select(User.id).where(User.email.like(f"{prefix}-%"))
+        await db.execute(update(User).where(User.id.in_(user_ids)).values(current_team_id=None))
+        await db.execute(delete(Team).where(Team.user_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.email.like(f"{prefix}-%")))
+        await db.commit()
+
+
+async def main_async(args):
+    engine = create_async_engine(args.url, pool_size=args.concurrency, max_overflow=0)
+    counter = {"n": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*_):
+        counter["n"] += 1
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def count_commit(*_):
+        counter["n"] += 1
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    password_hash = get_password_hash("BenchmarkPassword123!")
+    try:
+        for label, strategy in (("orm (previous)", register_orm), ("single statement", register_cte)):
+            await run(label, strategy, session_factory, counter, prefix,
+                      args.users, args.concurrency, password_hash)
+    finally:
+        await cleanup(session_factory, prefix)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--url", default=settings.POSTGRES_INTERNAL_URL)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Benchmark: worker cold start, per schema startup mode.
+
+Usage:
+    python scripts/bench_startup.py [--workers 2] [--modes legacy,check,off]
+
+Starts ``--workers`` fresh interpreters at once per mode (as uvicorn
+--workers does) and reports for each:
+
+    import  time to import app.main
+    ready   time for the lifespan startup to finish (Redis, schema step,
+            pool warm-up, background tasks) after the import
+    total   spawn to ready, as seen from here (interpreter start included)
+
+Modes are the DB_SCHEMA_STARTUP values plus ``legacy``, which reproduces the
+previous behaviour: create_all on a psycopg2 engine at import time. Needs
+the database and Redis configured in the environment (.env).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(mode: str) -> None:
+    """Runs inside each spawned worker; prints one JSON line."""
+    import asyncio
+
+    sys.path.insert(0, ROOT)
+    os.environ["DB_SCHEMA_STARTUP"] = "off" if mode == "legacy" else mode
+
+    start = time.perf_counter()
+    from app.main import app
+    if mode == "legacy":
+        from app.db.base import Base
+        from app.db.session import get_sync_engine
+        Base.metadata.create_all(bind=get_sync_engine())
+    imported = time.perf_counter()
+
+    async def startup():
+        async with app.router.lifespan_context(app):
+            return time.perf_counter()
+
+    ready = asyncio.run(startup())
+    ready_at = time.time()
+
+    from app.db import session
+    print(json.dumps({
+        "import_ms": (imported - start) * 1000,
+        "ready_ms": (ready - imported) * 1000,
+        "ready_at": ready_at,
+        "sync_engine": session._engine_sync is not None,
+    }))
+
+
+def run_mode(mode: str, workers: int) -> list:
+    spawned_at = time.time()
+    procs = [
+        subprocess.Popen([sys.executable, __file__, "--child", mode],
+                         cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(workers)
+    ]
+    results = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        lines = [line for line in out.splitlines() if line.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            results.append({"error": f"exit code {proc.returncode}"})
+            continue
+        result = json.loads(lines[-1])
+        results.append({**result, "total_ms": (result["ready_at"] - spawned_at) * 1000})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--modes", default="legacy,check,off")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    print(f"{'mode':<8} {'worker':>6} {'import':>10} {'ready':>10} {'total':>10}  sync engine")
+    for mode in args.modes.split(","):
+        results = run_mode(mode, args.workers)
+        for i, r in enumerate(results):
+            if "error" in r:
+                print(f"{mode:<8} {i:>6}  failed ({r['error']})")
+                continue
+            print(f"{mode:<8} {i:>6} {r['import_ms']:>8.0f}ms {r['ready_ms']:>8.0f}ms {r['total_ms']:>8.0f}ms"
+                  f"  {'yes' if r['sync_engine'] else 'no'}")
+        ok = [r for r in results if "error" not in r]
+        if ok:
+            print(f"{mode:<8} {'median':>6} {statistics.median(r['import_ms'] for r in ok):>8.0f}ms "
+                  f"{statistics.median(r['ready_ms'] for r in ok):>8.0f}ms "
+                  f"{statistics.median(r['total_ms'] for r in ok):>8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
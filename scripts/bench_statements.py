@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Benchmark: per-query overhead of the hot statements, before and after.
+
+Usage:
+    python scripts/bench_statements.py [--iterations 5000] [--offline] [--url postgresql+asyncpg://...]
+
+Offline (no database): Python time per call to build the statement and
+produce its cache key, i.e. the work SQLAlchemy does before it can reuse a
+compiled statement. "adhoc" builds the select() on every call as the code
+used to; "prebuilt" uses app/db/statements.py.
+
+Online (PostgreSQL at --url, defaults to POSTGRES_INTERNAL_URL): mean
+round trip per query on one connection, for each combination of
+
+    statements     adhoc | prebuilt
+    asyncpg cache  off (as with DB_PGBOUNCER=true) | DB_STATEMENT_CACHE_SIZE
+
+The queries look up ids and emails that do not exist, so results are empty
+and the numbers are dominated by per-statement overhead.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("KEY", "benchmark-secret-key")
+
+from sqlalchemy import and_, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db import base  # noqa: E402,F401  (registers every model)
+from app.db import statements  # noqa: E402
+from app.db.pool import DB_STATEMENT_CACHE_SIZE, asyncpg_connect_args  # noqa: E402
+from app.models.organization import Organization  # noqa: E402
+from app.models.organization_member import OrganizationMember  # noqa: E402
+from app.models.team import Team  # noqa: E402
+from app.models.team_member import TeamMember  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+USER_ID, TEAM_ID, EMAIL = -1, -1, "nobody@bench.invalid"
+
+
+# The queries as they were written inline before (built on every call)
+ADHOC = {
+    "principal by id": lambda: select(*statements.PRINCIPAL_COLUMNS).where(User.id == USER_ID),
+    "user by email": lambda: select(User).filter(User.email == EMAIL),
+    "team by id": lambda: select(Team).filter(Team.id == TEAM_ID),
+    "direct membership": lambda: select(TeamMember).filter(
+        TeamMember.team_id == TEAM_ID,
+        TeamMember.member_type == "user",
+        TeamMember.member_id == USER_ID,
+        TeamMember.status == "active"
+    ),
+    "org membership": lambda: (
+        select(TeamMember, Organization)
+        .join(Organization, and_(
+            TeamMember.member_type == "organization",
+            TeamMember.member_id == Organization.id
+        ))
+        .join(OrganizationMember, OrganizationMember.organization_id == Organization.id)
+        .filter(
+            TeamMember.team_id == TEAM_ID,
+            OrganizationMember.user_id == USER_ID,
+            TeamMember.status == "active",
+            OrganizationMember.status == "active"
+        )
+    ),
+}
+
+PREBUILT = {
+    "principal by id": (statements.PRINCIPAL_BY_ID, {"user_id": USER_ID}),
+    "user by email": (statements.USER_BY_EMAIL, {"email": EMAIL}),
+    "team by id": (statements.TEAM_BY_ID, {"team_id": TEAM_ID}),
+    "direct membership": (statements.DIRECT_TEAM_MEMBERSHIP, {"team_id": TEAM_ID, "user_id": USER_ID}),
+    "org membership": (statements.ORGANIZATION_TEAM_MEMBERSHIP, {"team_id": TEAM_ID, "user_id": USER_ID}),
+}
+
+
+def bench_offline(iterations: int) -> None:
+    print(f"{'query':<20} {'adhoc':>10} {'prebuilt':>10}   (build + cache key, per call)")
+    for name, build in ADHOC.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            build()._generate_cache_key()
+        adhoc_us = (time.perf_counter() - start) / iterations * 1e6
+
+        stmt, _ = PREBUILT[name]
+        start = time.perf_counter()
+        for _ in range(iterations):
+            stmt._generate_cache_key()
+        prebuilt_us = (time.perf_counter() - start) / iterations * 1e6
+        print(f"{name:<20} {adhoc_us:>8.1f}us {prebuilt_us:>8.2f}us")
+
+
+async def time_queries(url: str, connect_args: dict, prebuilt: bool, iterations: int) -> dict:
+    engine = create_async_engine(url, poolclass=NullPool, connect_args=connect_args)
+    timings = {}
+    try:
+        async with AsyncSession(engine) as db:
+            for name in ADHOC:
+                def run():
+                    if prebuilt:
+                        stmt, params = PREBUILT[name]
+                        return db.execute(stmt, params)
+                    return db.execute(ADHOC[name]())
+
+                # Warm up the compiled cache and the prepared statement
+                for _ in range(10):
+                    await run()
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    (await run()).all()
+                timings[name] = (time.perf_counter() - start) / iterations * 1e6
+    finally:
+        await engine.dispose()
+    return timings
+
+
+async def bench_online(url: str, iterations: int) -> None:
+    variants = [
+        ("adhoc, cache off", asyncpg_connect_args(pgbouncer=True), False),
+        (f"adhoc, cache {DB_STATEMENT_CACHE_SIZE}", asyncpg_connect_args(pgbouncer=False), False),
+        ("prebuilt, cache off", asyncpg_connect_args(pgbouncer=True), True),
+        (f"prebuilt, cache {DB_STATEMENT_CACHE_SIZE}", asyncpg_connect_args(pgbouncer=False), True),
+    ]
+    results = {}
+    for label, connect_args, prebuilt in variants:
+        results[label] = await time_queries(url, connect_args, prebuilt, iterations)
+
+    print()
+    print(f"{'query':<20}" + "".join(f"{label:>22}" for label, _, _ in variants) + "   (us per query)")
+    for name in ADHOC:
+        print(f"{name:<20}" + "".join(f"{results[label][name]:>20.0f}us" for label, _, _ in variants))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--offline", action="store_true", help="skip the database benchmark")
+    parser.add_argument("--url", default=settings.POSTGRES_INTERNAL_URL)
+    args = parser.parse_args()
+
+    bench_offline(args.iterations)
+    if not args.offline:
+        asyncio.run(bench_online(args.url, max(1, args.iterations // 5)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Generate a JWT signing key for rotation.
+
+Usage:
+    python scripts/generate_jwt_key.py --alg RS256 --dir keys/jwt [--kid 2026-10]
+
+Writes <kid>.pem (private key, mode 0600) into the key directory. Point
+JWT_KEYS_DIR at that directory and set JWT_ACTIVE_KID to the new kid to start
+signing with it; keep older keys there until their tokens expire.
+"""
+
+import argparse
+import os
+from datetime import datetime, timezone
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+
+def generate_private_key(alg: str):
+    if alg == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if alg == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    raise ValueError(f"Unsupported algorithm: {alg}")
+
+
+def private_pem(key) -> bytes:
+    return key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alg", choices=["RS256", "ES256"], default="RS256")
+    parser.add_argument("--dir", required=True, help="Key directory (JWT_KEYS_DIR)")
+    parser.add_argument("--kid", default=datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S"))
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    path = os.path.join(args.dir, f"{args.kid}.pem")
+    if os.path.exists(path):
+        parser.error(f"{path} already exists")
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(private_pem(generate_private_key(args.alg)))
+    print(f"Wrote {path}\nSet JWT_ALGORITHM={args.alg} JWT_KEYS_DIR={args.dir} JWT_ACTIVE_KID={args.kid}")
+
+
+if __name__ == "__main__":
+    main()
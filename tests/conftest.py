@@ -7,11 +7,14 @@ This module provides base fixtures for all tests:
 - Redis client (in-memory fake)
 - HTTP client with dependency overrides
 - Base data fixtures (user, team, auth_headers)
+- SQL query budget assertion (query_budget)
+- Manually advanced clock (fake_clock)
 """
 
 import os
 import pytest
 import asyncio
+from contextlib import contextmanager
 from typing import AsyncGenerator, Generator
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
@@ -34,6 +37,13 @@ os.environ["SENTRY_DSN"] = ""  # Disable Sentry in tests
 from app.main import app
 from app.api.dependencies import get_db, get_redis
 from app.db.base import Base
+from app.core.principal_cache import principal_cache
+from app.core.claims_cache import claims_cache
+from app.core.rate_limit import rate_limiter
+from app.core.login_guard import login_guard
+from app.core.email_filter import email_filter
+from app.core.team_session import membership_versions
+from app.db.query_stats import capture_queries
 
 # Test database URL
 TEST_DATABASE_URL = os.environ["POSTGRES_INTERNAL_URL"]
@@ -112,7 +122,7 @@ async def redis_client() -> AsyncGenerator[FakeAsyncRedis, None]:
     redis = FakeAsyncRedis()
     yield redis
     await redis.flushall()
-    await redis.close()
+    await redis.aclose()
 
 
 # ==================== FastAPI Client ====================
@@ -138,6 +148,14 @@ async def client(
     app.dependency_overrides[get_db] = override_get_db
     app.dependency_overrides[get_redis] = override_get_redis
 
+    # Per-worker caches must not leak state between tests
+    principal_cache.clear()
+    claims_cache.clear()
+    rate_limiter.reset_local()
+    login_guard.reset_local()
+    email_filter.reset()
+    membership_versions.clear()
+
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
 
@@ -238,6 +256,50 @@ async def organization(db_session: AsyncSession):
 
 # ==================== Helper Fixtures ====================
 
+@pytest.fixture
+def query_budget():
+    """
+    Assert how many SQL statements a block may run.
+
+    Fails with every statement run (and how often) if the block runs more
+    than max_queries statements, or if one statement shape runs more than
+    max_repeats times (an N+1 whose total still fits the budget).
+
+    Usage:
+        with query_budget(3, max_repeats=1):
+            response = await client.get("/api/teams/", headers=auth_headers)
+    """
+    @contextmanager
+    def budget(max_queries: int, max_repeats: int = None):
+        with capture_queries() as queries:
+            yield queries
+        assert queries.count <= max_queries, (
+            f"Query budget of {max_queries} exceeded: {queries.report()}"
+        )
+        if max_repeats is not None:
+            assert not queries.repeated(max_repeats + 1), (
+                f"Statement repeated more than {max_repeats} time(s): {queries.report()}"
+            )
+
+    return budget
+
+
+class FakeClock:
+    """Manually advanced clock for components that take a ``clock`` callable."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock() -> FakeClock:
+    """Clock frozen at t=1000; advance it with ``fake_clock.now += seconds``."""
+    return FakeClock()
+
+
 @pytest.fixture
 def anyio_backend():
     """
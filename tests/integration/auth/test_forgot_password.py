@@ -9,13 +9,14 @@ Tests 3-step process:
 
 import pytest
 from httpx import AsyncClient
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.password_reset import PasswordReset
 from app.models.user import User
-from app.core.security import get_password_hash, generate_otp, hash_otp, verify_password
+from app.core.security import get_password_hash, generate_otp, verify_password
+from app.core.otp_store import issue_otp, otp_digest, KEY_PREFIX
 from tests.factories import UserFactory
 
 
@@ -27,6 +28,7 @@ class TestForgotPasswordStart:
         self,
         client: AsyncClient,
         db_session: AsyncSession,
+        redis_client,
         mocker
     ):
         """Test starting password reset for existing user."""
@@ -48,15 +50,22 @@ class TestForgotPasswordStart:
         data = response.json()
         assert "message" in data
 
-        # Verify PasswordReset created in DB
+        # Verify OTP stored in Redis as an HMAC digest with a TTL
+        otp = mock_task.call_args.args[1]
+        key = f"{KEY_PREFIX}test@example.com"
+        record = await redis_client.hgetall(key)
+        assert record[b"digest"].decode() == otp_digest("test@example.com", otp)
+        assert int(record[b"user_id"]) == user.id
+        assert await redis_client.ttl(key) > 0
+
+        # PasswordReset kept only as an audit record (no OTP hash)
         result = await db_session.execute(
             select(PasswordReset).where(PasswordReset.user_id == user.id)
         )
         pr = result.scalar_one_or_none()
         assert pr is not None
-        assert pr.otp_hash is not None
+        assert pr.otp_hash is None
         assert pr.otp_expires_at > datetime.now(timezone.utc)
-        assert pr.otp_verified is False
 
         # Verify Celery task called
         assert mock_task.called
@@ -124,7 +133,8 @@ class TestForgotPasswordVerify:
     async def test_verify_valid_otp(
         self,
         client: AsyncClient,
-        db_session: AsyncSession
+        db_session: AsyncSession,
+        redis_client
     ):
         """Test verifying correct OTP."""
         user = await UserFactory.create_async(db_session, email="test@example.com")
@@ -132,15 +142,14 @@ class TestForgotPasswordVerify:
 
         # Create PasswordReset with known OTP
         otp = "123456"
-        pr = PasswordReset(
-            user_id=user.id,
+        await issue_otp(
+            redis_client,
             email=user.email,
-            otp_hash=hash_otp(otp),
-            otp_expires_at=datetime.now(timezone.utc) + timedelta(minutes=10),
+            otp=otp,
+            user_id=user.id,
+            token_version=user.token_version,
             require_totp=False
         )
-        db_session.add(pr)
-        await db_session.commit()
 
         response = await client.post(
             "/api/auth/forgot-password/verify",
@@ -152,30 +161,28 @@ class TestForgotPasswordVerify:
         assert "reset_session_token" in data
         assert isinstance(data["reset_session_token"], str)
 
-        # Verify OTP marked as verified
-        await db_session.refresh(pr)
-        assert pr.otp_verified is True
-        assert pr.reset_session_issued_at is not None
+        # OTP is single-use: the record is consumed on success
+        assert await redis_client.exists(f"{KEY_PREFIX}{user.email}") == 0
 
     async def test_verify_invalid_otp(
         self,
         client: AsyncClient,
-        db_session: AsyncSession
+        db_session: AsyncSession,
+        redis_client
     ):
         """Test verifying incorrect OTP."""
         user = await UserFactory.create_async(db_session, email="test@example.com")
         await db_session.commit()
 
         otp = "123456"
-        pr = PasswordReset(
-            user_id=user.id,
+        await issue_otp(
+            redis_client,
             email=user.email,
-            otp_hash=hash_otp(otp),
-            otp_expires_at=datetime.now(timezone.utc) + timedelta(minutes=10),
+            otp=otp,
+            user_id=user.id,
+            token_version=user.token_version,
             require_totp=False
         )
-        db_session.add(pr)
-        await db_session.commit()
 
         response = await client.post(
             "/api/auth/forgot-password/verify",
@@ -188,22 +195,24 @@ class TestForgotPasswordVerify:
     async def test_verify_expired_otp(
         self,
         client: AsyncClient,
-        db_session: AsyncSession
+        db_session: AsyncSession,
+        redis_client
     ):
         """Test verifying expired OTP."""
         user = await UserFactory.create_async(db_session, email="test@example.com")
         await db_session.commit()
 
         otp = "123456"
-        pr = PasswordReset(
-            user_id=user.id,
+        await issue_otp(
+            redis_client,
             email=user.email,
-            otp_hash=hash_otp(otp),
-            otp_expires_at=datetime.now(timezone.utc) - timedelta(minutes=1),  # Expired
+            otp=otp,
+            user_id=user.id,
+            token_version=user.token_version,
             require_totp=False
         )
-        db_session.add(pr)
-        await db_session.commit()
+        # Expire the record (Redis TTL elapsed)
+        await redis_client.delete(f"{KEY_PREFIX}{user.email}")
 
         response = await client.post(
             "/api/auth/forgot-password/verify",
@@ -215,7 +224,8 @@ class TestForgotPasswordVerify:
     async def test_verify_with_2fa_required(
         self,
         client: AsyncClient,
-        db_session: AsyncSession
+        db_session: AsyncSession,
+        redis_client
     ):
         """Test verify when user has 2FA enabled (requires TOTP)."""
         from app.core.security import generate_totp_secret
@@ -232,15 +242,14 @@ class TestForgotPasswordVerify:
         await db_session.commit()
 
         otp = "123456"
-        pr = PasswordReset(
-            user_id=user.id,
+        await issue_otp(
+            redis_client,
             email=user.email,
-            otp_hash=hash_otp(otp),
-            otp_expires_at=datetime.now(timezone.utc) + timedelta(minutes=10),
+            otp=otp,
+            user_id=user.id,
+            token_version=user.token_version,
             require_totp=True
         )
-        db_session.add(pr)
-        await db_session.commit()
 
         # Generate valid TOTP
         totp = pyotp.TOTP(secret)
@@ -261,7 +270,8 @@ class TestForgotPasswordVerify:
     async def test_verify_missing_totp_when_required(
         self,
         client: AsyncClient,
-        db_session: AsyncSession
+        db_session: AsyncSession,
+        redis_client
     ):
         """Test verify without TOTP when 2FA is enabled."""
         user = await UserFactory.create_async(
@@ -272,15 +282,14 @@ class TestForgotPasswordVerify:
         await db_session.commit()
 
         otp = "123456"
-        pr = PasswordReset(
-            user_id=user.id,
+        await issue_otp(
+            redis_client,
             email=user.email,
-            otp_hash=hash_otp(otp),
-            otp_expires_at=datetime.now(timezone.utc) + timedelta(minutes=10),
+            otp=otp,
+            user_id=user.id,
+            token_version=user.token_version,
             require_totp=True
         )
-        db_session.add(pr)
-        await db_session.commit()
 
         response = await client.post(
             "/api/auth/forgot-password/verify",
@@ -292,22 +301,22 @@ class TestForgotPasswordVerify:
     async def test_verify_rate_limiting(
         self,
         client: AsyncClient,
-        db_session: AsyncSession
+        db_session: AsyncSession,
+        redis_client
     ):
         """Test rate limiting on OTP verification (10 requests per 15 min)."""
         user = await UserFactory.create_async(db_session, email="test@example.com")
         await db_session.commit()
 
         otp = "123456"
-        pr = PasswordReset(
-            user_id=user.id,
+        await issue_otp(
+            redis_client,
             email=user.email,
-            otp_hash=hash_otp(otp),
-            otp_expires_at=datetime.now(timezone.utc) + timedelta(minutes=10),
+            otp=otp,
+            user_id=user.id,
+            token_version=user.token_version,
             require_totp=False
         )
-        db_session.add(pr)
-        await db_session.commit()
 
         # Send 10 requests (max allowed)
         for i in range(10):
@@ -497,17 +506,8 @@ class TestForgotPasswordFullFlow:
         )
         assert start_response.status_code == 202
 
-        # Simulate getting OTP from database (in real scenario, from email)
-        result = await db_session.execute(
-            select(PasswordReset).where(PasswordReset.user_id == user.id)
-        )
-        pr = result.scalar_one()
-
-        # For testing, we need to know the OTP
-        # In real scenario, user would receive it via email
-        test_otp = "123456"
-        pr.otp_hash = hash_otp(test_otp)
-        await db_session.commit()
+        # OTP captured from the (mocked) email task
+        test_otp = mock_task.call_args.args[1]
 
         # Step 2: Verify OTP
         verify_response = await client.post(
@@ -250,6 +250,70 @@ class TestMeEndpoint:
         assert response.status_code == 401
 
 
+    async def test_me_returns_etag_and_304(
+        self,
+        client: AsyncClient,
+        user,
+        auth_headers
+    ):
+        """Test that /me answers If-None-Match with 304."""
+        response = await client.get("/api/auth/me", headers=auth_headers)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        cached = await client.get(
+            "/api/auth/me",
+            headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+        assert cached.content == b""
+
+    async def test_me_keeps_token_outside_refresh_window(
+        self,
+        client: AsyncClient,
+        user,
+        auth_headers
+    ):
+        """Test that a long-lived token is returned as-is instead of re-signed."""
+        response = await client.get("/api/auth/me", headers=auth_headers)
+
+        data = response.json()
+        assert data["refreshed"] is False
+        assert data["access_token"] == auth_headers["Authorization"].split(" ", 1)[1]
+
+    async def test_me_refreshes_token_near_expiry(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession
+    ):
+        """Test that a token inside the refresh window is reissued."""
+        from datetime import timedelta
+        from app.core.security import create_access_token
+
+        user = await UserFactory.create_async(db_session)
+        await db_session.commit()
+
+        token = create_access_token(
+            {"sub": str(user.id)},
+            token_version=user.token_version,
+            expires_delta=timedelta(minutes=5)
+        )
+        headers = {"Authorization": f"Bearer {token}"}
+
+        first = await client.get("/api/auth/me", headers=headers)
+        assert first.status_code == 200
+        assert first.json()["refreshed"] is True
+        assert first.json()["access_token"] != token
+
+        # Near-expiry tokens never get a 304: the client needs the new token
+        second = await client.get(
+            "/api/auth/me",
+            headers={**headers, "If-None-Match": first.headers["etag"]}
+        )
+        assert second.status_code == 200
+
+
 @pytest.mark.asyncio
 class TestLogoutEndpoint:
     """Test POST /api/auth/logout endpoint."""
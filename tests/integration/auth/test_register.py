@@ -339,6 +339,8 @@ class TestRegisterEndpoint:
             if not isinstance(r, Exception) and r.status_code == 200
         )
         assert success_count == 1
+        # The unique index rejects the losers with a clean 400, not a 500
+        assert sorted(r.status_code for r in responses) == [200, 400, 400]
 
         # Verify only one user created
         result = await db_session.execute(
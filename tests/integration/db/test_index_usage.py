@@ -0,0 +1,197 @@
+"""
+EXPLAIN checks for the query-shape indexes (migration 9d4e1f6a2b73).
+
+Seeds a few thousand rows inside the test transaction, runs ANALYZE and
+asserts that the plan of each hot query reads the index built for it.
+Sequential scans are disabled for the transaction so the small test tables
+cannot hide a missing index behind a cheap full scan; the planner still
+chooses between the remaining indexes on cost.
+
+Queries:
+- list_teams (owner, non-archived, by id)
+- list_team_members / list_organization_members (by id)
+- bump_organization_teams (teams of an organization)
+- list_organizations (the user's active memberships)
+- forgot_password_confirm (latest unconsumed reset)
+- GET /api/logs/access, GET /api/logs/errors (cursor pages)
+- Access log analytics (error count in a time window)
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.endpoints.logs import ACCESS_LOGS, ERROR_LOGS
+from app.api.endpoints.organizations import ORGANIZATION_MEMBERS
+from app.api.endpoints.teams import TEAMS, TEAM_MEMBERS
+from app.models.api_access_log import APIAccessLog
+from app.models.error_log import ErrorLog
+from app.models.organization_member import OrganizationMember
+from app.models.password_reset import PasswordReset
+from app.models.team import Team
+from app.models.team_member import TeamMember
+
+SEED = [
+    """
+    INSERT INTO users (email, password, two_factor_enabled, token_version)
+    SELECT 'explain-' || g || '@example.com', 'x', false, 1 FROM generate_series(1, 500) g
+    """,
+    """
+    INSERT INTO teams (user_id, name, personal_team, archived)
+    SELECT u.id, 'explain', false, g = 4 FROM users u CROSS JOIN generate_series(1, 4) g
+    WHERE u.email LIKE 'explain-%'
+    """,
+    """
+    INSERT INTO organizations (name, organization_type, archived)
+    SELECT 'explain-' || g, 'client', false FROM generate_series(1, 100) g
+    """,
+    """
+    INSERT INTO team_members (team_id, member_type, member_id, role, status)
+    SELECT t.id, CASE WHEN g = 1 THEN 'organization' ELSE 'user' END, t.user_id + g, 'member',
+           CASE WHEN g = 5 THEN 'inactive' ELSE 'active' END
+    FROM teams t CROSS JOIN generate_series(1, 5) g WHERE t.name = 'explain'
+    """,
+    """
+    INSERT INTO organization_members (organization_id, user_id, role, status)
+    SELECT o.id, u.id, 'member', CASE WHEN (o.id + u.id) % 3 = 0 THEN 'inactive' ELSE 'active' END
+    FROM organizations o JOIN users u ON (o.id + u.id) % 25 = 0
+    WHERE o.name LIKE 'explain-%' AND u.email LIKE 'explain-%'
+    """,
+    """
+    INSERT INTO password_resets (user_id, email, otp_verified, require_totp, totp_verified, attempts, consumed_at)
+    SELECT u.id, u.email, false, false, false, 0, CASE WHEN g < 5 THEN now() END
+    FROM users u CROSS JOIN generate_series(1, 5) g WHERE u.email LIKE 'explain-%'
+    """,
+    """
+    INSERT INTO api_access_logs (endpoint, method, status_code, created_at)
+    SELECT '/api/explain', 'GET', CASE WHEN g % 10 = 0 THEN 500 ELSE 200 END, now() - g * interval '1 second'
+    FROM generate_series(1, 20000) g
+    """,
+    """
+    INSERT INTO error_logs (error_type, error_message, created_at)
+    SELECT 'ExplainError', 'explain', now() - g * interval '1 second' FROM generate_series(1, 5000) g
+    """,
+]
+
+ANALYZED = ["users", "teams", "organizations", "team_members", "organization_members",
+            "password_resets", "api_access_logs", "error_logs"]
+
+
+@pytest.fixture
+async def seeded(db_session: AsyncSession) -> dict:
+    """Seed the tables, refresh their statistics and return ids to query with."""
+    for statement in SEED:
+        await db_session.execute(text(statement))
+    for table in ANALYZED:
+        await db_session.execute(text(f"ANALYZE {table}"))
+    await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+
+    team = (await db_session.execute(
+        select(Team.id, Team.user_id).where(Team.name == "explain").order_by(Team.id).limit(1)
+    )).one()
+    organization_id = (await db_session.execute(
+        select(OrganizationMember.organization_id).where(OrganizationMember.user_id == team.user_id).limit(1)
+    )).scalar_one()
+    return {"team_id": team.id, "user_id": team.user_id, "organization_id": organization_id}
+
+
+async def index_names(db: AsyncSession, query) -> set:
+    """Names of the indexes read by the plan of ``query``."""
+    compiled = query.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    plan = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))).scalar_one()
+
+    names = set()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            names.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    return names
+
+
+def recent_cursor(keyset) -> str:
+    return keyset.encode([datetime.now(timezone.utc) - timedelta(minutes=10), 0])
+
+
+@pytest.mark.asyncio
+class TestIndexUsage:
+    """Test that each hot query shape is served by its index."""
+
+    async def test_list_teams(self, db_session: AsyncSession, seeded):
+        """Test that the owner's non-archived teams come from the partial (user_id, id) index."""
+        query = TEAMS.paginate(
+            select(Team).filter(Team.user_id == seeded["user_id"], Team.archived == False),  # noqa: E712
+            None, 0, 100
+        )
+
+        assert "ix_teams_user_id_active" in await index_names(db_session, query)
+
+    async def test_list_team_members(self, db_session: AsyncSession, seeded):
+        """Test that a team's members are read in id order without a sort."""
+        query = TEAM_MEMBERS.paginate(
+            select(TeamMember).filter(TeamMember.team_id == seeded["team_id"]), TEAM_MEMBERS.encode([0]), 0, 100
+        )
+
+        assert "ix_team_members_team_id_id" in await index_names(db_session, query)
+
+    async def test_organization_teams(self, db_session: AsyncSession, seeded):
+        """Test that the teams of an organization are found by (member_type, member_id)."""
+        query = select(TeamMember.team_id).filter(
+            TeamMember.member_type == "organization",
+            TeamMember.member_id == seeded["organization_id"]
+        )
+
+        assert "ix_team_members_member" in await index_names(db_session, query)
+
+    async def test_list_organization_members(self, db_session: AsyncSession, seeded):
+        """Test that an organization's members are read in id order without a sort."""
+        query = ORGANIZATION_MEMBERS.paginate(
+            select(OrganizationMember).filter(OrganizationMember.organization_id == seeded["organization_id"]),
+            ORGANIZATION_MEMBERS.encode([0]), 0, 100
+        )
+
+        assert "ix_organization_members_organization_id_id" in await index_names(db_session, query)
+
+    async def test_user_active_organizations(self, db_session: AsyncSession, seeded):
+        """Test that the user's active memberships come from the partial (user_id, organization_id) index."""
+        query = select(OrganizationMember.organization_id).filter(
+            OrganizationMember.user_id == seeded["user_id"],
+            OrganizationMember.status == "active"
+        )
+
+        assert "ix_organization_members_user_active" in await index_names(db_session, query)
+
+    async def test_latest_open_password_reset(self, db_session: AsyncSession, seeded):
+        """Test that the latest unconsumed reset is the first entry of the partial index."""
+        query = (
+            select(PasswordReset)
+            .filter(PasswordReset.user_id == seeded["user_id"], PasswordReset.consumed_at.is_(None))
+            .order_by(PasswordReset.id.desc())
+            .limit(1)
+        )
+
+        assert "ix_password_resets_user_open" in await index_names(db_session, query)
+
+    async def test_access_log_page(self, db_session: AsyncSession, seeded):
+        """Test that an access log cursor page is a range scan of (created_at, id)."""
+        query = ACCESS_LOGS.paginate(select(APIAccessLog), recent_cursor(ACCESS_LOGS), 0, 100)
+
+        assert "ix_api_access_logs_created_at_id" in await index_names(db_session, query)
+
+    async def test_access_log_error_count(self, db_session: AsyncSession, seeded):
+        """Test that the analytics error count filters status_code from the index."""
+        query = select(func.count(APIAccessLog.id)).filter(
+            APIAccessLog.created_at >= datetime.now(timezone.utc) - timedelta(minutes=10),
+            APIAccessLog.status_code >= 400
+        )
+
+        assert "ix_api_access_logs_created_at_id" in await index_names(db_session, query)
+
+    async def test_error_log_page(self, db_session: AsyncSession, seeded):
+        """Test that an error log cursor page is a range scan of (created_at, id)."""
+        query = ERROR_LOGS.paginate(select(ErrorLog), recent_cursor(ERROR_LOGS), 0, 100)
+
+        assert "ix_error_logs_created_at_id" in await index_names(db_session, query)
@@ -0,0 +1,95 @@
+"""
+Integration tests for cursor pagination of the log listings.
+
+Tests:
+- GET /api/logs/access?cursor=... - Walk access logs page by page
+- GET /api/logs/errors?cursor=... - Walk error logs page by page
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.api_access_log import APIAccessLog
+from app.models.error_log import ErrorLog
+
+
+async def walk(client: AsyncClient, url: str, headers: dict, params: dict) -> list:
+    """Follow X-Next-Cursor until the last page; return the pages' ids."""
+    pages = []
+    response = await client.get(url, headers=headers, params=params)
+    while True:
+        assert response.status_code == 200
+        pages.append([row["id"] for row in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+        response = await client.get(url, headers=headers, params={**params, "cursor": cursor})
+
+
+@pytest.mark.asyncio
+class TestAccessLogPagination:
+    """Test GET /api/logs/access with cursors."""
+
+    async def test_cursor_walk_matches_offset_order(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        user,
+        auth_headers
+    ):
+        """Test that following cursors returns every log once, newest first, ties broken by id."""
+        now = datetime.now(timezone.utc)
+        for i in range(7):
+            # Pairs share a timestamp, so the id tie-breaker matters
+            db_session.add(APIAccessLog(
+                endpoint=f"/api/pagination-test/{i}",
+                method="GET",
+                status_code=200,
+                created_at=now - timedelta(seconds=i // 2)
+            ))
+        await db_session.commit()
+
+        params = {"endpoint": "/api/pagination-test/", "limit": 3}
+        pages = await walk(client, "/api/logs/access", auth_headers, params)
+
+        assert [len(page) for page in pages] == [3, 3, 1]
+        by_offset = await client.get("/api/logs/access", headers=auth_headers, params={**params, "limit": 10})
+        assert [i for page in pages for i in page] == [row["id"] for row in by_offset.json()]
+        assert "x-next-cursor" not in by_offset.headers
+
+    async def test_invalid_cursor(self, client: AsyncClient, auth_headers):
+        """Test that a tampered cursor is rejected with 400."""
+        response = await client.get("/api/logs/access", headers=auth_headers, params={"cursor": "garbage"})
+
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+class TestErrorLogPagination:
+    """Test GET /api/logs/errors with cursors."""
+
+    async def test_cursor_walk(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        user,
+        auth_headers
+    ):
+        """Test that following cursors returns every error once."""
+        for i in range(5):
+            db_session.add(ErrorLog(
+                error_type="PaginationTestError",
+                error_message=f"error {i}",
+                severity="error"
+            ))
+        await db_session.commit()
+
+        params = {"error_type": "PaginationTestError", "limit": 2}
+        pages = await walk(client, "/api/logs/errors", auth_headers, params)
+
+        ids = [i for page in pages for i in page]
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert len(set(ids)) == 5
@@ -0,0 +1,187 @@
+"""
+Integration tests for bulk member import.
+
+Tests:
+- POST /api/organizations/{org_id}/members/import - Start an import
+- GET /api/organizations/{org_id}/members/import/{job_id} - Poll its progress
+"""
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies import get_session_factory
+from app.core import security
+from app.main import app
+from app.models.organization_member import OrganizationMember
+from app.models.team import Team
+from app.models.user import User
+from tests.factories import UserFactory, OrganizationFactory, OrganizationMemberFactory
+
+
+class _SharedSession:
+    """Session factory handing background jobs the test's transactional session."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self.session
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+async def import_org(client: AsyncClient, db_session: AsyncSession, user, monkeypatch):
+    monkeypatch.setattr(security, "BCRYPT_ROUNDS", 4)
+    app.dependency_overrides[get_session_factory] = lambda: _SharedSession(db_session)
+    org = await OrganizationFactory.create_async(db_session, organization_type="client")
+    await OrganizationMemberFactory.create_async(
+        db_session, organization_id=org.id, user_id=user.id, role="admin"
+    )
+    await db_session.commit()
+    return org
+
+
+async def wait_for_job(client: AsyncClient, url: str, headers) -> dict:
+    for _ in range(200):
+        response = await client.get(url, headers=headers)
+        assert response.status_code == 200
+        job = response.json()
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError("import did not finish")
+
+
+@pytest.mark.asyncio
+class TestMemberImport:
+    """Test bulk member import."""
+
+    async def test_jsonl_import_creates_users_teams_and_members(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        import_org,
+        auth_headers
+    ):
+        """Test that every valid row becomes a user with a personal team and membership."""
+        body = "\n".join([
+            '{"name": "Ana", "email": "ana@import.com", "password": "Password123!"}',
+            '{"name": "Bruno", "email": "bruno@import.com", "password": "Password123!", "role": "admin"}',
+        ])
+        response = await client.post(
+            f"/api/organizations/{import_org.id}/members/import",
+            headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+            content=body
+        )
+
+        assert response.status_code == 202
+        assert response.json()["total"] == 2
+        job = await wait_for_job(client, response.headers["location"], auth_headers)
+
+        assert job["status"] == "done"
+        assert (job["processed"], job["created"], job["failed"]) == (2, 2, 0)
+
+        users = (await db_session.execute(
+            select(User).where(User.email.in_(["ana@import.com", "bruno@import.com"]))
+        )).scalars().all()
+        assert len(users) == 2
+        for created in users:
+            team = await db_session.get(Team, created.current_team_id)
+            assert team.user_id == created.id
+            assert team.personal_team is True
+            assert security.verify_password("Password123!", created.password)
+
+        roles = dict((await db_session.execute(
+            select(OrganizationMember.user_id, OrganizationMember.role).where(
+                OrganizationMember.organization_id == import_org.id,
+                OrganizationMember.user_id.in_([u.id for u in users])
+            )
+        )).all())
+        assert sorted(roles.values()) == ["admin", "member"]
+
+    async def test_csv_import_reports_row_errors(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        import_org,
+        auth_headers
+    ):
+        """Test that invalid, repeated and existing emails are reported by line."""
+        await UserFactory.create_async(db_session, email="taken@import.com")
+        await db_session.commit()
+        body = (
+            "name,email,password\n"
+            "Ana,ana@import.com,Password123!\n"
+            "Bad,not-an-email,Password123!\n"
+            "Ana again,ana@import.com,Password123!\n"
+            "Taken,taken@import.com,Password123!\n"
+        )
+        response = await client.post(
+            f"/api/organizations/{import_org.id}/members/import",
+            headers={**auth_headers, "Content-Type": "text/csv"},
+            content=body
+        )
+
+        assert response.status_code == 202
+        job = await wait_for_job(client, response.headers["location"], auth_headers)
+
+        assert (job["total"], job["created"], job["failed"]) == (4, 1, 3)
+        assert sorted(e["line"] for e in job["errors"]) == [3, 4, 5]
+
+    async def test_format_query_parameter(
+        self,
+        client: AsyncClient,
+        import_org,
+        auth_headers
+    ):
+        """Test that ?format=csv overrides the Content-Type."""
+        response = await client.post(
+            f"/api/organizations/{import_org.id}/members/import",
+            headers={**auth_headers, "Content-Type": "application/octet-stream"},
+            params={"format": "csv"},
+            content="name,email,password\nBea,bea@import.com,Password123!\n"
+        )
+
+        assert response.status_code == 202
+        job = await wait_for_job(client, response.headers["location"], auth_headers)
+        assert (job["total"], job["created"]) == (1, 1)
+
+    async def test_import_requires_admin(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        user,
+        auth_headers
+    ):
+        """Test that non-admin members cannot import."""
+        org = await OrganizationFactory.create_async(db_session, organization_type="client")
+        await OrganizationMemberFactory.create_async(
+            db_session, organization_id=org.id, user_id=user.id, role="member"
+        )
+        await db_session.commit()
+
+        response = await client.post(
+            f"/api/organizations/{org.id}/members/import",
+            headers=auth_headers,
+            content='{"name": "Ana", "email": "ana@import.com", "password": "Password123!"}'
+        )
+
+        assert response.status_code == 403
+
+    async def test_unknown_job(self, client: AsyncClient, import_org, auth_headers):
+        """Test that polling an unknown job returns 404."""
+        response = await client.get(
+            f"/api/organizations/{import_org.id}/members/import/deadbeef",
+            headers=auth_headers
+        )
+
+        assert response.status_code == 404
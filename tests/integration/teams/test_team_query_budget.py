@@ -0,0 +1,133 @@
+"""
+Query budgets for the team listing endpoints.
+
+Both used to run one query per returned row; the budgets below do not
+depend on the number of rows.
+
+Endpoints:
+- GET /api/teams/ - List teams (with member counts)
+- GET /api/teams/{team_id}/members - List members (with user/org details)
+- PATCH/DELETE /api/teams/{team_id}/members/... - One statement per write
+"""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from tests.factories import (
+    UserFactory,
+    TeamFactory,
+    OrganizationFactory,
+    TeamMemberFactory
+)
+
+
+@pytest.mark.asyncio
+class TestTeamListingQueryBudget:
+    """Test that listing endpoints run a constant number of statements."""
+
+    async def test_list_teams(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        user,
+        auth_headers,
+        query_budget
+    ):
+        """Test that member counts do not cost a query per team."""
+        for i in range(5):
+            team = await TeamFactory.create_async(db_session, user_id=user.id, name=f"Team {i}")
+            member = await UserFactory.create_async(db_session, email=f"budget-{i}@test.com")
+            await TeamMemberFactory.create_user_member_async(db_session, team_id=team.id, user_id=member.id)
+        await db_session.commit()
+
+        # Principal lookup + the listing
+        with query_budget(2, max_repeats=1):
+            response = await client.get("/api/teams/", headers=auth_headers)
+
+        assert response.status_code == 200
+        counts = [t["member_count"] for t in response.json() if t["name"].startswith("Team ")]
+        assert counts == [1] * 5
+        assert "x-db-queries" in response.headers
+
+    async def test_list_team_members(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        user,
+        auth_headers,
+        query_budget
+    ):
+        """Test that member details cost one query per member type, not per member."""
+        team = await TeamFactory.create_async(db_session, user_id=user.id)
+        for i in range(4):
+            member = await UserFactory.create_async(db_session, email=f"member-{i}@test.com")
+            await TeamMemberFactory.create_user_member_async(db_session, team_id=team.id, user_id=member.id)
+        for _ in range(3):
+            org = await OrganizationFactory.create_async(db_session, organization_type="client")
+            await TeamMemberFactory.create_org_member_async(db_session, team_id=team.id, organization_id=org.id)
+        await db_session.commit()
+
+        # Principal lookup + owner check + members + users + organizations
+        with query_budget(5, max_repeats=1):
+            response = await client.get(f"/api/teams/{team.id}/members", headers=auth_headers)
+
+        assert response.status_code == 200
+        members = response.json()
+        assert len(members) == 7
+        assert all(m["user_email"] for m in members if m["member_type"] == "user")
+        assert all(m["organization_name"] for m in members if m["member_type"] == "organization")
+
+
+@pytest.mark.asyncio
+class TestTeamWriteQueryBudget:
+    """Test that member writes are a single UPDATE/DELETE ... RETURNING."""
+
+    async def test_update_team_member(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        user,
+        auth_headers,
+        query_budget
+    ):
+        """Test that the update is not preceded by a SELECT of the row nor followed by a refresh."""
+        team = await TeamFactory.create_async(db_session, user_id=user.id)
+        member = await UserFactory.create_async(db_session, email="write-budget@test.com")
+        await TeamMemberFactory.create_user_member_async(db_session, team_id=team.id, user_id=member.id, role="member")
+        await db_session.commit()
+
+        with query_budget(10, max_repeats=1) as queries:
+            response = await client.patch(
+                f"/api/teams/{team.id}/members/user/{member.id}",
+                headers=auth_headers,
+                json={"role": "viewer"}
+            )
+
+        assert response.status_code == 200
+        assert response.json()["role"] == "viewer"
+        shapes = list(queries.shapes)
+        assert shapes[-1].startswith("UPDATE team_members SET role=")
+        assert "RETURNING" in shapes[-1]
+
+    async def test_remove_team_member(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        user,
+        auth_headers,
+        query_budget
+    ):
+        """Test that removing a member is one DELETE ... RETURNING."""
+        team = await TeamFactory.create_async(db_session, user_id=user.id)
+        member = await UserFactory.create_async(db_session, email="write-budget@test.com")
+        await TeamMemberFactory.create_user_member_async(db_session, team_id=team.id, user_id=member.id)
+        await db_session.commit()
+
+        with query_budget(10, max_repeats=1) as queries:
+            response = await client.delete(f"/api/teams/{team.id}/members/user/{member.id}", headers=auth_headers)
+
+        assert response.status_code == 204
+        shapes = list(queries.shapes)
+        assert shapes[-1].startswith("DELETE FROM team_members")
+        assert "RETURNING" in shapes[-1]
@@ -0,0 +1,128 @@
+"""
+Integration tests for team session tokens.
+
+Endpoints:
+- POST /api/teams/{team_id}/switch - Switch team and get a team session token
+- POST /api/teams/session/refresh - Refresh the team session token
+"""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import create_access_token
+from tests.factories import UserFactory, TeamFactory, TeamMemberFactory
+
+
+@pytest.mark.asyncio
+class TestTeamSession:
+    """Test team switch, zero-query authorization and invalidation."""
+
+    async def test_switch_issues_team_token(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        user,
+        auth_headers
+    ):
+        """Test switching to an owned team returns an admin team session."""
+        team = await TeamFactory.create_async(db_session, user_id=user.id)
+        await db_session.commit()
+
+        response = await client.post(f"/api/teams/{team.id}/switch", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["team_id"] == team.id
+        assert data["role"] == "admin"
+        assert data["expires_in"] > 0
+
+        await db_session.refresh(user)
+        assert user.current_team_id == team.id
+
+    async def test_switch_to_foreign_team_forbidden(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        auth_headers
+    ):
+        """Test that non-members cannot get a team session."""
+        owner = await UserFactory.create_async(db_session, email="owner@test.com")
+        team = await TeamFactory.create_async(db_session, user_id=owner.id)
+        await db_session.commit()
+
+        response = await client.post(f"/api/teams/{team.id}/switch", headers=auth_headers)
+
+        assert response.status_code == 403
+
+    async def test_team_token_authorizes_team_routes(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        user,
+        auth_headers
+    ):
+        """Test a team session token passes require_permission."""
+        team = await TeamFactory.create_async(db_session, user_id=user.id)
+        await db_session.commit()
+        session = (await client.post(f"/api/teams/{team.id}/switch", headers=auth_headers)).json()
+
+        response = await client.patch(
+            f"/api/teams/{team.id}",
+            json={"name": "Renamed"},
+            headers={"Authorization": f"Bearer {session['access_token']}"}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["name"] == "Renamed"
+
+    async def test_role_change_invalidates_team_token(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        user,
+        auth_headers
+    ):
+        """Test a demoted member's old team token no longer grants admin rights."""
+        team = await TeamFactory.create_async(db_session, user_id=user.id)
+        member = await UserFactory.create_async(db_session, email="member@test.com")
+        await TeamMemberFactory.create_user_member_async(
+            db_session, team_id=team.id, user_id=member.id, role="admin"
+        )
+        await db_session.commit()
+
+        member_headers = {"Authorization": f"Bearer {create_access_token({'sub': str(member.id)}, member.token_version)}"}
+        session = (await client.post(f"/api/teams/{team.id}/switch", headers=member_headers)).json()
+        assert session["role"] == "admin"
+
+        demote = await client.patch(
+            f"/api/teams/{team.id}/members/user/{member.id}",
+            json={"role": "viewer"},
+            headers=auth_headers
+        )
+        assert demote.status_code == 200
+
+        response = await client.patch(
+            f"/api/teams/{team.id}",
+            json={"name": "Should fail"},
+            headers={"Authorization": f"Bearer {session['access_token']}"}
+        )
+        assert response.status_code == 403
+
+        refreshed = await client.post("/api/teams/session/refresh", headers=member_headers)
+        assert refreshed.status_code == 200
+        assert refreshed.json()["role"] == "viewer"
+
+    async def test_refresh_without_current_team(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession
+    ):
+        """Test refresh requires a current team."""
+        lonely = await UserFactory.create_async(db_session, email="lonely@test.com")
+        await db_session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(lonely.id)}, lonely.token_version)}"}
+
+        response = await client.post("/api/teams/session/refresh", headers=headers)
+
+        assert response.status_code == 400
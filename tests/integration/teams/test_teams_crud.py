@@ -2,7 +2,7 @@
 Integration tests for teams CRUD operations.
 
 Tests:
-- GET /api/teams/ - List teams
+- GET /api/teams/ - List teams (skip/limit and cursor pagination)
 - POST /api/teams/ - Create team
 - GET /api/teams/{team_id} - Get team by ID
 - PATCH /api/teams/{team_id} - Update team
@@ -152,6 +152,44 @@ class TestListTeams:
         # Depending on implementation, archived teams might be excluded
         # assert "Archived Team" not in team_names
 
+    async def test_list_teams_cursor_pagination(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        user,
+        auth_headers
+    ):
+        """Test walking the team list with X-Next-Cursor."""
+        for i in range(5):
+            await TeamFactory.create_async(db_session, user_id=user.id, name=f"Paged Team {i}")
+        await db_session.commit()
+
+        all_teams = (await client.get("/api/teams/", headers=auth_headers)).json()
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = await client.get("/api/teams/", headers=auth_headers, params=params)
+            assert response.status_code == 200
+            seen += [t["id"] for t in response.json()]
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+
+        assert seen == [t["id"] for t in all_teams]
+        assert seen == sorted(seen)
+
+    async def test_list_teams_invalid_cursor(
+        self,
+        client: AsyncClient,
+        auth_headers
+    ):
+        """Test that an invalid cursor is rejected."""
+        response = await client.get("/api/teams/", headers=auth_headers, params={"cursor": "not-a-cursor"})
+
+        assert response.status_code == 400
+
 
 @pytest.mark.asyncio
 class TestCreateTeam:
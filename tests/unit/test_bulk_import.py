@@ -0,0 +1,149 @@
+"""
+Unit tests for app/core/bulk_import.py
+
+Parsing, hashing and the Redis job record; inserts are covered by
+tests/integration/organizations/test_org_member_import.py.
+"""
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.core import bulk_import, security
+from app.core.bulk_import import (
+    ImportTooLarge, MAX_NAME_LENGTH, create_job, get_job, hash_passwords, iter_lines, parse_upload
+)
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def jsonl(*lines: str) -> bytes:
+    return ("\n".join(lines) + "\n").encode()
+
+
+VALID = '{"name": "Ana", "email": "ana@example.com", "password": "Password123!"}'
+
+
+@pytest.mark.asyncio
+class TestParseUpload:
+    """Test streaming parse and per-row validation."""
+
+    async def test_lines_split_across_chunks(self):
+        """Test that lines are reassembled across chunk boundaries."""
+        lines = [item async for item in iter_lines(stream(b"ab", b"c\n\nde", b"f"))]
+
+        assert lines == [(1, "abc"), (3, "def")]
+
+    async def test_jsonl_rows(self):
+        """Test that valid JSON Lines become rows with the default role."""
+        rows, errors = await parse_upload(stream(jsonl(
+            VALID,
+            '{"name": "Bia", "email": "bia@example.com", "password": "x", "role": "Admin"}',
+        )), "jsonl")
+
+        assert errors == []
+        assert [(r.line, r.email, r.role) for r in rows] == [
+            (1, "ana@example.com", "member"), (2, "bia@example.com", "admin")
+        ]
+
+    async def test_csv_rows(self):
+        """Test that CSV uploads are read through their header."""
+        body = b"\xef\xbb\xbfEmail,Name,Password\nana@example.com,\"Silva, Ana\",Password123!\n"
+        rows, errors = await parse_upload(stream(body), "csv")
+
+        assert errors == []
+        assert (rows[0].line, rows[0].name, rows[0].email) == (2, "Silva, Ana", "ana@example.com")
+
+    async def test_row_errors_carry_line_numbers(self):
+        """Test that bad rows are reported without stopping the upload."""
+        rows, errors = await parse_upload(stream(jsonl(
+            VALID,
+            "not json",
+            '["a list"]',
+            '{"name": "Bad", "email": "nope", "password": "x"}',
+            '{"name": "Role", "email": "r@example.com", "password": "x", "role": "owner"}',
+            '{"name": "' + "N" * (MAX_NAME_LENGTH + 1) + '", "email": "n@example.com", "password": "x"}',
+            VALID,
+        )), "jsonl")
+
+        assert [r.line for r in rows] == [1]
+        assert [e["line"] for e in errors] == [2, 3, 4, 5, 6, 7]
+        assert errors[0]["error"] == "Invalid JSON"
+        assert errors[2]["error"].startswith("email")
+        assert errors[5]["error"] == "Duplicate email in upload"
+
+    async def test_row_limit(self):
+        """Test that uploads over the limit are refused."""
+        body = jsonl(*(
+            f'{{"name": "U{i}", "email": "u{i}@example.com", "password": "x"}}' for i in range(3)
+        ))
+        with pytest.raises(ImportTooLarge):
+            await parse_upload(stream(body), "jsonl", max_rows=2)
+
+    async def test_line_limit_without_newline(self):
+        """Test that an upload with no newline is refused once it passes the line limit."""
+        received = []
+
+        async def endless():
+            while True:
+                received.append(1)
+                yield b"x" * 1024
+
+        with pytest.raises(ImportTooLarge):
+            async for _ in iter_lines(endless(), max_line_bytes=64 * 1024):
+                pass
+
+        assert len(received) == 65
+
+    async def test_line_limit_within_chunk(self):
+        """Test that a long line arriving in a single chunk is refused."""
+        with pytest.raises(ImportTooLarge):
+            async for _ in iter_lines(stream(b"ok\n" + b"x" * 100 + b"\nok\n"), max_line_bytes=50):
+                pass
+
+
+class TestHashing:
+    """Test the pool-side hashing function."""
+
+    def test_hash_passwords_uses_given_rounds(self):
+        """Test that each password is hashed with the requested cost."""
+        hashes = hash_passwords(["a", "b"], 4)
+
+        assert [security.get_hash_rounds(h) for h in hashes] == [4, 4]
+        assert security.verify_password("b", hashes[1])
+
+
+@pytest.mark.asyncio
+class TestJobRecord:
+    """Test the Redis job record."""
+
+    async def test_create_and_get(self, redis_client: FakeAsyncRedis):
+        """Test that parse errors are counted as processed failures."""
+        errors = [{"line": 2, "email": None, "error": "Invalid JSON"}]
+        job_id = await create_job(redis_client, organization_id=7, created_by=1, total=3, errors=errors)
+
+        job = await get_job(redis_client, job_id)
+
+        assert job["status"] == "queued"
+        assert (job["organization_id"], job["created_by"]) == (7, 1)
+        assert (job["total"], job["processed"], job["failed"], job["created"]) == (3, 1, 1, 0)
+        assert job["errors"] == errors
+        assert job["errors_truncated"] is False
+        assert 0 < await redis_client.ttl(f"{bulk_import.JOB_KEY_PREFIX}{job_id}") <= bulk_import.JOB_TTL
+
+    async def test_errors_are_capped(self, redis_client: FakeAsyncRedis, monkeypatch):
+        """Test that only MAX_ERRORS row errors are stored."""
+        monkeypatch.setattr(bulk_import, "MAX_ERRORS", 2)
+        errors = [{"line": i, "email": None, "error": "x"} for i in range(5)]
+        job_id = await create_job(redis_client, 7, 1, total=5, errors=errors)
+
+        job = await get_job(redis_client, job_id)
+
+        assert len(job["errors"]) == 2
+        assert job["errors_truncated"] is True
+
+    async def test_unknown_job(self, redis_client: FakeAsyncRedis):
+        """Test that unknown job ids return None."""
+        assert await get_job(redis_client, "missing") is None
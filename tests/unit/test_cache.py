@@ -0,0 +1,68 @@
+"""
+Unit tests for app/helpers/cache.py
+
+Tests the in-process TTL/LRU cache without database.
+"""
+
+from app.helpers.cache import TTLCache
+
+
+class TestTTLCache:
+    """Test TTLCache behaviour."""
+
+    def test_get_and_set(self):
+        """Test basic hit and miss accounting."""
+        cache = TTLCache(maxsize=10, ttl=60)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_entries_expire_after_ttl(self, fake_clock):
+        """Test that entries are dropped once the TTL has elapsed."""
+        cache = TTLCache(maxsize=10, ttl=30, clock=fake_clock)
+        cache.set("a", 1)
+
+        fake_clock.now += 29
+        assert cache.get("a") == 1
+
+        fake_clock.now += 2
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_explicit_expiry(self, fake_clock):
+        """Test that expires_at overrides the default TTL."""
+        cache = TTLCache(maxsize=10, ttl=3600, clock=fake_clock)
+        cache.set("a", 1, expires_at=fake_clock.now + 5)
+
+        fake_clock.now += 6
+        assert cache.get("a") is None
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" becomes least recently used
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate_where(self):
+        """Test predicate-based invalidation (e.g. all entries of a user)."""
+        cache = TTLCache(maxsize=10)
+        cache.set((1, 1), "u1v1")
+        cache.set((1, 2), "u1v2")
+        cache.set((2, 1), "u2v1")
+
+        removed = cache.invalidate_where(lambda key: key[0] == 1)
+
+        assert removed == 2
+        assert len(cache) == 1
+        assert cache.get((2, 1)) == "u2v1"
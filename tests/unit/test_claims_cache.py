@@ -0,0 +1,57 @@
+"""
+Unit tests for app/core/claims_cache.py
+
+Tests verified-claims caching without database.
+"""
+
+import pytest
+from datetime import timedelta
+from jose import JWTError
+
+from app.core.security import create_access_token
+from app.core.claims_cache import decode_access_token, claims_cache, token_digest
+
+
+@pytest.fixture(autouse=True)
+def empty_claims_cache():
+    claims_cache.clear()
+    yield
+    claims_cache.clear()
+
+
+class TestClaimsCache:
+    """Test decode_access_token caching."""
+
+    def test_second_decode_is_a_hit(self):
+        """Test that a verified token is served from cache."""
+        token = create_access_token({"sub": "42"}, token_version=3)
+
+        first = decode_access_token(token)
+        hits_before = claims_cache.hits
+        second = decode_access_token(token)
+
+        assert first == second
+        assert second["sub"] == "42"
+        assert second["tv"] == 3
+        assert claims_cache.hits == hits_before + 1
+
+    def test_cache_key_is_digest_not_token(self):
+        """Test that raw tokens are never used as cache keys."""
+        token = create_access_token({"sub": "1"}, token_version=1)
+        decode_access_token(token)
+
+        assert claims_cache.get(token) is None
+        assert claims_cache.get(token_digest(token)) is not None
+
+    def test_expired_token_is_rejected_and_not_cached(self):
+        """Test that expired tokens raise and leave the cache empty."""
+        token = create_access_token({"sub": "1"}, token_version=1, expires_delta=timedelta(seconds=-10))
+
+        with pytest.raises(JWTError):
+            decode_access_token(token)
+        assert len(claims_cache) == 0
+
+    def test_invalid_token_is_rejected(self):
+        """Test that garbage tokens raise JWTError."""
+        with pytest.raises(JWTError):
+            decode_access_token("not.a.token")
@@ -0,0 +1,171 @@
+"""
+Unit tests for app/db/pool.py
+
+Pool behaviour is exercised on SQLite (sync engine) since it needs no server.
+"""
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from app.db import pool as pool_module
+from app.db.pool import PoolCounters, instrument_engine, instrumented_pool_class, pool_stats, warm_up_pool
+
+
+def make_engine(tmp_path, counters, pre_ping="never", idle_seconds=30.0, **pool_args):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool_class(QueuePool, counters),
+        **{"pool_size": 2, "max_overflow": 0, "pool_timeout": 0.1, **pool_args},
+    )
+    instrument_engine(engine, counters, pre_ping=pre_ping, idle_seconds=idle_seconds)
+    return engine
+
+
+class TestInstrumentedPool:
+    """Test checkout counters and pool stats."""
+
+    def test_checkouts_and_connects_are_counted(self, tmp_path):
+        """Test that reused connections count as checkouts but not connects."""
+        counters = PoolCounters()
+        engine = make_engine(tmp_path, counters)
+
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        assert counters.checkouts == 3
+        assert counters.connects == 1
+        assert counters.as_dict()["wait_max_ms"] >= 0
+
+    def test_timeouts_are_counted(self, tmp_path):
+        """Test that a checkout beyond size + overflow times out and is counted."""
+        counters = PoolCounters()
+        engine = make_engine(tmp_path, counters, pool_size=1)
+
+        with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+
+        assert counters.timeouts == 1
+
+    def test_stats_report_checked_out_and_idle(self, tmp_path):
+        """Test the live pool figures."""
+        counters = PoolCounters()
+        engine = make_engine(tmp_path, counters)
+
+        with engine.connect():
+            with engine.connect():
+                stats = pool_stats(engine.pool, counters)
+                assert (stats["checked_out"], stats["idle"], stats["overflow"]) == (2, 0, 0)
+        stats = pool_stats(engine.pool, counters)
+        assert (stats["checked_out"], stats["idle"]) == (0, 2)
+
+    def test_counters_survive_dispose(self, tmp_path):
+        """Test that a recreated pool keeps reporting into the same counters."""
+        counters = PoolCounters()
+        engine = make_engine(tmp_path, counters)
+        with engine.connect():
+            pass
+        engine.dispose()
+        with engine.connect():
+            pass
+
+        assert counters.checkouts == 2
+
+
+class TestIdlePrePing:
+    """Test the "idle" pre-ping strategy."""
+
+    def test_only_idle_connections_are_pinged(self, tmp_path):
+        """Test that a connection returned moments ago is not pinged."""
+        counters = PoolCounters()
+        engine = make_engine(tmp_path, counters, pre_ping="idle", idle_seconds=60)
+
+        for _ in range(3):
+            with engine.connect():
+                pass
+
+        assert counters.pings == 0
+
+    def test_idle_connection_is_pinged(self, tmp_path):
+        """Test that connections idle past the threshold are pinged on checkout."""
+        counters = PoolCounters()
+        engine = make_engine(tmp_path, counters, pre_ping="idle", idle_seconds=0)
+
+        with engine.connect():
+            pass
+        with engine.connect():
+            pass
+
+        assert counters.pings == 1
+
+    def test_failed_ping_replaces_connection(self, tmp_path, monkeypatch):
+        """Test that a dead idle connection is discarded and a new one handed out."""
+        counters = PoolCounters()
+        engine = make_engine(tmp_path, counters, pre_ping="idle", idle_seconds=0)
+        with engine.connect():
+            pass
+
+        def dead(dbapi_connection):
+            raise RuntimeError("server closed the connection")
+        monkeypatch.setattr(engine.dialect, "do_ping", dead)
+
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+
+        assert counters.ping_failures == 1
+        assert counters.connects == 2
+
+
+class _FakeConnection:
+    def __init__(self, fail: bool, closed: list):
+        self.fail = fail
+        self.closed = closed
+
+    async def start(self):
+        if self.fail:
+            raise ConnectionRefusedError("db down")
+        return self
+
+    async def close(self):
+        self.closed.append(self)
+
+
+class _FakeEngine:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.opened = 0
+        self.closed = []
+
+    def connect(self):
+        self.opened += 1
+        return _FakeConnection(self.opened <= self.failures, self.closed)
+
+
+@pytest.mark.asyncio
+class TestWarmUp:
+    """Test startup pre-filling."""
+
+    async def test_opens_connections_concurrently_and_returns_them(self, monkeypatch):
+        """Test that warm-up holds all connections at once, then closes (checks in) them."""
+        monkeypatch.setattr(pool_module, "DB_POOL_SIZE", 4)
+        engine = _FakeEngine()
+
+        assert await warm_up_pool(engine, 10) == 4
+        assert engine.opened == 4
+        assert len(engine.closed) == 4
+
+    async def test_failures_are_not_fatal(self, monkeypatch):
+        """Test that connection errors only reduce the count."""
+        monkeypatch.setattr(pool_module, "DB_POOL_SIZE", 3)
+        engine = _FakeEngine(failures=1)
+
+        assert await warm_up_pool(engine, 3) == 2
+
+    async def test_disabled(self):
+        """Test that 0 disables warm-up."""
+        engine = _FakeEngine()
+
+        assert await warm_up_pool(engine, 0) == 0
+        assert engine.opened == 0
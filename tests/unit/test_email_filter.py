@@ -0,0 +1,137 @@
+"""
+Unit tests for app/core/email_filter.py
+
+Uses FakeAsyncRedis and an in-memory stand-in for the database session.
+"""
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.core.email_filter import (
+    EmailFilter, BITS_KEY, META_KEY, REBUILD_LOCK_KEY, redis_offset
+)
+
+
+class FakeSession:
+    """Streams a fixed list of emails; on_row runs after each one."""
+
+    def __init__(self, emails, on_row=None):
+        self.emails = emails
+        self.on_row = on_row
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def stream_scalars(self, statement):
+        async def rows():
+            for email in self.emails:
+                yield email
+                if self.on_row:
+                    await self.on_row()
+        return rows()
+
+
+def make_filter() -> EmailFilter:
+    return EmailFilter(capacity=1000, error_rate=0.01, enabled=True)
+
+
+@pytest.mark.asyncio
+class TestEmailFilter:
+    """Test the local copy, the shared array and rebuilds."""
+
+    async def test_not_ready_treats_everything_as_hit(self):
+        """Test that lookups go to the database until a filter is loaded."""
+        f = make_filter()
+
+        assert f.might_exist("anyone@example.com")
+        f.record_lookup(False)
+        assert f.stats()["false_positives"] == 0
+
+    async def test_rebuild_and_load(self, redis_client: FakeAsyncRedis):
+        """Test that a rebuilt filter rules out unknown emails only."""
+        f = make_filter()
+        assert await f.rebuild(redis_client, FakeSession(["Ana@Example.com", "bia@example.com"]))
+        assert await f.load(redis_client)
+
+        assert f.might_exist("ana@example.com")
+        assert f.might_exist(" BIA@example.com ")
+        assert not f.might_exist("nobody@example.com")
+        assert await redis_client.hget(META_KEY, "count") == b"2"
+        assert not await redis_client.exists(REBUILD_LOCK_KEY)
+
+    async def test_incremental_add_reaches_other_workers(self, redis_client: FakeAsyncRedis):
+        """Test that adds set the same bits in Redis that BloomFilter sets locally."""
+        first, second = make_filter(), make_filter()
+        await first.rebuild(redis_client, FakeSession([]))
+
+        await first.add(redis_client, ["new@example.com"])
+        await second.load(redis_client)
+
+        assert second.might_exist("new@example.com")
+        assert second.bloom.to_bytes() == first.bloom.to_bytes()
+
+    async def test_add_before_first_build_does_not_create_partial_array(self, redis_client: FakeAsyncRedis):
+        """Test that adds never create a bit array that would miss older users."""
+        f = make_filter()
+        await f.add(redis_client, ["new@example.com"])
+
+        assert not await redis_client.exists(BITS_KEY)
+        assert not await f.load(redis_client)
+
+    async def test_adds_during_rebuild_are_replayed(self, redis_client: FakeAsyncRedis):
+        """Test that emails registered while a rebuild scans the table survive the swap."""
+        rebuilder, other = make_filter(), make_filter()
+
+        async def register_concurrently():
+            await other.add(redis_client, ["late@example.com"])
+
+        await rebuilder.rebuild(redis_client, FakeSession(["old@example.com"], on_row=register_concurrently))
+        await rebuilder.load(redis_client)
+
+        assert rebuilder.might_exist("late@example.com")
+        assert rebuilder.might_exist("old@example.com")
+
+    async def test_only_one_rebuild_at_a_time(self, redis_client: FakeAsyncRedis):
+        """Test that the rebuild lock is exclusive."""
+        await redis_client.set(REBUILD_LOCK_KEY, "someone-else")
+
+        assert not await make_filter().rebuild(redis_client, FakeSession(["a@example.com"]))
+        assert not await redis_client.exists(BITS_KEY)
+
+    async def test_geometry_mismatch_is_ignored(self, redis_client: FakeAsyncRedis):
+        """Test that a worker never loads an array sized for other settings."""
+        await make_filter().rebuild(redis_client, FakeSession(["a@example.com"]))
+        other = EmailFilter(capacity=5000, error_rate=0.01, enabled=True)
+
+        assert not await other.load(redis_client)
+        assert other.might_exist("unknown@example.com")
+
+    async def test_stats_report_fpr_and_memory(self, redis_client: FakeAsyncRedis):
+        """Test the observed false positive rate and memory figures."""
+        f = make_filter()
+        await f.rebuild(redis_client, FakeSession(["a@example.com"]))
+        await f.load(redis_client)
+
+        f.might_exist("x@example.com")
+        f.might_exist("a@example.com")
+        f.record_lookup(False)
+        stats = f.stats()
+
+        assert stats["memory_bytes"] == len(f.bloom.to_bytes())
+        assert stats["observed_fpr"] == 0.5
+        assert stats["ready"] is True
+
+
+class TestRedisOffset:
+    """Test mapping Bloom bit positions to Redis SETBIT offsets."""
+
+    def test_redis_offset_matches_bit_order(self):
+        """Test the LSB-first to MSB-first bit numbering conversion."""
+        assert [redis_offset(p) for p in range(8)] == [7, 6, 5, 4, 3, 2, 1, 0]
+        assert redis_offset(9) == 14
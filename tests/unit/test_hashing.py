@@ -0,0 +1,225 @@
+"""
+Unit tests for app/core/hashing.py
+
+Tests the bounded password hashing executor without database.
+"""
+
+import asyncio
+import time
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.core import hashing, security
+from app.core.hashing import (
+    CALIBRATION_KEY,
+    HashingExecutor,
+    HashingPoolSaturated,
+    calibrate_bcrypt_rounds_shared,
+    choose_bcrypt_rounds,
+    needs_rehash,
+    verify_and_update_async,
+)
+from app.core.security import get_password_hash, get_hash_rounds, verify_password
+
+
+def _slow_identity(value):
+    time.sleep(0.05)
+    return value
+
+
+@pytest.mark.asyncio
+class TestHashingExecutor:
+    """Test the hashing executor admission and metrics."""
+
+    async def test_hash_and_verify_in_pool(self):
+        """Test that hashing functions run correctly in the pool."""
+        executor = HashingExecutor(kind="thread", workers=2, max_queue=2)
+        try:
+            hashed = await executor.run(get_password_hash, "Password123!")
+            assert await executor.run(verify_password, "Password123!", hashed) is True
+            assert await executor.run(verify_password, "wrong", hashed) is False
+        finally:
+            executor.shutdown()
+
+    async def test_rejects_when_saturated(self):
+        """Test that jobs beyond workers + max_queue fail fast."""
+        executor = HashingExecutor(kind="thread", workers=1, max_queue=1)
+        try:
+            results = await asyncio.gather(
+                *[executor.run(_slow_identity, i) for i in range(4)],
+                return_exceptions=True
+            )
+            rejected = [r for r in results if isinstance(r, HashingPoolSaturated)]
+            assert len(rejected) == 2
+            assert executor.stats()["rejected"] == 2
+        finally:
+            executor.shutdown()
+
+    async def test_stats_report_latency(self):
+        """Test that latency and completion counters are updated."""
+        executor = HashingExecutor(kind="thread", workers=1, max_queue=0)
+        try:
+            await executor.run(_slow_identity, 1)
+            stats = executor.stats()
+            assert stats["completed"] == 1
+            assert stats["in_flight"] == 0
+            assert stats["queue_depth"] == 0
+            assert stats["latency_max_ms"] >= 50
+        finally:
+            executor.shutdown()
+
+
+class TestHashingExecutorConfig:
+    """Test executor configuration validation."""
+
+    def test_invalid_kind(self):
+        """Test that unknown executor kinds are rejected."""
+        with pytest.raises(ValueError):
+            HashingExecutor(kind="gpu")
+
+
+class TestBcryptCost:
+    """Test cost selection and rehash detection."""
+
+    def test_choose_highest_cost_within_target(self):
+        """Test that the slowest cost under the target is chosen."""
+        table = [(10, 60.0), (11, 120.0), (12, 240.0), (13, 480.0)]
+
+        assert choose_bcrypt_rounds(table, target_ms=250) == 12
+        assert choose_bcrypt_rounds(table, target_ms=100) == 10
+
+    def test_choose_never_below_minimum(self):
+        """Test that very slow hosts still get the minimum cost."""
+        assert choose_bcrypt_rounds([(10, 900.0)], target_ms=100, min_rounds=10) == 10
+
+    def test_hash_uses_explicit_rounds(self):
+        """Test that get_password_hash honours the rounds argument."""
+        hashed = get_password_hash("Password123!", rounds=5)
+
+        assert get_hash_rounds(hashed) == 5
+        assert get_hash_rounds("not-a-hash") is None
+
+    def test_needs_rehash(self, monkeypatch):
+        """Test that only hashes with a lower cost are flagged."""
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 5)
+
+        assert needs_rehash(get_password_hash("pw", rounds=5)) is False
+        assert needs_rehash(get_password_hash("pw", rounds=4)) is True
+        assert needs_rehash(get_password_hash("pw", rounds=6)) is False
+
+    def test_needs_rehash_downgrade(self, monkeypatch):
+        """Test that higher costs are rewritten only when downgrades are allowed."""
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 5)
+
+        assert needs_rehash(get_password_hash("pw", rounds=6), allow_downgrade=True) is True
+        assert needs_rehash(get_password_hash("pw", rounds=5), allow_downgrade=True) is False
+
+
+@pytest.mark.asyncio
+class TestSharedCalibration:
+    """Test that workers of a deployment settle on one calibrated cost."""
+
+    @pytest.fixture
+    def calibrations(self, monkeypatch):
+        """Stub out the benchmark; each call calibrates to the next cost in the list."""
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 12)
+        results = [11, 13]
+        calls = []
+
+        def fake_calibrate(target_ms):
+            calls.append(target_ms)
+            security.BCRYPT_ROUNDS = results[len(calls) - 1]
+            return security.BCRYPT_ROUNDS
+
+        monkeypatch.setattr(hashing, "calibrate_bcrypt_rounds", fake_calibrate)
+        return calls
+
+    async def test_first_worker_publishes(self, calibrations):
+        """Test that the first worker calibrates and later workers adopt its cost."""
+        redis = FakeAsyncRedis()
+
+        assert await calibrate_bcrypt_rounds_shared(redis, target_ms=250) == 11
+        security.BCRYPT_ROUNDS = 12
+        assert await calibrate_bcrypt_rounds_shared(redis, target_ms=250) == 11
+
+        assert len(calibrations) == 1
+        assert await redis.ttl(CALIBRATION_KEY) > 0
+        await redis.aclose()
+
+    async def test_concurrent_worker_adopts_winner(self, calibrations):
+        """Test that a worker losing the publish race uses the published cost, not its own."""
+        redis = FakeAsyncRedis()
+        real_get = redis.get
+        gets = []
+
+        async def get_then_race(key):
+            gets.append(key)
+            if len(gets) == 1:
+                await redis.set(CALIBRATION_KEY, 14)
+                return None
+            return await real_get(key)
+
+        redis.get = get_then_race
+
+        assert await calibrate_bcrypt_rounds_shared(redis, target_ms=250) == 14
+        await redis.aclose()
+
+    async def test_disabled_without_target(self, calibrations):
+        """Test that nothing is measured or published without a target."""
+        redis = FakeAsyncRedis()
+
+        assert await calibrate_bcrypt_rounds_shared(redis, target_ms=0) == 12
+        assert calibrations == []
+        assert await redis.get(CALIBRATION_KEY) is None
+        await redis.aclose()
+
+    async def test_redis_down_calibrates_locally(self, calibrations):
+        """Test that an unreachable Redis falls back to a local calibration."""
+        class DownRedis:
+            async def get(self, key):
+                raise ConnectionError("down")
+
+        assert await calibrate_bcrypt_rounds_shared(DownRedis(), target_ms=250) == 11
+
+
+@pytest.mark.asyncio
+class TestVerifyAndUpdate:
+    """Test transparent rehash on successful verification."""
+
+    async def test_outdated_hash_is_replaced(self, monkeypatch):
+        """Test that a valid password with an old cost yields a new hash."""
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 5)
+        old_hash = get_password_hash("Password123!", rounds=4)
+
+        valid, new_hash = await verify_and_update_async("Password123!", old_hash)
+
+        assert valid is True
+        assert get_hash_rounds(new_hash) == 5
+        assert verify_password("Password123!", new_hash)
+
+    async def test_stronger_hash_is_kept(self, monkeypatch):
+        """Test that a hash with a higher cost is not downgraded."""
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 4)
+
+        valid, new_hash = await verify_and_update_async("pw", get_password_hash("pw", rounds=5))
+
+        assert valid is True
+        assert new_hash is None
+
+    async def test_current_hash_is_kept(self, monkeypatch):
+        """Test that no rehash happens when the cost already matches."""
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 4)
+
+        valid, new_hash = await verify_and_update_async("pw", get_password_hash("pw", rounds=4))
+
+        assert valid is True
+        assert new_hash is None
+
+    async def test_wrong_password_never_rehashes(self, monkeypatch):
+        """Test that failed verification does not produce a hash."""
+        monkeypatch.setattr(security, "BCRYPT_ROUNDS", 5)
+
+        valid, new_hash = await verify_and_update_async("wrong", get_password_hash("pw", rounds=4))
+
+        assert valid is False
+        assert new_hash is None
@@ -0,0 +1,117 @@
+"""
+Unit tests for app/core/jwt_keys.py
+
+Keys are generated in memory; no key directory is required.
+"""
+
+import hashlib
+import hmac
+import json
+
+import pytest
+from jose import jwk, jwt, JWTError
+from jose.utils import base64url_encode
+
+from app.core.jwt_keys import KeyRing
+from scripts.generate_jwt_key import generate_private_key, private_pem
+
+SECRET = "unit-test-secret"
+CLAIMS = {"sub": "1", "tv": 1}
+
+
+def make_key(alg: str = "RS256"):
+    return jwk.construct(private_pem(generate_private_key(alg)), alg)
+
+
+class TestKeyRing:
+    """Test signing, verification and rotation."""
+
+    def test_hs256_default(self):
+        """Test the default ring signs with the shared secret and publishes no keys."""
+        ring = KeyRing(SECRET)
+        token = ring.sign(CLAIMS)
+
+        assert jwt.decode(token, SECRET, algorithms=["HS256"])["sub"] == "1"
+        assert ring.verify(token)["sub"] == "1"
+        assert ring.jwks == {"keys": []}
+
+    @pytest.mark.parametrize("alg", ["RS256", "ES256"])
+    def test_asymmetric_round_trip(self, alg):
+        """Test tokens carry the active kid and verify with the public key."""
+        ring = KeyRing(SECRET, alg, keys={"k1": make_key(alg)}, active_kid="k1")
+        token = ring.sign(CLAIMS)
+
+        assert jwt.get_unverified_header(token)["kid"] == "k1"
+        assert ring.verify(token)["sub"] == "1"
+
+    def test_rotation_keeps_old_tokens_valid(self):
+        """Test tokens signed by a retired key still verify after rotation."""
+        old, new = make_key(), make_key()
+        old_ring = KeyRing(SECRET, "RS256", keys={"old": old}, active_kid="old")
+        token = old_ring.sign(CLAIMS)
+
+        rotated = KeyRing(SECRET, "RS256", keys={"old": old.public_key(), "new": new}, active_kid="new")
+
+        assert rotated.verify(token)["sub"] == "1"
+        assert jwt.get_unverified_header(rotated.sign(CLAIMS))["kid"] == "new"
+
+    def test_unknown_kid_rejected(self):
+        """Test tokens from a key that is not in the ring are rejected."""
+        foreign = KeyRing(SECRET, "RS256", keys={"k1": make_key()}, active_kid="k1")
+        ring = KeyRing(SECRET, "RS256", keys={"k2": make_key()}, active_kid="k2")
+
+        with pytest.raises(JWTError):
+            ring.verify(foreign.sign(CLAIMS))
+
+    def test_legacy_hs256_acceptance(self):
+        """Test HS256 tokens are accepted only while JWT_ACCEPT_HS256 is on."""
+        legacy = KeyRing(SECRET).sign(CLAIMS)
+        key = make_key()
+
+        accepting = KeyRing(SECRET, "RS256", keys={"k1": key}, active_kid="k1", accept_hs256=True)
+        strict = KeyRing(SECRET, "RS256", keys={"k1": key}, active_kid="k1", accept_hs256=False)
+
+        assert accepting.verify(legacy)["sub"] == "1"
+        with pytest.raises(JWTError):
+            strict.verify(legacy)
+
+    def test_public_key_cannot_be_used_as_hmac_secret(self):
+        """Test algorithm confusion: an HS256 token keyed with the public PEM fails."""
+        key = make_key()
+        ring = KeyRing(SECRET, "RS256", keys={"k1": key}, active_kid="k1")
+        public_pem = key.public_key().to_pem()
+        # python-jose refuses to sign this, so build the token by hand
+        signing_input = b".".join(
+            base64url_encode(json.dumps(part).encode())
+            for part in ({"alg": "HS256", "typ": "JWT", "kid": "k1"}, CLAIMS)
+        )
+        signature = hmac.new(public_pem, signing_input, hashlib.sha256).digest()
+        forged = (signing_input + b"." + base64url_encode(signature)).decode()
+
+        with pytest.raises(JWTError):
+            ring.verify(forged)
+
+    def test_jwks_has_only_public_material(self):
+        """Test the JWKS lists every key without private parameters."""
+        ring = KeyRing(SECRET, "RS256", keys={"k1": make_key(), "k2": make_key().public_key()}, active_kid="k1")
+        keys = {k["kid"]: k for k in ring.jwks["keys"]}
+
+        assert set(keys) == {"k1", "k2"}
+        assert all("d" not in k and k["alg"] == "RS256" and k["use"] == "sig" for k in keys.values())
+
+    def test_active_kid_must_be_private(self):
+        """Test that a ring cannot be built without a private signing key."""
+        with pytest.raises(ValueError):
+            KeyRing(SECRET, "RS256", keys={"k1": make_key().public_key()}, active_kid="k1")
+        with pytest.raises(ValueError):
+            KeyRing(SECRET, "RS256", keys={"k1": make_key()}, active_kid="missing")
+
+    def test_from_directory(self, tmp_path):
+        """Test keys are loaded from <kid>.pem files."""
+        (tmp_path / "2026-01.pem").write_bytes(private_pem(generate_private_key("ES256")))
+        (tmp_path / "README").write_text("ignored")
+
+        ring = KeyRing.from_directory(SECRET, "ES256", str(tmp_path), "2026-01")
+
+        assert [k["kid"] for k in ring.jwks["keys"]] == ["2026-01"]
+        assert ring.verify(ring.sign(CLAIMS))["sub"] == "1"
@@ -0,0 +1,180 @@
+"""
+Unit tests for app/db/lazy_session.py
+
+Sessions are stand-ins that record when they are created and closed;
+connection hold times come from an in-memory SQLite engine.
+"""
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel, field_validator
+from sqlalchemy import create_engine, text
+
+from app.db import lazy_session
+from app.db.lazy_session import DBSessionRoute, HoldStats, LazySession, track_session
+
+
+class RecordingSession:
+    """AsyncSession stand-in appending its lifecycle to a shared event list."""
+
+    def __init__(self, events: list):
+        self.events = events
+        events.append("created")
+
+    async def execute(self, statement):
+        self.events.append("execute")
+
+    async def close(self):
+        self.events.append("closed")
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = HoldStats()
+    monkeypatch.setattr(lazy_session, "hold_stats", stats)
+    return stats
+
+
+@pytest.mark.asyncio
+class TestLazySession:
+    """Test that the real session is only created when used."""
+
+    async def test_unused_session_never_created(self, stats):
+        """Test that declaring a session costs nothing until it is used."""
+        events = []
+        session = LazySession(lambda: RecordingSession(events))
+
+        await session.close()
+
+        assert events == []
+        assert not session.opened
+        assert (stats.sessions_created, stats.sessions_opened) == (1, 0)
+
+    async def test_created_on_first_use(self, stats):
+        """Test that the first attribute access creates the session and later ones reuse it."""
+        events = []
+        session = LazySession(lambda: RecordingSession(events))
+
+        await session.execute("SELECT 1")
+        await session.execute("SELECT 2")
+        await session.close()
+
+        assert events == ["created", "execute", "execute", "closed"]
+        assert stats.sessions_opened == 1
+
+
+@pytest.mark.asyncio
+class TestDBSessionRoute:
+    """Test early release of request sessions."""
+
+    @pytest.fixture
+    def events(self):
+        return []
+
+    @pytest.fixture
+    def app(self, events):
+        async def get_session():
+            session = LazySession(lambda: RecordingSession(events))
+            track_session(session)
+            try:
+                yield session
+            finally:
+                await session.close()
+                events.append("teardown")
+
+        class Out(BaseModel):
+            value: int
+
+            @field_validator("value")
+            @classmethod
+            def serialized(cls, value):
+                events.append("serialized")
+                return value
+
+        router = APIRouter(route_class=DBSessionRoute)
+
+        @router.get("/read", response_model=Out)
+        async def read(db=Depends(get_session)):
+            await db.execute("SELECT 1")
+            return {"value": 1}
+
+        @router.get("/cached", response_model=Out)
+        async def cached(db=Depends(get_session)):
+            return {"value": 1}
+
+        async def deny(db=Depends(get_session)):
+            await db.execute("SELECT 1")
+            raise HTTPException(status_code=403)
+
+        @router.get("/denied", dependencies=[Depends(deny)])
+        async def denied():
+            return {}
+
+        app = FastAPI()
+        app.include_router(router, prefix="/api")
+        return app
+
+    async def get(self, app, path):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path)
+
+    async def test_released_before_serialization(self, app, events, stats):
+        """Test that the session is closed when the endpoint returns, before the response model runs."""
+        response = await self.get(app, "/api/read")
+
+        assert response.status_code == 200
+        assert events.index("closed") < events.index("serialized") < events.index("teardown")
+        assert stats.endpoints["test_lazy_session.read"]["requests"] == 1
+
+    async def test_unused_session_not_created(self, app, events):
+        """Test that an endpoint that never touches the session never creates one."""
+        response = await self.get(app, "/api/cached")
+
+        assert response.status_code == 200
+        assert "created" not in events
+
+    async def test_released_when_dependency_rejects(self, app, events):
+        """Test that a dependency that queried and then raised still releases before the error response."""
+        response = await self.get(app, "/api/denied")
+
+        assert response.status_code == 403
+        assert events.index("closed") < events.index("teardown")
+
+
+class TestHoldStats:
+    """Test connection hold time accounting."""
+
+    def test_checkouts_charged_to_current_endpoint(self, stats):
+        """Test that pool checkouts are timed and labelled with the endpoint that took them."""
+        engine = create_engine("sqlite://")
+        token = lazy_session._endpoint.set("things.list_things")
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        finally:
+            lazy_session._endpoint.reset(token)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        engine.dispose()
+
+        endpoints = stats.stats()["endpoints"]
+        assert endpoints["things.list_things"]["checkouts"] == 1
+        assert endpoints["things.list_things"]["held_max_ms"] >= 0
+        assert endpoints["background"]["checkouts"] == 1
+        assert endpoints["background"]["held_ms_per_request"] is None
+
+    def test_per_request_averages(self):
+        """Test that per-request figures divide by requests, not checkouts."""
+        stats = HoldStats()
+        stats.record_request("GET /x", 10.0)
+        stats.record_request("GET /x", 30.0)
+        stats.record_hold("GET /x", 2.0)
+        stats.record_hold("GET /x", 4.0)
+        stats.record_hold("GET /x", 6.0)
+
+        entry = stats.stats()["endpoints"]["GET /x"]
+        assert entry["held_ms_per_request"] == 6.0
+        assert entry["request_ms_per_request"] == 20.0
+        assert entry["held_ms_per_checkout"] == 4.0
+        assert entry["held_max_ms"] == 6.0
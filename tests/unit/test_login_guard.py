@@ -0,0 +1,157 @@
+"""
+Unit tests for app/core/login_guard.py
+
+Uses FakeAsyncRedis instead of a real Redis server.
+"""
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from starlette.requests import Request
+
+from app.core import login_guard as login_guard_module
+from app.core.login_guard import LoginGuard, ACCOUNT_KEY_PREFIX, IP_KEY_PREFIX
+from app.core.rate_limit import client_ip
+
+
+class BrokenRedis:
+    """Redis stand-in whose calls always fail."""
+
+    async def eval(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+    async def delete(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+
+@pytest.fixture
+def small_allowance(monkeypatch):
+    monkeypatch.setattr(login_guard_module, "ACCOUNT_FREE_ATTEMPTS", 2)
+    monkeypatch.setattr(login_guard_module, "IP_FREE_ATTEMPTS", 5)
+    monkeypatch.setattr(login_guard_module, "BACKOFF_BASE_SECONDS", 1)
+    monkeypatch.setattr(login_guard_module, "BACKOFF_MAX_SECONDS", 8)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("small_allowance")
+class TestLoginGuard:
+    """Test failure counting, backoff and the local lock cache."""
+
+    async def test_free_attempts_then_lock(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that only failures past the free allowance lock the account."""
+        guard = LoginGuard(clock=fake_clock)
+
+        for _ in range(2):
+            assert await guard.retry_after(redis_client, "a@x.com", "1.1.1.1") == 0
+            await guard.record_failure(redis_client, "a@x.com", "1.1.1.1")
+        assert await guard.retry_after(redis_client, "a@x.com", "1.1.1.1") == 0
+
+        await guard.record_failure(redis_client, "a@x.com", "1.1.1.1")
+        assert 0 < await guard.retry_after(redis_client, "a@x.com", "1.1.1.1") <= 1
+
+    async def test_counters_expire(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that counter keys carry the failure window as TTL."""
+        guard = LoginGuard(clock=fake_clock)
+        await guard.record_failure(redis_client, "a@x.com", "1.1.1.1")
+
+        for key in (f"{ACCOUNT_KEY_PREFIX}a@x.com", f"{IP_KEY_PREFIX}1.1.1.1"):
+            ttl = await redis_client.pttl(key)
+            assert 0 < ttl <= login_guard_module.FAILURE_WINDOW_SECONDS * 1000
+
+    async def test_lock_durations(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test the per-failure lock lengths returned by the failure script."""
+        guard = LoginGuard(clock=fake_clock)
+
+        waits = []
+        for _ in range(7):
+            await guard.record_failure(redis_client, "a@x.com", "1.1.1.1")
+            waits.append(guard._local_wait([f"{ACCOUNT_KEY_PREFIX}a@x.com"]))
+        assert waits == [0, 0, 1, 2, 4, 8, 8]
+
+    async def test_local_cache_rejects_without_redis(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that a known lock is served from the local cache."""
+        guard = LoginGuard(clock=fake_clock)
+        for _ in range(3):
+            await guard.record_failure(redis_client, "a@x.com", "1.1.1.1")
+
+        assert await guard.retry_after(BrokenRedis(), "a@x.com", "1.1.1.1") > 0
+        assert guard.local_rejections == 1
+        assert guard.redis_errors == 0
+
+        fake_clock.now += 2
+        assert await guard.retry_after(BrokenRedis(), "a@x.com", "1.1.1.1") == 0
+        assert guard.stats()["locally_locked_keys"] == 0
+
+    async def test_lock_from_another_worker(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that a lock recorded by one worker is enforced and cached by another."""
+        first = LoginGuard(clock=fake_clock)
+        second = LoginGuard(clock=fake_clock)
+        for _ in range(3):
+            await first.record_failure(redis_client, "a@x.com", "1.1.1.1")
+
+        assert await second.retry_after(redis_client, "a@x.com", "2.2.2.2") > 0
+        assert second.redis_rejections == 1
+        assert await second.retry_after(redis_client, "a@x.com", "2.2.2.2") > 0
+        assert second.local_rejections == 1
+
+    async def test_account_lock_does_not_lock_ip(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that hitting a locked account only caches the account lock, not the caller's IP."""
+        first = LoginGuard(clock=fake_clock)
+        second = LoginGuard(clock=fake_clock)
+        for _ in range(3):
+            await first.record_failure(redis_client, "victim@x.com", "6.6.6.6")
+
+        assert await second.retry_after(redis_client, "victim@x.com", "2.2.2.2") > 0
+
+        assert second._local_wait([f"{IP_KEY_PREFIX}2.2.2.2"]) == 0
+        assert await second.retry_after(BrokenRedis(), "other@x.com", "2.2.2.2") == 0
+
+    async def test_email_is_normalized(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that case and surrounding spaces do not yield separate counters."""
+        guard = LoginGuard(clock=fake_clock)
+        for email in ("A@x.com", " a@X.com", "a@x.com "):
+            await guard.record_failure(redis_client, email, "1.1.1.1")
+
+        assert await redis_client.hget(f"{ACCOUNT_KEY_PREFIX}a@x.com", "count") == b"3"
+
+    async def test_success_clears_account_but_not_ip(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that a successful login resets the account counter only."""
+        guard = LoginGuard(clock=fake_clock)
+        for _ in range(2):
+            await guard.record_failure(redis_client, "a@x.com", "1.1.1.1")
+
+        await guard.record_success(redis_client, "a@x.com")
+
+        assert not await redis_client.exists(f"{ACCOUNT_KEY_PREFIX}a@x.com")
+        assert await redis_client.hget(f"{IP_KEY_PREFIX}1.1.1.1", "count") == b"2"
+
+    async def test_ip_lock_covers_other_accounts(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that spraying many accounts from one IP locks the IP."""
+        guard = LoginGuard(clock=fake_clock)
+        for i in range(6):
+            await guard.record_failure(redis_client, f"user{i}@x.com", "1.1.1.1")
+
+        assert await guard.retry_after(redis_client, "fresh@x.com", "1.1.1.1") > 0
+        assert await guard.retry_after(redis_client, "fresh@x.com", "2.2.2.2") == 0
+
+    async def test_rotating_forwarded_for_keeps_ip_counter(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that spraying accounts with a new X-Forwarded-For per attempt still locks the IP."""
+        guard = LoginGuard(clock=fake_clock)
+        for i in range(6):
+            request = Request({
+                "type": "http",
+                "headers": [(b"x-forwarded-for", f"198.51.100.{i}".encode())],
+                "client": ("203.0.113.7", 4321),
+            })
+            await guard.record_failure(redis_client, f"user{i}@x.com", client_ip(request))
+
+        assert await redis_client.hget(f"{IP_KEY_PREFIX}203.0.113.7", "count") == b"6"
+        assert await guard.retry_after(redis_client, "fresh@x.com", "203.0.113.7") > 0
+
+    async def test_fails_open(self, fake_clock):
+        """Test that Redis errors allow the attempt."""
+        guard = LoginGuard(clock=fake_clock)
+
+        await guard.record_failure(BrokenRedis(), "a@x.com", "1.1.1.1")
+        await guard.record_success(BrokenRedis(), "a@x.com")
+        assert await guard.retry_after(BrokenRedis(), "a@x.com", "1.1.1.1") == 0
+        assert guard.redis_errors == 3
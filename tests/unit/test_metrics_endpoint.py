@@ -0,0 +1,57 @@
+"""
+Unit tests for the access gate of app/api/endpoints/metrics.py
+"""
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.dependencies import get_current_user
+from app.api.endpoints import metrics
+from app.schemas.user import CurrentUser
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.include_router(metrics.router, prefix="/api/metrics")
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(id=1, email="Ops@Example.com")
+    return app
+
+
+async def get_metrics(app):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get("/api/metrics/")
+
+
+@pytest.mark.asyncio
+class TestMetricsAccess:
+    """Test that the metrics endpoint is disabled by default and admin-only."""
+
+    async def test_disabled_by_default(self, app, monkeypatch):
+        """Test that the endpoint answers 404 while METRICS_ENABLED is off."""
+        monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+        monkeypatch.setattr(metrics, "METRICS_ADMIN_EMAILS", frozenset({"ops@example.com"}))
+
+        response = await get_metrics(app)
+
+        assert response.status_code == 404
+
+    async def test_non_admin_forbidden(self, app, monkeypatch):
+        """Test that an authenticated user not listed in METRICS_ADMIN_EMAILS gets 403."""
+        monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+        monkeypatch.setattr(metrics, "METRICS_ADMIN_EMAILS", frozenset({"someone@example.com"}))
+
+        response = await get_metrics(app)
+
+        assert response.status_code == 403
+
+    async def test_admin_allowed(self, app, monkeypatch):
+        """Test that a listed user (case-insensitive) reads the stats."""
+        monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+        monkeypatch.setattr(metrics, "METRICS_ADMIN_EMAILS", frozenset({"ops@example.com"}))
+
+        response = await get_metrics(app)
+
+        assert response.status_code == 200
+        assert "stats" in response.json()
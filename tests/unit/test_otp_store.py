@@ -0,0 +1,98 @@
+"""
+Unit tests for app/core/otp_store.py
+
+Runs the Lua verify script against FakeAsyncRedis (requires fakeredis[lua]).
+"""
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.core.otp_store import (
+    issue_otp,
+    verify_otp_code,
+    record_failed_attempt,
+    consume_otp,
+    otp_digest,
+    KEY_PREFIX,
+    OTP_OK,
+    OTP_MISMATCH,
+    OTP_LOCKED,
+    OTP_MISSING,
+)
+
+EMAIL = "reset@example.com"
+
+
+async def _issue(redis: FakeAsyncRedis, require_totp: bool = False):
+    await issue_otp(redis, email=EMAIL, otp="123456", user_id=7, token_version=3, require_totp=require_totp)
+
+
+class TestOTPDigest:
+    """Test the keyed OTP digest."""
+
+    def test_digest_is_deterministic_and_case_insensitive(self):
+        assert otp_digest("A@B.com", "123456") == otp_digest("a@b.com", "123456")
+
+    def test_digest_depends_on_code_and_email(self):
+        assert otp_digest(EMAIL, "123456") != otp_digest(EMAIL, "654321")
+        assert otp_digest(EMAIL, "123456") != otp_digest("other@example.com", "123456")
+
+
+@pytest.mark.asyncio
+class TestOTPStore:
+    """Test issue/verify/lockout semantics."""
+
+    async def test_valid_code_returns_record_and_is_single_use(self, redis_client: FakeAsyncRedis):
+        """Test that a correct code succeeds once and is then consumed."""
+        await _issue(redis_client)
+
+        status, record = await verify_otp_code(redis_client, EMAIL, "123456")
+        assert status == OTP_OK
+        assert record.user_id == 7
+        assert record.token_version == 3
+        assert record.require_totp is False
+
+        status, record = await verify_otp_code(redis_client, EMAIL, "123456")
+        assert status == OTP_MISSING
+        assert record is None
+
+    async def test_wrong_code_counts_attempts_until_locked(self, redis_client: FakeAsyncRedis):
+        """Test that max_attempts wrong codes lock the record, even for the right code."""
+        await _issue(redis_client)
+
+        for _ in range(3):
+            status, _ = await verify_otp_code(redis_client, EMAIL, "000000", max_attempts=3)
+            assert status == OTP_MISMATCH
+
+        status, _ = await verify_otp_code(redis_client, EMAIL, "123456", max_attempts=3)
+        assert status == OTP_LOCKED
+
+    async def test_record_expires_with_ttl(self, redis_client: FakeAsyncRedis):
+        """Test that records are created with a TTL."""
+        await _issue(redis_client)
+
+        assert 0 < await redis_client.ttl(f"{KEY_PREFIX}{EMAIL}") <= 600
+
+    async def test_totp_records_are_kept_until_consumed(self, redis_client: FakeAsyncRedis):
+        """Test that records needing TOTP survive the OTP check for a retry."""
+        await _issue(redis_client, require_totp=True)
+
+        status, record = await verify_otp_code(redis_client, EMAIL, "123456")
+        assert status == OTP_OK
+        assert record.require_totp is True
+
+        await record_failed_attempt(redis_client, EMAIL)
+        assert int(await redis_client.hget(f"{KEY_PREFIX}{EMAIL}", "attempts")) == 1
+
+        assert await consume_otp(redis_client, EMAIL) is True
+        assert await consume_otp(redis_client, EMAIL) is False
+
+    async def test_reissue_replaces_previous_code(self, redis_client: FakeAsyncRedis):
+        """Test that a new start invalidates the old code and resets attempts."""
+        await _issue(redis_client)
+        await verify_otp_code(redis_client, EMAIL, "000000")
+        await issue_otp(redis_client, email=EMAIL, otp="999999", user_id=7, token_version=3, require_totp=False)
+
+        status, _ = await verify_otp_code(redis_client, EMAIL, "123456")
+        assert status == OTP_MISMATCH
+        assert int(await redis_client.hget(f"{KEY_PREFIX}{EMAIL}", "attempts")) == 1
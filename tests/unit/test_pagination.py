@@ -0,0 +1,116 @@
+"""
+Unit tests for app/api/pagination.py
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.pagination import Keyset, NEXT_CURSOR_HEADER
+from app.models.api_access_log import APIAccessLog
+from app.models.team import Team
+
+TEAMS = Keyset("teams", Team.id)
+ACCESS_LOGS = Keyset("access_logs", APIAccessLog.created_at, APIAccessLog.id, descending=True)
+
+
+def sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+class TestCursorCodec:
+    """Test cursor encoding and validation."""
+
+    def test_round_trip(self):
+        """Test that sort key values survive encoding, datetimes included."""
+        created_at = datetime(2026, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)
+
+        cursor = ACCESS_LOGS.encode([created_at, 42])
+
+        assert ACCESS_LOGS.decode(cursor) == (created_at, 42)
+        assert "=" not in cursor
+
+    def test_cursor_from_other_endpoint_rejected(self):
+        """Test that a cursor only resumes the endpoint that issued it."""
+        cursor = Keyset("organizations", Team.id).encode([5])
+
+        with pytest.raises(HTTPException) as exc:
+            TEAMS.decode(cursor)
+        assert exc.value.status_code == 400
+
+    @pytest.mark.parametrize("keyset,cursor", [
+        (TEAMS, "not base64!"),
+        (TEAMS, "e30"),  # {}
+        (TEAMS, TEAMS.encode(["5"])),
+        (TEAMS, TEAMS.encode([True])),
+        (TEAMS, "A" * 1000),
+        (ACCESS_LOGS, ACCESS_LOGS.encode(["yesterday", 1])),
+        (ACCESS_LOGS, ACCESS_LOGS.encode([1])),
+    ])
+    def test_malformed_cursor_rejected(self, keyset, cursor):
+        """Test that malformed cursors are a 400, not a 500."""
+        with pytest.raises(HTTPException) as exc:
+            keyset.decode(cursor)
+        assert exc.value.status_code == 400
+
+
+class TestPaginate:
+    """Test the SQL produced for offset and keyset pages."""
+
+    def test_offset_page(self):
+        """Test that skip/limit still work and fetch one extra row."""
+        compiled = TEAMS.paginate(select(Team), None, skip=20, limit=10).compile(dialect=postgresql.dialect())
+
+        assert "ORDER BY teams.id ASC" in str(compiled)
+        assert sorted(compiled.params.values()) == [11, 20]
+
+    def test_single_column_keyset(self):
+        """Test that an ascending single-column cursor filters on id >."""
+        query = sql(TEAMS.paginate(select(Team), TEAMS.encode([7]), skip=0, limit=10))
+
+        assert "WHERE teams.id > " in query
+
+    def test_row_comparison_keyset(self):
+        """Test that a descending two-column cursor uses a row comparison the index can range-scan."""
+        cursor = ACCESS_LOGS.encode([datetime(2026, 1, 1, tzinfo=timezone.utc), 99])
+
+        query = sql(ACCESS_LOGS.paginate(select(APIAccessLog), cursor, skip=0, limit=10))
+
+        assert "(api_access_logs.created_at, api_access_logs.id) < (" in query
+        assert "ORDER BY api_access_logs.created_at DESC, api_access_logs.id DESC" in query
+
+
+class TestPage:
+    """Test trimming the extra row and issuing the next cursor."""
+
+    def test_next_cursor_when_more_rows(self):
+        """Test that X-Next-Cursor points after the last row returned."""
+        rows = [SimpleNamespace(id=i) for i in (1, 2, 3)]
+        response = Response()
+
+        page = TEAMS.page(rows, 2, response)
+
+        assert [r.id for r in page] == [1, 2]
+        assert TEAMS.decode(response.headers[NEXT_CURSOR_HEADER]) == (2,)
+
+    def test_no_cursor_on_last_page(self):
+        """Test that the last page has no X-Next-Cursor."""
+        response = Response()
+
+        page = TEAMS.page([SimpleNamespace(id=1)], 2, response)
+
+        assert len(page) == 1
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+    def test_key_for_multi_entity_rows(self):
+        """Test that key picks the entity holding the sort columns."""
+        rows = [(SimpleNamespace(id=i), "count") for i in (4, 5)]
+        response = Response()
+
+        TEAMS.page(rows, 1, response, key=lambda row: row[0])
+
+        assert TEAMS.decode(response.headers[NEXT_CURSOR_HEADER]) == (4,)
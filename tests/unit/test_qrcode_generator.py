@@ -0,0 +1,85 @@
+"""
+Unit tests for app/helpers/qrcode_generator.py
+
+Tests PNG/SVG QR code rendering without database.
+"""
+
+import base64
+import re
+
+import pytest
+
+from app.helpers.qrcode_generator import (
+    generate_qr_code_data_url,
+    generate_qr_code_svg,
+    generate_qr_matrix,
+    render_qr_code,
+)
+
+OTPAUTH_URI = "otpauth://totp/Application:user%40example.com?secret=JBSWY3DPEHPK3PXP&issuer=Application"
+
+
+def _svg_dark_cells(svg: str) -> set:
+    """Rebuild the set of dark modules from the SVG path commands."""
+    path = re.search(r'<path d="M0 \.5([^"]*)"', svg).group(1)
+    cells = set()
+    x, y = 0, 0
+    for dx, dy, run in re.findall(r"m(-?\d+) (-?\d+)h(\d+)", path):
+        x, y = x + int(dx), y + int(dy)
+        for i in range(int(run)):
+            cells.add((x + i, y))
+        x += int(run)
+    return cells
+
+
+class TestQRCodeSVG:
+    """Test the pure-Python SVG output."""
+
+    def test_svg_matches_matrix(self):
+        """Test every dark module of the matrix is drawn, and nothing else."""
+        matrix = generate_qr_matrix(OTPAUTH_URI, border=4)
+        expected = {(x, y) for y, row in enumerate(matrix) for x, dark in enumerate(row) if dark}
+
+        svg = generate_qr_code_svg(OTPAUTH_URI, border=4)
+
+        assert _svg_dark_cells(svg) == expected
+
+    def test_svg_size_scales_with_box_size(self):
+        """Test box_size only changes the declared pixel size."""
+        size = len(generate_qr_matrix(OTPAUTH_URI, border=4))
+        small = generate_qr_code_svg(OTPAUTH_URI, box_size=2)
+        large = generate_qr_code_svg(OTPAUTH_URI, box_size=20)
+
+        assert f'width="{size * 20}"' in large
+        assert f'viewBox="0 0 {size} {size}"' in large
+        assert len(large) - len(small) < 10
+
+
+class TestQRCodeDataURL:
+    """Test data URL rendering."""
+
+    def test_png_data_url(self):
+        """Test PNG data URL decodes to a PNG image."""
+        url = generate_qr_code_data_url(OTPAUTH_URI, fmt="png")
+        assert url.startswith("data:image/png;base64,")
+        assert base64.b64decode(url.split(",", 1)[1]).startswith(b"\x89PNG")
+
+    def test_svg_data_url(self):
+        """Test SVG data URL decodes to SVG markup."""
+        url = generate_qr_code_data_url(OTPAUTH_URI, fmt="svg")
+        assert url.startswith("data:image/svg+xml;base64,")
+        assert base64.b64decode(url.split(",", 1)[1]).startswith(b"<svg")
+
+    def test_invalid_format(self):
+        """Test unknown formats are rejected."""
+        with pytest.raises(ValueError):
+            generate_qr_code_data_url(OTPAUTH_URI, fmt="gif")
+
+
+@pytest.mark.asyncio
+class TestRenderQRCode:
+    """Test the non-blocking wrapper."""
+
+    async def test_render_matches_sync(self):
+        """Test render_qr_code returns the same data URL as the sync helper."""
+        assert await render_qr_code(OTPAUTH_URI, fmt="svg") == generate_qr_code_data_url(OTPAUTH_URI, fmt="svg")
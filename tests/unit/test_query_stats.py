@@ -0,0 +1,134 @@
+"""
+Unit tests for app/db/query_stats.py
+
+Statements run on an in-memory SQLite engine; the listeners are attached to
+the Engine class, so any engine is instrumented.
+"""
+
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db.query_stats import QueryRecorder, QueryStatsMiddleware, capture_queries, statement_shape
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+class TestQueryRecorder:
+    """Test counting and grouping of statements."""
+
+    def test_statement_shape(self):
+        """Test that formatting differences do not split a shape."""
+        assert statement_shape("SELECT *\n  FROM users\n WHERE id = $1") == "SELECT * FROM users WHERE id = $1"
+
+    def test_capture_counts_statements(self, engine):
+        """Test that every execution is counted and timed."""
+        with engine.connect() as conn, capture_queries() as queries:
+            for i in range(3):
+                conn.execute(text("SELECT :n"), {"n": i})
+            conn.execute(text("SELECT 1 + 1"))
+
+        assert queries.count == 4
+        assert queries.total_ms >= 0
+        assert queries.duplicates == 2
+        assert queries.repeated() == [("SELECT ?", 3)]
+
+    def test_nothing_recorded_outside_capture(self, engine):
+        """Test that statements outside a capture block are ignored."""
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            with capture_queries() as queries:
+                conn.execute(text("SELECT 2"))
+            conn.execute(text("SELECT 3"))
+
+        assert queries.count == 1
+
+    def test_nested_captures(self, engine):
+        """Test that an inner capture's statements also count in the outer one."""
+        with engine.connect() as conn, capture_queries() as outer:
+            conn.execute(text("SELECT 1"))
+            with capture_queries() as inner:
+                conn.execute(text("SELECT 2"))
+
+        assert inner.count == 1
+        assert outer.count == 2
+
+    def test_failed_statement_not_recorded(self, engine):
+        """Test that a failing statement does not leave a start time behind."""
+        with engine.connect() as conn, capture_queries() as queries:
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+            assert not conn.info.get("query_start")
+
+        assert queries.count == 1
+
+    def test_report(self):
+        """Test that the report lists shapes by frequency."""
+        recorder = QueryRecorder()
+        recorder.record("SELECT 1", 1.0)
+        recorder.record("SELECT 2", 1.0)
+        recorder.record("SELECT 2", 1.0)
+
+        lines = recorder.report().splitlines()
+        assert lines[0] == "3 statement(s), 3.0ms"
+        assert lines[1:] == ["  2x SELECT 2", "  1x SELECT 1"]
+
+
+@pytest.mark.asyncio
+class TestQueryStatsMiddleware:
+    """Test response headers and N+1 warnings."""
+
+    @staticmethod
+    async def call(middleware_kwargs, engine, statements):
+        async def app(scope, receive, send):
+            with engine.connect() as conn:
+                for statement in statements:
+                    conn.execute(text(statement))
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/api/things", "headers": []}
+        await QueryStatsMiddleware(app, **middleware_kwargs)(scope, None, send)
+        return sent
+
+    async def test_headers(self, engine):
+        """Test that the counts reach the response headers."""
+        sent = await self.call({"headers": True}, engine, ["SELECT 1", "SELECT 1", "SELECT 2"])
+
+        headers = dict(sent[0]["headers"])
+        assert headers[b"x-db-queries"] == b"3"
+        assert headers[b"x-db-duplicates"] == b"1"
+        assert b"x-db-time-ms" in headers
+
+    async def test_headers_disabled(self, engine):
+        """Test that production responses carry no X-DB-* headers."""
+        sent = await self.call({"headers": False}, engine, ["SELECT 1"])
+
+        assert sent[0]["headers"] == []
+
+    async def test_n_plus_one_logged(self, engine, caplog):
+        """Test that a shape repeated past the threshold is logged with the route."""
+        with caplog.at_level(logging.WARNING, logger="app.db.query_stats"):
+            await self.call({"n_plus_one_threshold": 3}, engine, ["SELECT 1"] * 3 + ["SELECT 2"] * 2)
+
+        warnings = [r.getMessage() for r in caplog.records]
+        assert warnings == ["Probable N+1 in GET /api/things: 3x SELECT 1"]
+
+    async def test_requests_are_isolated(self, engine):
+        """Test that each request starts its own count."""
+        await self.call({"headers": True}, engine, ["SELECT 1"] * 4)
+        sent = await self.call({"headers": True}, engine, ["SELECT 1"])
+
+        assert dict(sent[0]["headers"])[b"x-db-queries"] == b"1"
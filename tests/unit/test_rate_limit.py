@@ -0,0 +1,154 @@
+"""
+Unit tests for app/core/rate_limit.py
+
+Uses FakeAsyncRedis instead of a real Redis server.
+"""
+
+import ipaddress
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from starlette.requests import Request
+
+from app.core import rate_limit as rate_limit_module
+from app.core.rate_limit import RateLimiter, RateLimitPolicy, KEY_PREFIX, client_ip
+
+
+class BrokenRedis:
+    """Redis stand-in whose calls always fail."""
+
+    async def eval(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+
+@pytest.mark.asyncio
+class TestRateLimiter:
+    """Test GCRA decisions and the local pre-filter."""
+
+    async def test_allows_burst_then_rejects(self, redis_client: FakeAsyncRedis):
+        """Test that exactly `limit` requests pass in a burst."""
+        limiter = RateLimiter()
+        policy = RateLimitPolicy("test", limit=5, period=900)
+
+        results = [await limiter.hit(redis_client, policy, "a") for _ in range(6)]
+
+        assert [r.allowed for r in results] == [True] * 5 + [False]
+        assert [r.remaining for r in results[:5]] == [4, 3, 2, 1, 0]
+        assert 0 < results[5].retry_after <= 180
+
+    async def test_keys_are_independent(self, redis_client: FakeAsyncRedis):
+        """Test that one identity exhausting its limit does not affect another."""
+        limiter = RateLimiter()
+        policy = RateLimitPolicy("test", limit=1, period=60)
+
+        assert (await limiter.hit(redis_client, policy, "a")).allowed
+        assert not (await limiter.hit(redis_client, policy, "a")).allowed
+        assert (await limiter.hit(redis_client, policy, "b")).allowed
+
+    async def test_key_expires_with_window(self, redis_client: FakeAsyncRedis):
+        """Test that the Redis key TTL is bounded by the burst window."""
+        limiter = RateLimiter()
+        policy = RateLimitPolicy("test", limit=5, period=10)
+
+        for _ in range(20):
+            await limiter.hit(redis_client, policy, "a")
+
+        ttl_ms = await redis_client.pttl(f"{KEY_PREFIX}test:a")
+        assert 0 < ttl_ms <= 10000
+
+    async def test_state_shared_across_workers(self, redis_client: FakeAsyncRedis):
+        """Test that limits are global even though pre-filters are per worker."""
+        worker_a, worker_b = RateLimiter(), RateLimiter()
+        policy = RateLimitPolicy("test", limit=4, period=60)
+
+        for _ in range(2):
+            assert (await worker_a.hit(redis_client, policy, "a")).allowed
+            assert (await worker_b.hit(redis_client, policy, "a")).allowed
+
+        assert not (await worker_a.hit(redis_client, policy, "a")).allowed
+        assert worker_a.redis_rejections == 1
+
+    async def test_local_prefilter_skips_redis(self, redis_client: FakeAsyncRedis):
+        """Test that a client over its local bucket is rejected without Redis."""
+        limiter = RateLimiter()
+        policy = RateLimitPolicy("test", limit=3, period=60)
+
+        for _ in range(3):
+            await limiter.hit(redis_client, policy, "a")
+        # Repeat rejections are answered locally
+        for _ in range(5):
+            assert not (await limiter.hit(redis_client, policy, "a")).allowed
+
+        assert limiter.local_rejections == 5
+        assert limiter.redis_rejections == 0
+
+    async def test_redis_rejection_blocks_locally(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that a Redis rejection is remembered until retry_after."""
+        worker_a, worker_b = RateLimiter(clock=fake_clock), RateLimiter()
+        policy = RateLimitPolicy("test", limit=2, period=60)
+
+        for _ in range(2):
+            await worker_b.hit(redis_client, policy, "a")
+        rejected = await worker_a.hit(redis_client, policy, "a")
+        assert not rejected.allowed and worker_a.redis_rejections == 1
+
+        assert not (await worker_a.hit(redis_client, policy, "a")).allowed
+        assert worker_a.local_rejections == 1
+
+        fake_clock.now += rejected.retry_after + 0.01
+        await redis_client.delete(f"{KEY_PREFIX}test:a")
+        assert (await worker_a.hit(redis_client, policy, "a")).allowed
+
+    async def test_local_bucket_refills(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that local tokens come back at the sustained rate."""
+        limiter = RateLimiter(clock=fake_clock)
+        policy = RateLimitPolicy("test", limit=2, period=60)
+
+        for _ in range(2):
+            await limiter.hit(redis_client, policy, "a")
+        assert not (await limiter.hit(redis_client, policy, "a")).allowed
+
+        fake_clock.now += 30
+        await redis_client.delete(f"{KEY_PREFIX}test:a")
+        assert (await limiter.hit(redis_client, policy, "a")).allowed
+
+    async def test_fails_open_when_redis_is_down(self):
+        """Test that Redis errors allow the request and are counted."""
+        limiter = RateLimiter()
+        policy = RateLimitPolicy("test", limit=5, period=60)
+
+        result = await limiter.hit(BrokenRedis(), policy, "a")
+
+        assert result.allowed
+        assert limiter.redis_errors == 1
+
+
+def make_request(peer: str, forwarded_for: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 12345)})
+
+
+class TestClientIp:
+    """Test which address per-IP keys are built from."""
+
+    @pytest.fixture
+    def proxies(self, monkeypatch):
+        monkeypatch.setattr(rate_limit_module, "TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/8")])
+
+    def test_forwarded_for_ignored_without_trusted_proxy(self):
+        """Test that a client-supplied X-Forwarded-For does not change the key."""
+        assert client_ip(make_request("203.0.113.7", "1.2.3.4")) == "203.0.113.7"
+
+    def test_rotating_forwarded_for_behind_proxy(self, proxies):
+        """Test that behind a trusted proxy only the hop the proxy appended counts."""
+        keys = {client_ip(make_request("10.0.0.2", f"198.51.100.{i}, 203.0.113.7")) for i in range(5)}
+
+        assert keys == {"203.0.113.7"}
+
+    def test_skips_chained_proxies(self, proxies):
+        """Test that trusted hops are skipped from the right."""
+        assert client_ip(make_request("10.0.0.2", "1.2.3.4, 203.0.113.7, 10.0.0.9")) == "203.0.113.7"
+
+    def test_untrusted_peer_claiming_proxy_chain(self, proxies):
+        """Test that a direct client cannot pose as a proxy by sending the header."""
+        assert client_ip(make_request("203.0.113.7", "10.0.0.5")) == "203.0.113.7"
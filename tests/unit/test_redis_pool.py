@@ -0,0 +1,49 @@
+"""
+Unit tests for app/core/redis_pool.py
+
+No Redis server is needed: connections are opened lazily.
+"""
+
+import pytest
+
+from app.core import redis_pool
+from app.core.metrics import collect_stats
+
+
+@pytest.mark.asyncio
+class TestRedisPool:
+    """Test shared pool lifecycle and stats."""
+
+    async def test_client_is_shared(self):
+        """Test that every caller gets the same client and pool."""
+        await redis_pool.close_redis()
+        first = redis_pool.get_redis_client()
+        second = redis_pool.get_redis_client()
+
+        assert first is second
+        assert first.connection_pool is redis_pool._pool
+        await redis_pool.close_redis()
+
+    async def test_pool_settings_applied(self):
+        """Test that size and timeouts come from settings."""
+        pool = redis_pool.create_redis_pool("redis://localhost:6379/0")
+
+        assert pool.max_connections == redis_pool.REDIS_MAX_CONNECTIONS
+        assert pool.timeout == redis_pool.REDIS_POOL_TIMEOUT
+        assert pool.connection_kwargs["health_check_interval"] == redis_pool.REDIS_HEALTH_CHECK_INTERVAL
+        assert pool.connection_kwargs["socket_timeout"] == redis_pool.REDIS_SOCKET_TIMEOUT
+        await pool.disconnect()
+
+    async def test_stats(self):
+        """Test that pool stats are registered and reflect initialization."""
+        await redis_pool.close_redis()
+        assert collect_stats()["redis_pool"] == {"initialized": False}
+
+        redis_pool.get_redis_client()
+        stats = collect_stats()["redis_pool"]
+        assert stats["initialized"] is True
+        assert stats["created"] == 0
+        assert stats["max_connections"] == redis_pool.REDIS_MAX_CONNECTIONS
+
+        await redis_pool.close_redis()
+        assert redis_pool._client is None
@@ -0,0 +1,85 @@
+"""
+Unit tests for app/core/registration.py
+
+Only the statement shape is checked here; the round trip itself is covered by
+tests/integration/auth/test_register.py.
+"""
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from app.core.registration import (
+    BulkRow, build_bulk_register_statement, build_register_statement, is_unique_violation, personal_team_name
+)
+
+
+def compile_pg(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class _PgError(Exception):
+    def __init__(self, pgcode):
+        self.pgcode = pgcode
+
+
+class TestRegisterStatement:
+    """Test the single-statement registration CTE."""
+
+    def test_one_statement_inserts_both_rows(self):
+        """Test that user and team inserts are CTEs of one SELECT."""
+        sql = compile_pg(build_register_statement("Ana", "ana@example.com", "hash"))
+
+        assert sql.count("INSERT INTO users") == 1
+        assert sql.count("INSERT INTO teams") == 1
+        assert "RETURNING users.id, users.token_version" in sql
+        assert "nextval(pg_get_serial_sequence" in sql
+        assert "UPDATE" not in sql
+
+    def test_rows_reference_each_other(self):
+        """Test that both rows take their ids from the same pre-drawn pair."""
+        sql = compile_pg(build_register_statement("Ana", "ana@example.com", "hash"))
+
+        assert "ids.user_id AS user_id" in sql
+        assert "ids.team_id AS team_id" in sql
+
+    def test_column_defaults_are_rendered(self):
+        """Test that scalar column defaults are part of the INSERT ... SELECT."""
+        sql = compile_pg(build_register_statement("Ana", "ana@example.com", "hash"))
+
+        for column in ("token_version", "two_factor_enabled", "timezone", "archived"):
+            assert column in sql
+
+    def test_values_are_bound_not_inlined(self):
+        """Test that user input only travels as bind parameters."""
+        stmt = build_register_statement("x'); DROP TABLE users; --", "a@b.c", "hash")
+        compiled = stmt.compile(dialect=postgresql.dialect())
+
+        assert "DROP TABLE" not in str(compiled)
+        assert "x'); DROP TABLE users; --" in compiled.params.values()
+        assert personal_team_name("x'); DROP TABLE users; --") in compiled.params.values()
+
+    def test_unique_violation_detection(self):
+        """Test that only SQLSTATE 23505 counts as a duplicate email."""
+        assert is_unique_violation(IntegrityError("stmt", {}, _PgError("23505")))
+        assert not is_unique_violation(IntegrityError("stmt", {}, _PgError("23503")))
+
+
+class TestBulkRegisterStatement:
+    """Test the multi-row registration statement."""
+
+    def test_skips_existing_emails(self):
+        """Test that conflicts are skipped and only inserted users get teams."""
+        rows = [BulkRow(2, "Ana", "ana@example.com", "h"), BulkRow(3, "Bia", "bia@example.com", "h", "admin")]
+        sql = compile_pg(build_bulk_register_statement(rows))
+
+        assert sql.count("INSERT INTO users") == 1
+        assert "ON CONFLICT (email) DO NOTHING" in sql
+        assert "FROM ids JOIN new_user ON new_user.id = ids.user_id" in sql
+        assert "INSERT INTO organization_members" not in sql
+
+    def test_membership_with_organization(self):
+        """Test that an organization id adds a membership insert."""
+        sql = compile_pg(build_bulk_register_statement([BulkRow(2, "Ana", "a@b.c", "h")], organization_id=5))
+
+        assert "INSERT INTO organization_members" in sql
+        assert sql.strip().endswith("SELECT inserted.line \nFROM inserted")
@@ -0,0 +1,215 @@
+"""
+Unit tests for app/db/replicas.py
+
+Replicas are stand-ins with a scripted lag; Redis is FakeAsyncRedis.
+"""
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from starlette.requests import Request
+
+from app.core.security import create_access_token
+from app.db import replicas as replicas_module
+from app.db.replicas import ReadYourWritesMiddleware, Replica, ReplicaRouter, STICKY_KEY_PREFIX, client_key
+
+
+class ScriptedReplica(Replica):
+    """Replica whose lag check returns (or raises) a preset value."""
+
+    def __init__(self, name: str, lag=0.0):
+        super().__init__(name, engine=None, session_factory=None)
+        self.next_lag = lag
+
+    async def measure_lag(self):
+        if isinstance(self.next_lag, Exception):
+            raise self.next_lag
+        return self.next_lag
+
+
+class BrokenRedis:
+    """Redis stand-in whose calls always fail."""
+
+    async def set(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+    async def exists(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+
+def make_request(headers=None, client=("10.0.0.1", 1234), method="GET"):
+    return Request({
+        "type": "http",
+        "method": method,
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": client,
+    })
+
+
+@pytest.mark.asyncio
+class TestReplicaRouting:
+    """Test replica choice, lag checks and fallback to the primary."""
+
+    async def test_disabled_without_replicas(self, redis_client: FakeAsyncRedis):
+        """Test that without replicas every read stays on the primary, uncounted."""
+        router = ReplicaRouter([])
+
+        assert not router.enabled
+        assert await router.route(redis_client, "user:1") is None
+        assert router.primary_reads == 0
+
+    async def test_unchecked_replica_is_not_used(self, redis_client: FakeAsyncRedis):
+        """Test that a replica is skipped until its first lag check succeeds."""
+        router = ReplicaRouter([ScriptedReplica("r1")])
+
+        assert await router.route(redis_client, "user:1") is None
+        assert router.fallbacks == 1
+
+        await router.check_lag()
+        assert await router.route(redis_client, "user:1") is router.replicas[0]
+        assert router.replica_reads == 1
+
+    async def test_round_robin_over_usable_replicas(self, redis_client: FakeAsyncRedis):
+        """Test that reads alternate between replicas within the lag limit."""
+        r1, r2, lagging = ScriptedReplica("r1", 0.5), ScriptedReplica("r2", 0.0), ScriptedReplica("r3", 30.0)
+        router = ReplicaRouter([r1, r2, lagging], max_lag=5)
+        await router.check_lag()
+
+        chosen = [await router.route(redis_client, "user:1") for _ in range(4)]
+
+        assert chosen == [r1, r2, r1, r2]
+        assert lagging.reads == 0
+        assert r1.reads == r2.reads == 2
+
+    async def test_lag_and_errors_fall_back_to_primary(self, redis_client: FakeAsyncRedis):
+        """Test that a lagging or unreachable replica sends reads to the primary until it recovers."""
+        replica = ScriptedReplica("r1", 60.0)
+        router = ReplicaRouter([replica], max_lag=5)
+
+        await router.check_lag()
+        assert await router.route(redis_client, "user:1") is None
+
+        replica.next_lag = ConnectionError("replica down")
+        await router.check_lag()
+        assert replica.lag is None
+        assert replica.check_failures == 1
+        assert "replica down" in replica.last_error
+        assert await router.route(redis_client, "user:1") is None
+
+        replica.next_lag = 1.0
+        await router.check_lag()
+        assert replica.last_error is None
+        assert await router.route(redis_client, "user:1") is replica
+
+    async def test_mark_failed_takes_replica_out(self, redis_client: FakeAsyncRedis):
+        """Test that a failed connection moves the read to the primary and disables the replica."""
+        replica = ScriptedReplica("r1")
+        router = ReplicaRouter([replica])
+        await router.check_lag()
+
+        assert await router.route(redis_client, "user:1") is replica
+        router.mark_failed(replica, ConnectionError("refused"))
+
+        assert router.replica_reads == 0
+        assert router.primary_reads == 1
+        assert await router.route(redis_client, "user:1") is None
+
+
+@pytest.mark.asyncio
+class TestReadYourWrites:
+    """Test that writes pin a client's reads to the primary."""
+
+    async def test_write_pins_client_until_window_ends(self, redis_client: FakeAsyncRedis, fake_clock):
+        """Test that only the writing client is pinned, and only for sticky_seconds."""
+        router = ReplicaRouter([ScriptedReplica("r1")], sticky_seconds=10, clock=fake_clock)
+        await router.check_lag()
+
+        await router.mark_write(redis_client, "user:1")
+
+        assert await router.route(redis_client, "user:1") is None
+        assert router.sticky_reads == 1
+        assert await router.route(redis_client, "user:2") is router.replicas[0]
+        assert 0 < await redis_client.pttl(f"{STICKY_KEY_PREFIX}user:1") <= 10000
+
+        fake_clock.now += 11
+        await redis_client.delete(f"{STICKY_KEY_PREFIX}user:1")
+        assert await router.route(redis_client, "user:1") is router.replicas[0]
+
+    async def test_pin_from_another_worker(self, redis_client: FakeAsyncRedis):
+        """Test that a pin recorded by another worker is found in Redis."""
+        other_worker = ReplicaRouter([ScriptedReplica("r1")])
+        router = ReplicaRouter([ScriptedReplica("r1")])
+
+        await other_worker.mark_write(redis_client, "user:1")
+
+        assert await router.is_sticky(redis_client, "user:1")
+        assert not await router.is_sticky(redis_client, "user:2")
+
+    async def test_redis_errors_read_from_primary(self):
+        """Test that when Redis cannot be asked the read goes to the primary."""
+        router = ReplicaRouter([ScriptedReplica("r1")])
+        await router.check_lag()
+
+        await router.mark_write(BrokenRedis(), "user:1")
+        assert await router.is_sticky(BrokenRedis(), "user:1")
+        assert await router.is_sticky(BrokenRedis(), "user:2")
+        assert router.redis_errors == 2
+
+
+class TestClientKey:
+    """Test the identity used for read-your-writes."""
+
+    def test_bearer_token_user(self):
+        """Test that authenticated requests are keyed by user, whatever the IP."""
+        token = create_access_token({"sub": "42"}, token_version=0)
+
+        key = client_key(make_request({"Authorization": f"Bearer {token}"}))
+
+        assert key == "user:42"
+
+    def test_anonymous_or_invalid_token_uses_ip(self):
+        """Test that requests without a valid token are keyed by client IP."""
+        assert client_key(make_request()) == "ip:10.0.0.1"
+        assert client_key(make_request({"Authorization": "Bearer not-a-jwt"})) == "ip:10.0.0.1"
+        # X-Forwarded-For is not trusted unless the peer is a TRUSTED_PROXIES entry
+        assert client_key(make_request({"X-Forwarded-For": "1.2.3.4, 10.0.0.1"})) == "ip:10.0.0.1"
+
+
+@pytest.mark.asyncio
+class TestReadYourWritesMiddleware:
+    """Test which responses pin the client."""
+
+    @pytest.fixture
+    def router(self, redis_client, monkeypatch):
+        monkeypatch.setattr(replicas_module, "get_redis_client", lambda: redis_client)
+        return ReplicaRouter([ScriptedReplica("r1")])
+
+    @staticmethod
+    async def call(router, method, status):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": status, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": method, "path": "/", "headers": [], "client": ("10.0.0.1", 1)}
+        await ReadYourWritesMiddleware(app, router=router)(scope, None, send)
+        return sent
+
+    async def test_successful_write_pins(self, router, redis_client: FakeAsyncRedis):
+        """Test that a successful POST pins the client in Redis before the response is sent."""
+        sent = await self.call(router, "POST", 201)
+
+        assert len(sent) == 2
+        assert router.writes_marked == 1
+        assert await redis_client.exists(f"{STICKY_KEY_PREFIX}ip:10.0.0.1")
+
+    @pytest.mark.parametrize("method,status", [("GET", 200), ("HEAD", 200), ("POST", 400), ("DELETE", 404)])
+    async def test_reads_and_failed_writes_do_not_pin(self, router, method, status):
+        """Test that safe methods and rejected writes leave the client unpinned."""
+        await self.call(router, method, status)
+
+        assert router.writes_marked == 0
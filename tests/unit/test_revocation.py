@@ -0,0 +1,124 @@
+"""
+Unit tests for app/helpers/bloom.py and app/core/revocation.py
+
+Uses FakeAsyncRedis instead of a real Redis server.
+"""
+
+import time
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.helpers.bloom import BloomFilter
+from app.core import revocation as revocation_module
+from app.core.revocation import (
+    RevocationFilter,
+    revoke_token,
+    is_revoked,
+    token_id,
+    REVOKED_INDEX_KEY,
+)
+
+
+class TestBloomFilter:
+    """Test Bloom filter membership and sizing."""
+
+    def test_added_items_are_members(self):
+        """Test that there are no false negatives."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [f"jti-{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        assert all(item in bloom for item in items)
+
+    def test_false_positive_rate_near_target(self):
+        """Test that the observed FPR stays close to the configured rate."""
+        bloom = BloomFilter.from_items((f"in-{i}" for i in range(5000)), capacity=5000, error_rate=0.01)
+        false_positives = sum(1 for i in range(20000) if f"out-{i}" in bloom)
+
+        assert false_positives / 20000 < 0.03
+
+    def test_stats_report_memory(self):
+        """Test that stats expose geometry and memory footprint."""
+        bloom = BloomFilter(capacity=100000, error_rate=0.001)
+        stats = bloom.stats()
+
+        assert stats["memory_bytes"] == (bloom.num_bits + 7) // 8
+        assert stats["estimated_fpr"] == 0.0
+
+    def test_invalid_error_rate(self):
+        """Test that impossible error rates are rejected."""
+        with pytest.raises(ValueError):
+            BloomFilter(error_rate=1.5)
+
+
+@pytest.mark.asyncio
+class TestRevocation:
+    """Test revoke/check round trip against fake Redis."""
+
+    async def test_revoked_token_is_detected(self, redis_client: FakeAsyncRedis):
+        """Test that a revoked jti is reported as revoked."""
+        await revoke_token(redis_client, "abc123", int(time.time()) + 60)
+
+        assert await is_revoked(redis_client, "abc123") is True
+        assert await redis_client.zscore(REVOKED_INDEX_KEY, "abc123") is not None
+
+    @pytest.fixture
+    def unloaded_filter(self, monkeypatch):
+        """Swap in a filter that has never been rebuilt from Redis."""
+        rf = RevocationFilter(capacity=100, error_rate=0.001)
+        monkeypatch.setattr(revocation_module, "revocation_filter", rf)
+        return rf
+
+    async def test_unknown_token_skips_redis(self, redis_client: FakeAsyncRedis, unloaded_filter, mocker):
+        """Test that Bloom misses are answered without touching Redis once the filter is loaded."""
+        await unloaded_filter.rebuild(redis_client)
+        spy = mocker.spy(redis_client, "exists")
+
+        assert await is_revoked(redis_client, "never-revoked-token-id") is False
+        assert not spy.called
+
+    async def test_unloaded_filter_checks_redis(self, redis_client: FakeAsyncRedis, unloaded_filter):
+        """Test that before the first rebuild a revoked token missing from the filter is still caught."""
+        await redis_client.set("revoked:from-another-worker", "1", ex=60)
+
+        assert await is_revoked(redis_client, "from-another-worker") is True
+        assert await is_revoked(redis_client, "valid") is False
+        assert unloaded_filter.unloaded_lookups == 2
+        assert unloaded_filter.false_positives == 0
+
+    async def test_unloaded_filter_fails_closed(self, unloaded_filter, mocker):
+        """Test that before the first rebuild a Redis error rejects the token."""
+        redis = mocker.Mock()
+        redis.exists = mocker.AsyncMock(side_effect=ConnectionError("redis down"))
+
+        assert await is_revoked(redis, "any") is True
+
+    async def test_expired_token_is_not_stored(self, redis_client: FakeAsyncRedis):
+        """Test that revoking an already expired token is a no-op."""
+        await revoke_token(redis_client, "old", int(time.time()) - 1)
+
+        assert await redis_client.exists("revoked:old") == 0
+
+    async def test_rebuild_drops_expired_ids(self, redis_client: FakeAsyncRedis):
+        """Test that a rebuild only keeps ids whose tokens are still alive."""
+        now = int(time.time())
+        await redis_client.zadd(REVOKED_INDEX_KEY, {"alive": now + 600, "dead": now - 600})
+
+        rf = RevocationFilter(capacity=100, error_rate=0.001)
+        await rf.rebuild(redis_client)
+
+        assert rf.might_be_revoked("alive") is True
+        assert rf.might_be_revoked("dead") is False
+
+
+class TestTokenId:
+    """Test revocation id derivation."""
+
+    def test_uses_jti_claim(self):
+        assert token_id({"jti": "xyz"}, "token") == "xyz"
+
+    def test_legacy_token_falls_back_to_digest(self):
+        first = token_id({}, "legacy.token.value")
+        assert first == token_id({}, "legacy.token.value")
+        assert first != token_id({}, "other.token.value")
@@ -0,0 +1,119 @@
+"""
+Unit tests for app/db/schema.py and the lazy sync engine in app/db/session.py
+
+The database side is stubbed; the migration head is read from migrations/.
+"""
+
+import pytest
+
+from app.db import schema as schema_module
+from app.db import session as session_module
+from app.db.schema import SchemaOutOfDate, ensure_schema, expected_heads
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Stub the alembic_version query and the migration head."""
+    state = {"current": frozenset({"head1"}), "queries": 0}
+
+    async def current_revisions(engine):
+        state["queries"] += 1
+        if isinstance(state["current"], Exception):
+            raise state["current"]
+        return state["current"]
+
+    monkeypatch.setattr(schema_module, "current_revisions", current_revisions)
+    monkeypatch.setattr(schema_module, "expected_heads", lambda migrations_dir: frozenset({"head1"}))
+    monkeypatch.setattr(schema_module, "schema_status", schema_module.SchemaStatus())
+    return state
+
+
+@pytest.mark.asyncio
+class TestEnsureSchema:
+    """Test the startup schema modes."""
+
+    async def test_check_at_head(self, database):
+        """Test that a database at the head passes with a single query."""
+        await ensure_schema(engine=None, mode="check")
+
+        assert database["queries"] == 1
+        assert schema_module.schema_status.ok is True
+        assert schema_module.schema_status.stats()["current"] == ["head1"]
+
+    @pytest.mark.parametrize("current", [frozenset({"old"}), frozenset()])
+    async def test_check_refuses_other_revision(self, database, current):
+        """Test that a database behind (or without) migrations stops the startup."""
+        database["current"] = current
+
+        with pytest.raises(SchemaOutOfDate, match="alembic upgrade head"):
+            await ensure_schema(engine=None, mode="check")
+        assert schema_module.schema_status.ok is False
+
+    async def test_unreachable_database_is_not_fatal(self, database):
+        """Test that a connection error is recorded and startup continues."""
+        database["current"] = ConnectionRefusedError("refused")
+
+        await ensure_schema(engine=None, mode="check")
+
+        assert schema_module.schema_status.ok is None
+        assert "refused" in schema_module.schema_status.error
+
+    async def test_off_runs_no_query(self, database):
+        """Test that mode off does not touch the database."""
+        await ensure_schema(engine=None, mode="off")
+
+        assert database["queries"] == 0
+        assert schema_module.schema_status.stats()["mode"] == "off"
+
+
+class TestMigrationHead:
+    """Test reading the head revision from migrations/."""
+
+    def test_head_of_shipped_migrations(self):
+        """Test that the head is found without an alembic.ini."""
+        pytest.importorskip("alembic")
+        heads = expected_heads()
+
+        assert len(heads) == 1
+        assert expected_heads() is heads
+
+
+class TestLazySyncEngine:
+    """Test that the sync engine only exists once something asks for it."""
+
+    def test_not_created_by_app_import(self):
+        """Test that importing the app (done by conftest) builds no sync engine."""
+        assert session_module._engine_sync is None
+        assert session_module.sync_pool_stats() == {"initialized": False}
+
+    def test_legacy_names_resolve_lazily(self, monkeypatch):
+        """Test that engine_internal_sync / SessionSync still work and share one engine."""
+        monkeypatch.setattr(session_module, "_engine_sync", None)
+        monkeypatch.setattr(session_module, "_session_sync", None)
+
+        engine = session_module.engine_internal_sync
+
+        assert session_module.get_sync_engine() is engine
+        assert session_module.SessionSync.kw["bind"] is engine
+        assert "checked_out" in session_module.sync_pool_stats()
+
+
+class TestQueryShapeIndexes:
+    """Test that the models declare the indexes migration 9d4e1f6a2b73 builds."""
+
+    def test_models_match_migration(self):
+        """Test that new indexes are on the models and superseded ones are gone."""
+        pytest.importorskip("alembic")
+        import importlib.util
+        from pathlib import Path
+
+        from app.db.base import Base
+
+        path = Path(__file__).parents[2] / "migrations" / "versions" / "9d4e1f6a2b73_query_shape_indexes.py"
+        spec = importlib.util.spec_from_file_location("query_shape_indexes", path)
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+
+        declared = {ix.name for table in Base.metadata.tables.values() for ix in table.indexes}
+        assert {name for name, *_ in migration.NEW_INDEXES} <= declared
+        assert not {name for name, *_ in migration.SUPERSEDED_INDEXES} & declared
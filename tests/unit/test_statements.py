@@ -0,0 +1,64 @@
+"""
+Unit tests for app/db/statements.py and the statement cache options in app/db/pool.py
+"""
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db import statements
+from app.db.pool import PoolCounters, asyncpg_connect_args, engine_options
+
+HOT_STATEMENTS = {
+    "PRINCIPAL_BY_ID": {"user_id"},
+    "USER_BY_EMAIL": {"email"},
+    "USER_BY_ID": {"user_id"},
+    "TEAM_BY_ID": {"team_id"},
+    "DIRECT_TEAM_MEMBERSHIP": {"team_id", "user_id"},
+    "ORGANIZATION_TEAM_MEMBERSHIP": {"team_id", "user_id"},
+}
+
+
+class TestPrebuiltStatements:
+    """Test that hot statements are parameterized and built once."""
+
+    @pytest.mark.parametrize("name,params", HOT_STATEMENTS.items())
+    def test_named_parameters(self, name, params):
+        """Test that every per-request value is a named bind parameter."""
+        compiled = getattr(statements, name).compile(dialect=postgresql.dialect())
+
+        assert params <= set(compiled.params)
+
+    @pytest.mark.parametrize("name", HOT_STATEMENTS)
+    def test_cache_key_is_memoized(self, name):
+        """Test that the cache key is computed once, not on every execution."""
+        stmt = getattr(statements, name)
+
+        assert stmt._generate_cache_key() is stmt._generate_cache_key()
+
+
+class TestStatementCacheOptions:
+    """Test asyncpg statement cache and PgBouncer settings."""
+
+    def test_prepared_statement_cache_size(self):
+        """Test that the configured size reaches the asyncpg dialect."""
+        assert asyncpg_connect_args(statement_cache_size=300, pgbouncer=False) == {
+            "prepared_statement_cache_size": 300
+        }
+
+    def test_pgbouncer_disables_caches_and_names_statements_uniquely(self):
+        """Test that PgBouncer mode turns both caches off and never reuses a statement name."""
+        args = asyncpg_connect_args(statement_cache_size=300, pgbouncer=True)
+
+        assert args["prepared_statement_cache_size"] == 0
+        assert args["statement_cache_size"] == 0
+        names = {args["prepared_statement_name_func"]() for _ in range(100)}
+        assert len(names) == 100
+
+    def test_engine_options(self):
+        """Test that only the async engine gets asyncpg arguments; both get the compiled cache size."""
+        async_options = engine_options(PoolCounters(), is_async=True)
+        sync_options = engine_options(PoolCounters(), is_async=False)
+
+        assert "prepared_statement_cache_size" in async_options["connect_args"]
+        assert "connect_args" not in sync_options
+        assert async_options["query_cache_size"] == sync_options["query_cache_size"]
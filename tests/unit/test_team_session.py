@@ -0,0 +1,95 @@
+"""
+Unit tests for app/core/team_session.py
+
+Uses FakeAsyncRedis instead of a real Redis server.
+"""
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from app.core.claims_cache import decode_access_token
+from app.core.permissions import TeamRole, OrganizationType
+from app.core.team_session import (
+    TEAM_SCOPE,
+    create_team_session_token,
+    context_from_claims,
+    get_membership_version,
+    bump_membership_version,
+    membership_versions,
+)
+from app.schemas.user import CurrentUser
+
+
+@pytest.fixture(autouse=True)
+def clear_versions():
+    membership_versions.clear()
+    yield
+    membership_versions.clear()
+
+
+def make_user() -> CurrentUser:
+    return CurrentUser(id=7, name="Dev", email="dev@example.com", token_version=3)
+
+
+class TestTeamSessionToken:
+    """Test team session claims."""
+
+    def test_claims_round_trip(self):
+        """Test that membership claims survive signing and map back to a context."""
+        context = {
+            "team_id": 12,
+            "role": TeamRole.MEMBER,
+            "member_type": "organization",
+            "org_type": OrganizationType.PROVIDER,
+        }
+        token = create_team_session_token(7, 3, context, membership_version=5)
+        claims = decode_access_token(token)
+
+        assert claims["scope"] == TEAM_SCOPE
+        assert (claims["sub"], claims["tv"], claims["mv"]) == ("7", 3, 5)
+
+        rebuilt = context_from_claims(claims, make_user())
+        assert rebuilt["team_id"] == 12
+        assert rebuilt["role"] == TeamRole.MEMBER
+        assert rebuilt["org_type"] == OrganizationType.PROVIDER
+        assert rebuilt["team"] is None and rebuilt["user"].id == 7
+
+    def test_owner_context_has_no_org_type(self):
+        """Test that direct/owner memberships carry org_type None."""
+        context = {"team_id": 1, "role": TeamRole.ADMIN, "member_type": "owner", "org_type": None}
+        claims = decode_access_token(create_team_session_token(7, 3, context, 0))
+
+        assert claims["org_type"] is None
+        assert context_from_claims(claims, make_user())["org_type"] is None
+
+
+@pytest.mark.asyncio
+class TestMembershipVersion:
+    """Test membership version caching and invalidation."""
+
+    async def test_defaults_to_zero(self, redis_client: FakeAsyncRedis):
+        """Test that teams without changes start at version 0."""
+        assert await get_membership_version(redis_client, 1) == 0
+
+    async def test_bump_invalidates_local_cache(self, redis_client: FakeAsyncRedis):
+        """Test that a bump is visible immediately in the bumping worker."""
+        assert await get_membership_version(redis_client, 1) == 0
+        await bump_membership_version(redis_client, [1])
+
+        assert await get_membership_version(redis_client, 1) == 1
+
+    async def test_cached_version_served_without_redis(self, redis_client: FakeAsyncRedis):
+        """Test that cached versions do not hit Redis (another worker's bump is seen via pub/sub)."""
+        assert await get_membership_version(redis_client, 1) == 0
+        await redis_client.incr("team:mv:1")
+
+        assert await get_membership_version(redis_client, 1) == 0
+        assert await get_membership_version(redis_client, 1, use_cache=False) == 1
+
+    async def test_unreadable_version_is_none(self):
+        """Test that Redis errors return None so callers fall back to the database."""
+        class BrokenRedis:
+            async def get(self, key):
+                raise ConnectionError("redis down")
+
+        assert await get_membership_version(BrokenRedis(), 1) is None
@@ -0,0 +1,128 @@
+"""
+Unit tests for app/db/writes.py
+
+Writes run on an in-memory SQLite engine (RETURNING needs SQLite 3.35+)
+through a synchronous Session behind the AsyncSession ``execute`` interface.
+"""
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from app.db.query_stats import capture_queries
+from app.db.writes import VersionConflict, delete_returning, update_returning
+
+Base = declarative_base()
+
+
+class Widget(Base):
+    __tablename__ = "widgets"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50))
+    version = Column(Integer, nullable=False, default=1)
+
+
+class SyncSessionAdapter:
+    """Awaitable ``execute`` over a synchronous Session."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def execute(self, statement):
+        return self.session.execute(statement)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine, expire_on_commit=False) as session:
+        session.add_all([Widget(id=1, name="one"), Widget(id=2, name="two")])
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session):
+    return SyncSessionAdapter(session)
+
+
+@pytest.mark.asyncio
+class TestUpdateReturning:
+    """Test UPDATE ... RETURNING."""
+
+    async def test_single_statement(self, db, session):
+        """Test that the write and the returned row cost one statement and refresh the session's copy."""
+        loaded = session.get(Widget, 1)
+
+        with capture_queries() as queries:
+            widget = await update_returning(db, Widget, [Widget.id == 1], {"name": "uno"})
+
+        assert queries.count == 1
+        assert widget is loaded
+        assert widget.name == "uno"
+
+    async def test_no_match(self, db):
+        """Test that a missing row returns None."""
+        assert await update_returning(db, Widget, [Widget.id == 99], {"name": "x"}) is None
+
+    async def test_empty_values_only_reads(self, db):
+        """Test that an empty PATCH body returns the row without writing."""
+        with capture_queries() as queries:
+            widget = await update_returning(db, Widget, [Widget.id == 2], {})
+
+        assert widget.name == "two"
+        assert [shape.split()[0] for shape in queries.shapes] == ["SELECT"]
+
+    async def test_version_bumped(self, db):
+        """Test that the version column is incremented on every write."""
+        widget = await update_returning(db, Widget, [Widget.id == 1], {}, version_column=Widget.version)
+        widget = await update_returning(
+            db, Widget, [Widget.id == 1], {"name": "uno"}, version_column=Widget.version, expected_version=2
+        )
+
+        assert (widget.name, widget.version) == ("uno", 3)
+
+    async def test_version_conflict(self, db, session):
+        """Test that a stale version is a conflict and leaves the row alone."""
+        with pytest.raises(VersionConflict):
+            await update_returning(
+                db, Widget, [Widget.id == 1], {"name": "uno"}, version_column=Widget.version, expected_version=7
+            )
+
+        session.expire_all()
+        assert session.get(Widget, 1).name == "one"
+
+    async def test_missing_row_with_version(self, db):
+        """Test that a missing row is still None, not a conflict."""
+        result = await update_returning(
+            db, Widget, [Widget.id == 99], {"name": "x"}, version_column=Widget.version, expected_version=1
+        )
+
+        assert result is None
+
+
+@pytest.mark.asyncio
+class TestDeleteReturning:
+    """Test DELETE ... RETURNING."""
+
+    async def test_returns_deleted_row(self, db, session):
+        """Test that the deleted row is returned and dropped from the session."""
+        loaded = session.get(Widget, 2)
+
+        with capture_queries() as queries:
+            widget = await delete_returning(db, Widget, [Widget.id == 2])
+
+        assert queries.count == 1
+        assert widget.name == "two"
+        assert loaded not in session
+        assert await delete_returning(db, Widget, [Widget.id == 2]) is None
+
+    async def test_version_conflict(self, db, session):
+        """Test that a stale version keeps the row."""
+        with pytest.raises(VersionConflict):
+            await delete_returning(db, Widget, [Widget.id == 1], version_column=Widget.version, expected_version=5)
+
+        assert session.get(Widget, 1) is not None